@@ -1,9 +1,9 @@
 import os
-import time
 import logging
 import subprocess
 import platform
 import re
+import threading
 from easencode.easencode import EASEncoder
 
 # Configure logging
@@ -42,15 +42,17 @@ def create_eas_alert(output_file="eas_alert.wav"):
 
 
 # Trigger GPIO Relay
-def trigger_relay(duration=5):
+def trigger_relay(duration=5, offset=0, interrupted=None):
     """
     Activates the GPIO relay to trigger external alarms.
-    The relay stays active for the specified duration.
+    The relay stays active for the specified duration, minus any `offset`
+    already served, or until `interrupted` is set by a more urgent alert.
     """
     logging.info("Activating relay for external alarm...")
+    interrupted = interrupted or threading.Event()
     try:
         relay.on()
-        time.sleep(duration)
+        interrupted.wait(max(duration - offset, 0))
         relay.off()
         logging.info("Relay deactivated.")
     except Exception as e:
@@ -66,9 +68,10 @@ def is_safe_path(file_path):
 
 
 # Play Alert Audio
-def play_alert(audio_file="eas_alert.wav"):
+def play_alert(audio_file="eas_alert.wav", offset=0, interrupted=None):
     """
-    Plays the generated alert audio file.
+    Plays the generated alert audio file, starting `offset` seconds in.
+    Playback stops early when `interrupted` is set by a more urgent alert.
     """
     if not is_safe_path(audio_file):
         logging.error(f"Unsafe file path: {audio_file}")
@@ -77,8 +80,19 @@ def play_alert(audio_file="eas_alert.wav"):
     if not os.path.exists(audio_file):
         logging.error(f"Audio file {audio_file} not found.")
         return
+    interrupted = interrupted or threading.Event()
     try:
-        subprocess.run(["ffplay", "-nodisp", "-autoexit", audio_file], check=True)
+        process = subprocess.Popen(
+            ["ffplay", "-nodisp", "-autoexit", "-ss", str(offset), audio_file]
+        )
+        while process.poll() is None:
+            if interrupted.wait(0.1):
+                process.terminate()
+                process.wait()
+                logging.info("Audio playback paused for a higher-priority alert.")
+                return
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, process.args)
         logging.info("Audio playback complete.")
     except FileNotFoundError:
         logging.error("FFmpeg is not installed. Install it to enable audio playback.")
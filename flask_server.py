@@ -1,7 +1,11 @@
 from flask import (
     Flask,
+    Response,
+    g,
     render_template,
     request,
+    stream_template,
+    stream_with_context,
     redirect,
     url_for,
     flash,
@@ -20,7 +24,24 @@ import subprocess
 from mqtt_client import forward_alert, send_notifications
 from datetime import datetime
 import os
+from twilio.request_validator import RequestValidator
 from werkzeug.security import generate_password_hash, check_password_hash
+from modules.archive import LogArchiver
+from modules.audit import AuditWriter
+from modules.delivery import DeliveryLedger
+from modules.settings_cache import SettingsCache, initialize_settings_version
+from modules.stats import StatsCache, initialize_stats
+from modules.user_import import FORMATS, export_users, import_users, read_rows
+from modules.escalation import acknowledge
+from modules.export import DATASETS, encode_rows, gzip_chunks, query_dataset
+from modules.log_search import (
+    SEARCH_PAGE_MAX,
+    SEARCH_PAGE_SIZE,
+    initialize_log_search,
+    search_logs,
+)
+from utils.cache import TTLCache
+from utils.db import ConnectionPool, KeysetPage
 
 app = Flask(__name__)
 
@@ -28,6 +49,12 @@ app = Flask(__name__)
 FLASK_SECRET_KEY = os.getenv("FLASK_SECRET_KEY", "default_secret_key")
 DEBUG_MODE = os.getenv("FLASK_DEBUG", "false").lower() == "true"
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
+TWILIO_TOKEN = os.getenv("TWILIO_TOKEN")
+STATUS_CALLBACK_URL = os.getenv("STATUS_CALLBACK_URL")
+LOG_PAGE_SIZE = int(os.getenv("LOG_PAGE_SIZE", 100))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 1024))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 30))  # seconds
+LOG_PAGE_MAX = 1000  # rows per page a client can ask for
 
 app.secret_key = FLASK_SECRET_KEY
 
@@ -42,15 +69,38 @@ class User(UserMixin):
 
 
 # Database functions
+db_pool = ConnectionPool()
+log_archiver = LogArchiver(db_pool.db_path)
+stats_cache = StatsCache()
+settings_cache = SettingsCache()
+user_cache = TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+
+
+def get_db():
+    """
+    Returns the request's database connection, checking one out of the
+    pool on first use.
+    """
+    if "db" not in g:
+        g.db = db_pool.acquire()
+    return g.db
+
+
+@app.teardown_appcontext
+def release_db(exception):
+    """
+    Returns the request's database connection to the pool.
+    """
+    conn = g.pop("db", None)
+    if conn is not None:
+        db_pool.release(conn)
+
+
 def query_db(query, args=(), one=False):
     """
     Executes a query on the database and returns the result.
     """
-    conn = sqlite3.connect("database.db")
-    cursor = conn.cursor()
-    cursor.execute(query, args)
-    rv = cursor.fetchall()
-    conn.close()
+    rv = get_db().execute(query, args).fetchall()
     return (rv[0] if rv else None) if one else rv
 
 
@@ -58,20 +108,46 @@ def modify_db(query, args=()):
     """
     Executes a modification query on the database (INSERT/UPDATE/DELETE).
     """
-    conn = sqlite3.connect("database.db")
-    cursor = conn.cursor()
-    cursor.execute(query, args)
+    conn = get_db()
+    conn.execute(query, args)
     conn.commit()
-    conn.close()
+
+
+delivery_ledger = None
+audit_writer = None
+
+
+def get_delivery_ledger():
+    """
+    Returns the delivery ledger, starting its writer on first use.
+    """
+    global delivery_ledger
+    if delivery_ledger is None:
+        delivery_ledger = DeliveryLedger()
+    return delivery_ledger
+
+
+def get_audit_writer():
+    """
+    Returns the audit writer, starting it on first use.
+    """
+    global audit_writer
+    if audit_writer is None:
+        audit_writer = AuditWriter(db_pool.db_path)
+    return audit_writer
 
 
 @login_manager.user_loader
 def user_loader(username):
     """
-    Loads a user by username.
+    Loads a user by username. Records are cached for USER_CACHE_TTL
+    seconds, so most authenticated requests skip the database.
     """
-    user_record = query_db(
-        "SELECT username, role FROM users WHERE username = ?", [username], one=True
+    user_record = user_cache.get(
+        username,
+        lambda: query_db(
+            "SELECT username, role FROM users WHERE username = ?", [username], one=True
+        ),
     )
     if user_record is None:
         return None
@@ -81,6 +157,14 @@ def user_loader(username):
     return user
 
 
+@app.context_processor
+def inject_settings():
+    """
+    Makes the theme and language available to every template.
+    """
+    return {"settings": settings_cache.get(get_db())}
+
+
 @app.before_request
 def enforce_https():
     """
@@ -129,19 +213,21 @@ def index():
     """
     Displays the main dashboard.
     """
-    alerts_count = query_db("SELECT COUNT(*) FROM logs", one=True)[0]
-    user_count = query_db("SELECT COUNT(*) FROM users", one=True)[0]
-    system_uptime = (
-        datetime.now()
-        - datetime.fromtimestamp(
-            query_db("SELECT MIN(timestamp) FROM logs", one=True)[0]
-        )
-    ).total_seconds()
+    stats = stats_cache.get(get_db())
+    first = stats["logs_first"]
+    if first is None:
+        system_uptime = 0
+    else:
+        if isinstance(first, str):
+            first = datetime.fromisoformat(first)
+        else:
+            first = datetime.fromtimestamp(first)
+        system_uptime = (datetime.now() - first).total_seconds()
     return render_template(
         "index.html",
         role=current_user.role,
-        alerts_count=alerts_count,
-        user_count=user_count,
+        alerts_count=stats["logs_count"],
+        user_count=stats["users_count"],
         system_uptime=system_uptime,
     )
 
@@ -163,14 +249,150 @@ def trigger_alert():
     return redirect(url_for("index"))
 
 
+@app.route("/acknowledge/<int:alert_id>", methods=["POST"])
+@login_required
+def acknowledge_alert(alert_id):
+    """
+    Acknowledges an alert, stopping its escalation.
+    """
+    try:
+        acknowledged = acknowledge(alert_id, current_user.id)
+    except sqlite3.OperationalError:
+        acknowledged = False  # no escalation has been opened yet
+    if acknowledged:
+        log_event(f"{current_user.id} acknowledged alert {alert_id}")
+        flash("Alert acknowledged", "success")
+    else:
+        flash("Alert is not awaiting acknowledgement", "warning")
+    return redirect(url_for("index"))
+
+
 @app.route("/log")
 @login_required
 def view_log():
     """
-    Displays system logs.
+    Displays system logs, newest first, one page at a time. Pages are
+    addressed by the timestamp and id of the last row shown, so every page
+    is an index range scan however deep it is, and rows are streamed to
+    the client as they are read.
+    """
+    limit = request.args.get("limit", LOG_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, LOG_PAGE_MAX))
+    before = request.args.get("before")
+    before_id = request.args.get("before_id", type=int)
+    if before is not None and before_id is not None:
+        cursor = get_db().execute(
+            "SELECT id, event, timestamp FROM logs "
+            "WHERE (timestamp, id) < (?, ?) "
+            "ORDER BY timestamp DESC, id DESC LIMIT ?",
+            (before, before_id, limit + 1),
+        )
+    else:
+        cursor = get_db().execute(
+            "SELECT id, event, timestamp FROM logs "
+            "ORDER BY timestamp DESC, id DESC LIMIT ?",
+            (limit + 1,),
+        )
+    return stream_template(
+        "alert_log.html", logs=KeysetPage(cursor, limit), limit=limit
+    )
+
+
+@app.route("/api/logs/search")
+@login_required
+def log_search():
+    """
+    Searches the log with full-text ranking. Matches are highlighted with
+    <mark> in the otherwise HTML-escaped event text. With a `month`
+    parameter the archive of that month is searched instead.
+    """
+    query = request.args.get("q", "")
+    limit = request.args.get("limit", SEARCH_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, SEARCH_PAGE_MAX))
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    month = request.args.get("month")
+    if month:
+        try:
+            conn = log_archiver.open(month)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 404
+        try:
+            results = search_logs(conn, query, limit + 1, offset)
+        finally:
+            conn.close()
+    else:
+        results = search_logs(get_db(), query, limit + 1, offset)
+    return jsonify(
+        {
+            "results": results[:limit],
+            "next_offset": offset + limit if len(results) > limit else None,
+        }
+    )
+
+
+@app.route("/api/logs/archives")
+@login_required
+def log_archives():
+    """
+    Lists the archived months that can be searched.
     """
-    logs = query_db("SELECT * FROM logs ORDER BY timestamp DESC")
-    return render_template("alert_log.html", logs=logs)
+    return jsonify({"months": log_archiver.months()})
+
+
+@app.route("/api/export/<dataset>")
+@login_required
+def export_dataset(dataset):
+    """
+    Streams the logs, deliveries or escalations as CSV or NDJSON, read a
+    chunk at a time so memory use stays flat however much is exported.
+    Optional `since` and `until` ISO 8601 bounds limit the time range,
+    `month` exports an archived month of logs and `gzip=true` compresses
+    the stream on the fly.
+    """
+    if current_user.role != "admin":
+        return jsonify({"error": "Admin role required"}), 403
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in FORMATS:
+        return jsonify({"error": f"Unsupported format: {fmt}"}), 400
+    if dataset not in DATASETS:
+        return jsonify({"error": f"Unknown dataset: {dataset}"}), 404
+    month = request.args.get("month")
+    try:
+        conn = log_archiver.open(month) if month and dataset == "logs" else get_db()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    archived = conn is not g.get("db")
+    try:
+        cursor, columns = query_dataset(
+            conn, dataset, request.args.get("since"), request.args.get("until")
+        )
+    except ValueError as e:
+        if archived:
+            conn.close()
+        return jsonify({"error": str(e)}), 400
+    except sqlite3.OperationalError:
+        if archived:
+            conn.close()
+        return jsonify({"error": f"No {dataset} have been recorded"}), 404
+
+    def generate():
+        try:
+            yield from encode_rows(cursor, columns, fmt)
+        finally:
+            if archived:
+                conn.close()
+
+    filename = f"{dataset}-{month}.{fmt}" if month else f"{dataset}.{fmt}"
+    body, mimetype = generate(), FORMATS[fmt]
+    if request.args.get("gzip", "false").lower() == "true":
+        body = gzip_chunks(body)
+        mimetype, filename = "application/gzip", f"{filename}.gz"
+    log_event(f"{current_user.id} exported {dataset}")
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
 
 
 @app.route("/manage_users", methods=["GET", "POST"])
@@ -190,11 +412,56 @@ def manage_users():
             "INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
             [username, password, role],
         )
+        stats_cache.invalidate()
+        user_cache.invalidate(username)
         flash("User added successfully", "success")
     users = query_db("SELECT username, role FROM users")
     return render_template("manage_users.html", users=users)
 
 
+@app.route("/manage_users/import", methods=["POST"])
+@login_required
+def import_user_file():
+    """
+    Adds users in bulk from a CSV (username,password,role header) or
+    NDJSON upload, sent as the "file" form field or as the request body.
+    Returns the number imported and the errors of rejected rows.
+    """
+    if current_user.role != "admin":
+        return jsonify({"error": "Admin role required"}), 403
+    fmt = request.args.get("format", "csv")
+    if fmt not in FORMATS:
+        return jsonify({"error": f"Unsupported format: {fmt}"}), 400
+    upload = request.files.get("file")
+    stream = upload.stream if upload else request.stream
+    try:
+        report = import_users(get_db(), read_rows(stream, fmt))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    user_cache.clear()
+    stats_cache.invalidate()
+    log_event(f"{current_user.id} imported {report['imported']} users")
+    return jsonify(report)
+
+
+@app.route("/manage_users/export")
+@login_required
+def export_user_file():
+    """
+    Streams every user's name and role as CSV or NDJSON.
+    """
+    if current_user.role != "admin":
+        return jsonify({"error": "Admin role required"}), 403
+    fmt = request.args.get("format", "csv")
+    if fmt not in FORMATS:
+        return jsonify({"error": f"Unsupported format: {fmt}"}), 400
+    return Response(
+        stream_with_context(export_users(get_db(), fmt)),
+        mimetype=FORMATS[fmt],
+        headers={"Content-Disposition": f"attachment; filename=users.{fmt}"},
+    )
+
+
 @app.route("/settings", methods=["GET", "POST"])
 @login_required
 def settings():
@@ -211,237 +478,73 @@ def settings():
             "UPDATE settings SET theme = ?, language = ? WHERE id = 1",
             [theme, language],
         )
+        settings_cache.invalidate()
         flash("Settings updated successfully", "success")
-    settings = query_db("SELECT theme, language FROM settings WHERE id = 1", one=True)
-    return render_template("settings.html", settings=settings)
+    return render_template("settings.html")
+
+
+@app.route("/webhooks/delivery_status", methods=["POST"])
+def delivery_status():
+    """
+    Receives SMS and voice status callbacks from Twilio. Callbacks are
+    only queued here; the ledger's writer applies them in batches.
+    """
+    signature = request.headers.get("X-Twilio-Signature", "")
+    url = STATUS_CALLBACK_URL or request.url
+    if not TWILIO_TOKEN or not RequestValidator(TWILIO_TOKEN).validate(
+        url, request.form, signature
+    ):
+        return jsonify({"error": "Invalid signature"}), 403
+    sid = request.form.get("MessageSid") or request.form.get("CallSid")
+    status = request.form.get("MessageStatus") or request.form.get("CallStatus")
+    if not sid or not status:
+        return jsonify({"error": "Missing message id or status"}), 400
+    try:
+        queued = get_delivery_ledger().update(
+            sid, status, request.form.get("ErrorCode")
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not queued:
+        # Twilio retries callbacks that fail, so shed load rather than block
+        return jsonify({"error": "Delivery queue is full"}), 503
+    return "", 204
 
 
-def log_event(event):
+@app.route("/api/alerts/<int:alert_id>/delivery")
+@login_required
+def delivery_progress(alert_id):
     """
-    Logs an event in the database.
+    Returns the delivery percentages of an alert.
     """
-    modify_db(
-        "INSERT INTO logs (event, timestamp) VALUES (?, ?)",
-        [event, datetime.now()],
-    )
-
+    return jsonify(get_delivery_ledger().progress(alert_id))
 
-if __name__ == "__main__":
-    # Failsafe for missing secrets in production
-    if ENVIRONMENT == "production" and not FLASK_SECRET_KEY:
-        raise RuntimeError(
-            "Critical FLASK_SECRET_KEY is missing in production. Aborting."
-        )
 
-    # Initialize database
-    conn = sqlite3.connect("database.db")
-    cursor = conn.cursor()
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS users (
-            username TEXT PRIMARY KEY,
-            password TEXT NOT NULL,
-            role TEXT NOT NULL
-        )
+@app.route("/api/metrics")
+@login_required
+def metrics():
     """
-    )
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS logs (
-            id INTEGER PRIMARY KEY,
-            event TEXT NOT NULL,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
+    Returns database and background writer metrics for admins.
     """
+    if current_user.role != "admin":
+        return jsonify({"error": "Admin role required"}), 403
+    return jsonify(
+        {
+            "audit": get_audit_writer().stats(),
+            "db_pool": db_pool.stats(),
+            "archive": log_archiver.stats(),
+            "user_cache": user_cache.stats(),
+            "deliveries": dict(delivery_ledger.counters) if delivery_ledger else {},
+        }
     )
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS settings (
-            id INTEGER PRIMARY KEY,
-            theme TEXT DEFAULT 'light',
-            language TEXT DEFAULT 'en'
-        )
-    """
-    )
-    cursor.execute(
-        "INSERT OR IGNORE INTO settings (id, theme, language) VALUES (1, 'light', 'en')"
-    )
-    conn.commit()
-    conn.close()
-
-    print(f"Running in {ENVIRONMENT} mode...")
-    app.run(
-        host="0.0.0.0",
-        port=5000,
-        ssl_context=("certs/server.crt", "certs/server.key"),
-    )
-etenv("FLASK_DEBUG", "false").lower() == "true"
-ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
-
-app.secret_key = FLASK_SECRET_KEY
-
-# Flask-Login setup
-login_manager = LoginManager()
-login_manager.login_view = "login"
-login_manager.init_app(app)
-
-
-class User(UserMixin):
-    pass
-
-
-# Database functions
-def query_db(query, args=(), one=False):
-    conn = sqlite3.connect("database.db")
-    cursor = conn.cursor()
-    cursor.execute(query, args)
-    rv = cursor.fetchall()
-    conn.close()
-    return (rv[0] if rv else None) if one else rv
-
-
-def modify_db(query, args=()):
-    conn = sqlite3.connect("database.db")
-    cursor = conn.cursor()
-    cursor.execute(query, args)
-    conn.commit()
-    conn.close()
-
-
-@login_manager.user_loader
-def user_loader(username):
-    user_record = query_db(
-        "SELECT username, role FROM users WHERE username = ?",
-        [username],
-        one=True,
-    )
-    if user_record is None:
-        return None
-    user = User()
-    user.id = user_record[0]
-    user.role = user_record[1]
-    return user
 
 
-@app.before_request
-def enforce_https():
+def log_event(event):
     """
-    Enforce HTTPS in production environment.
+    Logs an event in the database. The insert is group-committed by the
+    audit writer in the background.
     """
-    if ENVIRONMENT == "production" and not request.is_secure:
-        return jsonify({"error": "HTTPS is required in production"}), 403
-
-
-@app.route("/login", methods=["GET", "POST"])
-def login():
-    if request.method == "POST":
-        username = request.form["username"]
-        password = request.form["password"]
-        user_record = query_db(
-            "SELECT username, password, role FROM users WHERE username = ?",
-            [username],
-            one=True,
-        )
-        if user_record and user_record[1] == password:
-            user = User()
-            user.id = user_record[0]
-            user.role = user_record[2]
-            login_user(user)
-            return redirect(url_for("index"))
-        flash("Invalid credentials", "danger")
-    return render_template("login.html")
-
-
-@app.route("/logout")
-@login_required
-def logout():
-    logout_user()
-    return redirect(url_for("login"))
-
-
-@app.route("/")
-@login_required
-def index():
-    alerts_count = query_db("SELECT COUNT(*) FROM logs", one=True)[0]
-    user_count = query_db("SELECT COUNT(*) FROM users", one=True)[0]
-    system_uptime = (
-        datetime.now()
-        - datetime.fromtimestamp(
-            query_db("SELECT MIN(timestamp) FROM logs", one=True)[0]
-        )
-    ).total_seconds()
-    return render_template(
-        "index.html",
-        role=current_user.role,
-        alerts_count=alerts_count,
-        user_count=user_count,
-        system_uptime=system_uptime,
-    )
-
-
-@app.route("/trigger", methods=["POST"])
-@login_required
-def trigger_alert():
-    if current_user.role != "admin":
-        flash("You do not have permission to perform this action", "danger")
-        return redirect(url_for("index"))
-    subprocess.run(["python3", "eas_alert.py"])
-    forward_alert()
-    send_notifications("An emergency alert has been triggered.")
-    log_event(f"{current_user.id} triggered an alert")
-    flash("Alert triggered successfully", "success")
-    return redirect(url_for("index"))
-
-
-@app.route("/log")
-@login_required
-def view_log():
-    logs = query_db("SELECT * FROM logs ORDER BY timestamp DESC")
-    return render_template("alert_log.html", logs=logs)
-
-
-@app.route("/manage_users", methods=["GET", "POST"])
-@login_required
-def manage_users():
-    if current_user.role != "admin":
-        flash("You do not have permission to perform this action", "danger")
-        return redirect(url_for("index"))
-    if request.method == "POST":
-        username = request.form["username"]
-        password = request.form["password"]
-        role = request.form["role"]
-        modify_db(
-            "INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
-            [username, password, role],
-        )
-        flash("User added successfully", "success")
-    users = query_db("SELECT username, role FROM users")
-    return render_template("manage_users.html", users=users)
-
-
-@app.route("/settings", methods=["GET", "POST"])
-@login_required
-def settings():
-    if current_user.role != "admin":
-        flash("You do not have permission to perform this action", "danger")
-        return redirect(url_for("index"))
-    if request.method == "POST":
-        theme = request.form["theme"]
-        language = request.form["language"]
-        modify_db(
-            "UPDATE settings SET theme = ?, language = ? WHERE id = 1",
-            [theme, language],
-        )
-        flash("Settings updated successfully", "success")
-    settings = query_db("SELECT theme, language FROM settings WHERE id = 1", one=True)
-    return render_template("settings.html", settings=settings)
-
-
-def log_event(event):
-    modify_db(
-        "INSERT INTO logs (event, timestamp) VALUES (?, ?)",
-        [event, datetime.now()],
-    )
+    get_audit_writer().log(event)
 
 
 if __name__ == "__main__":
@@ -452,7 +555,7 @@ if __name__ == "__main__":
         )
 
     # Initialize database
-    conn = sqlite3.connect("database.db")
+    conn = sqlite3.connect(db_pool.db_path)
     cursor = conn.cursor()
     cursor.execute(
         """
@@ -481,11 +584,16 @@ if __name__ == "__main__":
         )
     """
     )
+    cursor.execute("CREATE INDEX IF NOT EXISTS logs_timestamp ON logs (timestamp)")
     cursor.execute(
         "INSERT OR IGNORE INTO settings (id, theme, language) VALUES (1, 'light', 'en')"
     )
     conn.commit()
+    initialize_stats(conn)
+    initialize_log_search(conn)
+    initialize_settings_version(conn)
     conn.close()
+    log_archiver.start_thread()
 
     print(f"Running in {ENVIRONMENT} mode...")
     app.run(
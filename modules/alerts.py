@@ -1,23 +1,92 @@
 import os
+import re
 import logging
 import json
+import time
+from collections import OrderedDict
 from datetime import datetime
 from twilio.rest import Client
+from twilio.http.http_client import TwilioHttpClient
 from cryptography.fernet import Fernet
-from OpenENDEC.decode import format_message
+from modules.push import FCMPushChannel
+from modules.scheduler import AlertScheduler, STATEMENT, WARNING, priority_for_event
+from modules.subscriptions import SubscriptionStore
+from modules.geofence import RecipientGeofence
+from modules.sender_pool import SenderPool
+from modules.coalescer import AlertCoalescer
+from modules.delivery import DeliveryLedger
+from modules.fallback import FallbackEngine
+from modules.escalation import EscalationEngine
+from modules.sirens import (
+    SIREN_DURATION,
+    CallbackTransport,
+    SirenDispatcher,
+    SirenRegistry,
+)
+from modules.relay_nodes import MQTT_BROKER, MQTT_PORT, RelayController
+from modules.voice import VOICE_SLOTS, VoiceDispatcher
+from modules.resilience import PROVIDER_TIMEOUT, Provider, ResilientChannel
+from utils.eas_utils import count_sms, parse_header, render_digest, render_message
+from utils.gsm7 import segment_count
+
+# Dispatch Settings
+SMS_WORKERS = int(os.getenv("SMS_WORKERS", 4))
+LOCAL_OUTPUTS = os.getenv("LOCAL_OUTPUTS", "false").lower() == "true"
+ALERT_AUDIO_FILE = os.getenv("ALERT_AUDIO_FILE", "eas_alert.wav")
+RELAY_DURATION = int(os.getenv("RELAY_DURATION", 5))  # seconds
+STATUS_CALLBACK_URL = os.getenv("STATUS_CALLBACK_URL")  # delivery status webhook
+SUBSCRIPTIONS_FILE = os.getenv("SUBSCRIPTIONS_FILE")  # CSV seeded at startup
+SIRENS_FILE = os.getenv("SIRENS_FILE")  # CSV seeded at startup
+SEGMENT_HISTORY = int(os.getenv("SEGMENT_HISTORY", 1000))  # alerts with segment counts
 
 
 class AlertSystem:
     def __init__(self):
         self.twilio_client = Client(
-            os.getenv("TWILIO_SID"), os.getenv("TWILIO_TOKEN")
+            os.getenv("TWILIO_SID"),
+            os.getenv("TWILIO_TOKEN"),
+            http_client=TwilioHttpClient(timeout=PROVIDER_TIMEOUT),
         )
         encryption_key = os.getenv("ENCRYPTION_KEY")
         if not encryption_key:
             raise EnvironmentError("ENCRYPTION_KEY environment variable is missing.")
         self.cipher_suite = Fernet(encryption_key)
+        self.sender_pool = SenderPool(self.get_sender_numbers())
+        self.sms_channel = self.initialize_sms_channel()
+        self.push_channel = FCMPushChannel() if os.getenv("FCM_SERVER_KEY") else None
+        self.subscriptions = SubscriptionStore()
+        if SUBSCRIPTIONS_FILE:
+            self.subscriptions.seed(SUBSCRIPTIONS_FILE)
+        self.geofence = RecipientGeofence()
+        if SUBSCRIPTIONS_FILE:
+            self.geofence.seed(SUBSCRIPTIONS_FILE)
+        self.sirens = SirenRegistry()
+        if SIRENS_FILE:
+            self.sirens.seed(SIRENS_FILE)
+        self.siren_dispatcher = SirenDispatcher(
+            self.sirens, self.initialize_siren_transports()
+        )
+        self.deliveries = DeliveryLedger()
+        self.voice = VoiceDispatcher(
+            self.twilio_client,
+            self.get_sender_numbers()[0],
+            status_callback=STATUS_CALLBACK_URL,
+            ledger=self.deliveries,
+        )
         self.alert_history = []
+        self.sms_segments = OrderedDict()  # scheduler alert id -> SMS segments sent
         self.initialize_logging()
+        self.scheduler = self.initialize_scheduler()
+        self.coalescer = AlertCoalescer(self.send_digests)
+        # Without status callbacks no SMS or call is ever confirmed
+        self.fallback = FallbackEngine(
+            self.queue_deliveries,
+            confirmed=self.deliveries.delivered if STATUS_CALLBACK_URL else None,
+        )
+        self.fallback.start_thread()
+        self.escalation = EscalationEngine(self.send_escalation)
+        self.escalation.restore()
+        self.escalation.start_thread()
 
     def initialize_logging(self):
         """
@@ -30,13 +99,113 @@ class AlertSystem:
             format="%(asctime)s - %(levelname)s - %(message)s",
         )
 
-    def process_eas_message(self, message, geographic_area=None):
+    def initialize_siren_transports(self):
+        """
+        Sets up the local siren transport and, when an MQTT broker is
+        configured, the controller for relay nodes on other Pis.
+
+        Returns:
+            dict: Transport name to transport object.
+        """
+        transports = {"local": CallbackTransport(self.activate_siren)}
+        if MQTT_BROKER:
+            # Imported late: paho-mqtt is only needed with remote relay nodes
+            import paho.mqtt.client as mqtt
+
+            client = mqtt.Client()
+            client.connect(MQTT_BROKER, MQTT_PORT)
+            client.loop_start()
+            self.relay_controller = RelayController(client)
+            self.relay_controller.start_thread()
+            transports["mqtt"] = self.relay_controller
+        return transports
+
+    def initialize_scheduler(self):
+        """
+        Sets up a priority queue per channel and output so that urgent
+        alerts are delivered ahead of queued lower-priority work.
+
+        Returns:
+            AlertScheduler: The configured scheduler.
+        """
+        # Ids key persisted deliveries and escalations, so keep them unique
+        # across restarts
+        scheduler = AlertScheduler(first_id=int(time.time() * 1000))
+        scheduler.add_channel("sms", self.send_sms, workers=SMS_WORKERS)
+        scheduler.add_channel("websocket", self.send_websocket)
+        scheduler.add_channel("push", self.send_push)
+        scheduler.add_channel("voice", self.send_voice, workers=VOICE_SLOTS)
+        scheduler.add_channel("sirens", self.trigger_sirens)
+        if LOCAL_OUTPUTS:
+            # Imported late: eas_alert claims the relay GPIO and configures logging
+            from eas_alert import play_alert, trigger_relay
+
+            scheduler.add_output("relay", trigger_relay)
+            scheduler.add_output("audio", play_alert)
+        return scheduler
+
+    def initialize_sms_channel(self):
+        """
+        Wraps each SMS provider in a circuit breaker. When a backup Twilio
+        account is configured it takes over while the primary is failing,
+        and slow primary requests are hedged to it if HEDGE_DELAY is set.
+
+        Returns:
+            ResilientChannel: The SMS channel.
+        """
+        primary = self.twilio_client
+        callback = (
+            {"status_callback": STATUS_CALLBACK_URL} if STATUS_CALLBACK_URL else {}
+        )
+        providers = [
+            Provider(
+                "twilio",
+                lambda recipient, alert, number: primary.messages.create(
+                    body=alert, from_=number, to=recipient, **callback
+                ),
+                trips=self.is_provider_fault,
+            )
+        ]
+        if os.getenv("TWILIO_BACKUP_SID"):
+            backup = Client(
+                os.getenv("TWILIO_BACKUP_SID"),
+                os.getenv("TWILIO_BACKUP_TOKEN"),
+                http_client=TwilioHttpClient(timeout=PROVIDER_TIMEOUT),
+            )
+            backup_number = os.getenv("TWILIO_BACKUP_NUMBER")
+            providers.append(
+                Provider(
+                    "twilio-backup",
+                    lambda recipient, alert, number: backup.messages.create(
+                        body=alert, from_=backup_number, to=recipient, **callback
+                    ),
+                    trips=self.is_provider_fault,
+                )
+            )
+        return ResilientChannel(providers, workers=SMS_WORKERS * len(providers))
+
+    def is_provider_fault(self, error):
+        """
+        Checks whether a send error means the provider itself is failing.
+        Throttling and rejected requests do not open the circuit.
+
+        Args:
+            error (Exception): The error raised by the provider.
+
+        Returns:
+            bool: True for timeouts, connection errors and 5xx responses.
+        """
+        return getattr(error, "status", 500) >= 500
+
+    def process_eas_message(self, message, geographic_area=None, polygon=None):
         """
         Processes an Emergency Alert System (EAS) message.
 
         Args:
             message (str): The raw EAS message.
             geographic_area (str, optional): The area to target the alert.
+                Defaults to the location codes in the SAME header.
+            polygon (list, optional): (lat, lon) vertices of a warning polygon.
 
         Returns:
             str: The decoded and formatted alert message.
@@ -44,26 +213,136 @@ class AlertSystem:
         if not isinstance(message, str) or not message.strip():
             raise ValueError("Invalid EAS message. Message must be a non-empty string.")
 
+        # Imported late: the decoder is only needed for raw EAS messages
+        from OpenENDEC.decode import format_message
+
         decoded_message = format_message(message)
-        encrypted_message = self.encrypt_message(decoded_message)
         self.validate_alert(decoded_message)
-        self.distribute_alert(encrypted_message, geographic_area)
+        header = self.get_header(message)
+        event = header["event"] if header else None
+        area = geographic_area or (header["locations"] if header else None)
+        self.distribute_alert(
+            decoded_message, area, priority_for_event(event), event, polygon
+        )
         self.log_alert(decoded_message)
         return decoded_message
 
-    def distribute_alert(self, alert, area=None):
+    def distribute_alert(
+        self, alert, area=None, priority=STATEMENT, event=None, polygon=None
+    ):
         """
-        Distributes the alert via SMS, WebSocket, and sirens.
+        Queues the alert for SMS, WebSocket, push, sirens and local outputs.
+        Deliveries of less urgent alerts still queued are paused until this
+        alert's deliveries have gone out. SMS gets a compact GSM-7 rendering
+        and WebSocket clients the encrypted alert. During alert storms SMS
+        recipients already alerted in the coalescing window get the less
+        severe alerts later, merged into one digest.
+
+        Recipients are reached on their preferred channel first and fall
+        back to SMS, then voice, if no delivery is confirmed in time.
+        Warnings and national alerts escalate until acknowledged.
 
         Args:
             alert (str): The alert to distribute.
             area (str, optional): The geographic area for the alert.
+            priority (int, optional): The severity class of the alert.
+            event (str, optional): The SAME event code used for targeting.
+            polygon (list, optional): (lat, lon) vertices of a warning polygon.
+
+        Returns:
+            int: The scheduler's id for the alert.
+        """
+        recipients = self.get_recipients(area, event, polygon)
+        sms_recipients = [
+            r for r in recipients if self.coalescer.admit(r, "sms", alert, priority)
+        ]
+        sms = render_message(alert, "sms")
+        voice = render_message(alert, "voice")
+        encrypted = self.encrypt_message(alert)
+        alert_id = self.scheduler.reserve_id()
+        self.scheduler.submit(
+            priority,
+            {
+                "websocket": [(recipient, encrypted) for recipient in recipients],
+                "push": [(render_message(alert, "push"),)],
+                "voice": [
+                    (recipient, voice, alert_id)
+                    for recipient in self.get_voice_recipients()
+                ],
+                "sirens": [(area, polygon)],
+                "relay": [(RELAY_DURATION,)],
+                "audio": [(ALERT_AUDIO_FILE,)],
+            },
+            alert_id,
+        )
+        queued = self.fallback.start(
+            alert_id, sms_recipients, ([alert], priority), sent=("websocket",)
+        )
+        if priority <= WARNING:
+            self.escalation.open(alert_id, render_message(alert, "push")[:120])
+        encoding, segments = segment_count(sms)
+        self.sms_segments[alert_id] = segments * queued.get("sms", 0)
+        while len(self.sms_segments) > SEGMENT_HISTORY:
+            self.sms_segments.popitem(last=False)
+        logging.info(
+            f"Alert {alert_id}: {segments} {encoding} segment(s) per SMS "
+            f"to {queued.get('sms', 0)} of {len(recipients)} recipients"
+        )
+        return alert_id
+
+    def send_escalation(self, contacts, alert_id, summary, level):
+        """
+        Notifies an escalation tier that an alert is still unacknowledged.
+
+        Args:
+            contacts (list): The tier's phone numbers.
+            alert_id (int): The unacknowledged alert.
+            summary (str): Short description of the alert.
+            level (int): The tier being notified, from zero.
+        """
+        message = f"ESCALATION {level + 1}: alert {alert_id} unacknowledged. {summary}"
+        self.scheduler.submit(
+            WARNING, {"sms": [(contact, message) for contact in contacts]}
+        )
+
+    def queue_deliveries(self, channel, alert_id, recipients, content):
+        """
+        Queues an alert on one channel for the given recipients. Called by
+        the fallback engine for first attempts and fallbacks.
+
+        Args:
+            channel (str): The channel to deliver on.
+            alert_id (int): The alert id.
+            recipients (list): The recipients.
+            content (tuple): The alerts, merged into one message when there
+                are several, and their priority.
+        """
+        alerts, priority = content
+        if channel == "websocket":
+            message = alerts[0] if len(alerts) == 1 else render_digest(alerts, channel)
+            encrypted = self.encrypt_message(message)
+            items = [(recipient, encrypted) for recipient in recipients]
+        else:
+            rendered = render_digest(alerts, channel)
+            items = [(recipient, rendered, alert_id) for recipient in recipients]
+        self.scheduler.submit(priority, {channel: items}, alert_id)
+
+    def send_digests(self, digests):
+        """
+        Delivers the alerts held back by the coalescer, one merged message
+        per recipient. Recipients held the same alerts share an id, and
+        digests go through the fallback engine like any other alert.
+
+        Args:
+            digests (list): (recipient, channel, priority, alerts) tuples.
         """
-        recipients = self.get_recipients(area)
-        for recipient in recipients:
-            self.send_sms(recipient, alert)
-            self.send_websocket(recipient, alert)
-        self.trigger_sirens(area)
+        groups = {}
+        for recipient, _, priority, alerts in digests:
+            groups.setdefault((priority, tuple(alerts)), []).append(recipient)
+        for (priority, alerts), recipients in sorted(groups.items()):
+            alert_id = self.scheduler.reserve_id()
+            self.fallback.start(alert_id, recipients, (list(alerts), priority))
+            logging.info(f"Alert {alert_id}: {len(recipients)} coalesced digest(s)")
 
     def validate_alert(self, alert):
         """
@@ -84,6 +363,21 @@ class AlertSystem:
             raise ValueError("Duplicate alert detected.")
         return True
 
+    def get_header(self, message):
+        """
+        Parses the SAME header of a raw EAS message.
+
+        Args:
+            message (str): The raw EAS message.
+
+        Returns:
+            dict: The parsed header, or None if the message has no SAME header.
+        """
+        try:
+            return parse_header(message)
+        except ValueError:
+            return None
+
     def encrypt_message(self, message):
         """
         Encrypts the alert message.
@@ -116,50 +410,153 @@ class AlertSystem:
             logging.error(f"Failed to decrypt message: {e}")
             raise
 
-    def trigger_sirens(self, area):
+    def trigger_sirens(self, area, polygon=None):
         """
-        Activates sirens in the specified area.
+        Activates every siren in the specified area concurrently.
 
         Args:
-            area (str): The geographic area to activate sirens.
+            area (str or list): SAME location codes to activate sirens in.
+                Without an area every siren is activated.
+            polygon (list, optional): (lat, lon) vertices of a warning polygon.
+                Takes precedence over the county-level area unless no
+                recipient location falls inside it.
+
+        Returns:
+            dict: Per-siren acknowledgements and latencies.
         """
-        siren_locations = self.get_siren_locations(area)
-        for siren in siren_locations:
-            self.activate_siren(siren)
+        sirens = self.get_siren_locations(area, polygon)
+        return self.siren_dispatcher.activate_sirens(self.sirens.transports(sirens))
 
-    def get_recipients(self, area=None):
+    def parse_area(self, area):
         """
-        Fetches recipients for the alert based on the area.
+        Splits a geographic area into its location codes.
 
         Args:
-            area (str, optional): The area to filter recipients.
+            area (str or list, optional): Comma, space or dash separated codes.
+
+        Returns:
+            list: The location codes, or None without an area.
+        """
+        if not area:
+            return None
+        if isinstance(area, str):
+            return re.split(r"[,\s-]+", area.strip())
+        return list(area)
+
+    def get_recipients(self, area=None, event=None, polygon=None):
+        """
+        Fetches recipients for the alert based on the area and event.
+
+        Args:
+            area (str or list, optional): SAME location codes to target.
+                Without an area, or when no subscription matches it, every
+                ALERT_RECIPIENTS entry is returned.
+            event (str, optional): The SAME event code to target.
+            polygon (list, optional): (lat, lon) vertices of a warning polygon.
+                Takes precedence over the county-level area unless no
+                recipient location falls inside it.
 
         Returns:
             list: A list of recipient contact details.
         """
-        # Example placeholder logic
-        all_recipients = os.getenv("ALERT_RECIPIENTS", "").split(",")
+        if polygon:
+            inside = self.geofence.recipients_in(polygon)
+            if inside:
+                return inside
+            logging.info("No recipient locations inside the polygon; using the area")
         if area:
-            # Filter logic can be applied based on geographic area
-            return [recipient for recipient in all_recipients if "@" in recipient]
-        return all_recipients
+            matched = self.subscriptions.match(self.parse_area(area), event)
+            if matched:
+                return matched
+            logging.info(f"No subscriptions match {area}; alerting ALERT_RECIPIENTS")
+        return [r for r in os.getenv("ALERT_RECIPIENTS", "").split(",") if r]
+
+    def get_voice_recipients(self):
+        """
+        Fetches the numbers that are called for every alert.
+
+        Returns:
+            list: The VOICE_RECIPIENTS entries.
+        """
+        return [r for r in os.getenv("VOICE_RECIPIENTS", "").split(",") if r]
+
+    def get_sender_numbers(self):
+        """
+        Reads the SMS sender numbers from the environment.
 
-    def send_sms(self, recipient, alert):
+        Returns:
+            list: TWILIO_PHONE_NUMBERS, or the single TWILIO_PHONE_NUMBER.
+
+        Raises:
+            EnvironmentError: If no sender number is configured.
+        """
+        numbers = os.getenv("TWILIO_PHONE_NUMBERS") or os.getenv(
+            "TWILIO_PHONE_NUMBER", ""
+        )
+        numbers = [number.strip() for number in numbers.split(",") if number.strip()]
+        if not numbers:
+            raise EnvironmentError(
+                "TWILIO_PHONE_NUMBER environment variable is missing."
+            )
+        return numbers
+
+    def send_sms(self, recipient, alert, alert_id=None, retry=True):
         """
-        Sends an SMS alert to the specified recipient.
+        Sends an SMS alert to the specified recipient from a pooled number.
+        A number the provider throttles is rebalanced out of the pool and
+        the message is retried once from another number. Each send is
+        bounded by PROVIDER_DEADLINE and skips providers whose circuit is open.
 
         Args:
             recipient (str): The recipient's phone number.
             alert (str): The alert message.
+            alert_id (int, optional): The alert, for delivery status tracking.
+            retry (bool, optional): Retry once if the sender is throttled.
         """
+        number = self.sender_pool.acquire(recipient)
         try:
-            self.twilio_client.messages.create(
-                body=alert, from_=os.getenv("TWILIO_PHONE_NUMBER"), to=recipient
-            )
-            logging.info(f"Alert sent to {recipient}")
+            message = self.sms_channel.send(recipient, alert, number)
+            self.sender_pool.report_success(number)
+            count_sms(alert)
+            if alert_id is not None:
+                self.deliveries.register(message.sid, alert_id, recipient, "sms")
+            logging.info(f"Alert sent to {recipient} from {number}")
         except Exception as e:
+            if getattr(e, "status", None) == 429 and retry:
+                self.sender_pool.report_throttled(number)
+                return self.send_sms(recipient, alert, alert_id, retry=False)
             logging.error(f"Failed to send SMS to {recipient}: {e}")
 
+    def send_push(self, alert):
+        """
+        Sends the alert to every registered device via FCM.
+
+        Args:
+            alert (str): The alert message.
+        """
+        if self.push_channel is None:
+            return
+        try:
+            self.push_channel.send("Emergency Alert", alert)
+        except Exception as e:
+            logging.error(f"Failed to send push notifications: {e}")
+
+    def send_voice(self, recipient, alert, alert_id):
+        """
+        Calls the recipient and reads out the alert. Every call for an
+        alert shares one rendered TwiML document.
+
+        Args:
+            recipient (str): The recipient's phone number.
+            alert (str): The announcement.
+            alert_id (int): The alert being announced.
+        """
+        try:
+            sid, status = self.voice.call(recipient, alert_id, alert)
+            self.deliveries.register(sid, alert_id, recipient, "voice")
+        except Exception as e:
+            logging.error(f"Failed to call {recipient}: {e}")
+
     def send_websocket(self, recipient, alert):
         """
         Sends an alert via WebSocket.
@@ -205,25 +602,34 @@ class AlertSystem:
         """
         return alert in self.alert_history
 
-    def get_siren_locations(self, area):
+    def get_siren_locations(self, area, polygon=None):
         """
-        Fetches siren locations for the specified area.
+        Fetches the sirens covering the specified area.
 
         Args:
-            area (str): The area to fetch siren locations for.
+            area (str or list): SAME location codes to fetch sirens for.
+                Without an area every siren is returned.
+            polygon (list, optional): (lat, lon) vertices of a warning polygon.
+                Takes precedence over the county-level area for sirens with
+                coordinates.
 
         Returns:
-            list: A list of siren locations.
+            list: The siren identifiers.
         """
-        # Placeholder for siren location data
-        return ["Siren1", "Siren2", "Siren3"]
-
-    def activate_siren(self, siren):
+        codes = self.parse_area(area)
+        if polygon:
+            return sorted(self.sirens.in_polygon(polygon, codes))
+        if codes is None:
+            return list(self.sirens.sirens)
+        return sorted(self.sirens.for_locations(codes))
+
+    def activate_siren(self, siren, duration=SIREN_DURATION):
         """
         Activates a specific siren.
 
         Args:
             siren (str): The identifier of the siren to activate.
+            duration (int, optional): Seconds the siren sounds.
         """
         # Placeholder for siren activation logic
         logging.info(f"Siren activated: {siren}")
@@ -0,0 +1,242 @@
+import os
+import gzip
+import logging
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, Counter
+from datetime import date
+from modules.log_search import initialize_log_search
+
+# Log Retention Settings
+LOG_RETENTION_MONTHS = int(os.getenv("LOG_RETENTION_MONTHS", 3))  # months kept hot
+LOG_ARCHIVE_DIR = os.getenv("LOG_ARCHIVE_DIR", "archive")
+ARCHIVE_CHUNK_SIZE = int(os.getenv("ARCHIVE_CHUNK_SIZE", 500))  # rows per transaction
+ARCHIVE_PAUSE = float(os.getenv("ARCHIVE_PAUSE", 0.05))  # seconds between chunks
+ARCHIVE_INTERVAL = float(os.getenv("ARCHIVE_INTERVAL", 3600))  # seconds between runs
+ARCHIVE_CACHE_SIZE = 2  # decompressed archives kept for searching
+
+MONTH_PATTERN = re.compile(r"^\d{4}-(0[1-9]|1[0-2])$")
+
+
+def month_bounds(month):
+    """
+    Returns:
+        tuple: The first timestamp of `month` ("YYYY-MM") and of the next.
+    """
+    year, number = int(month[:4]), int(month[5:7])
+    following = f"{year + 1}-01" if number == 12 else f"{year}-{number + 1:02d}"
+    return f"{month}-01", f"{following}-01"
+
+
+def cutoff_month(today=None, keep=LOG_RETENTION_MONTHS):
+    """
+    Returns:
+        str: The oldest month ("YYYY-MM") that stays in the hot database.
+    """
+    today = today or date.today()
+    index = today.year * 12 + today.month - 1 - keep
+    return f"{index // 12}-{index % 12 + 1:02d}"
+
+
+class LogArchiver:
+    def __init__(
+        self,
+        db_path="database.db",
+        directory=LOG_ARCHIVE_DIR,
+        keep=LOG_RETENTION_MONTHS,
+        chunk_size=ARCHIVE_CHUNK_SIZE,
+        pause=ARCHIVE_PAUSE,
+    ):
+        """
+        Moves each month of the logs table past retention into its own
+        SQLite file, then compacts and gzips it. Rows are moved a chunk
+        at a time in short transactions with a pause between them, so
+        request threads and the alert path only ever wait for one chunk.
+        A move interrupted by a restart resumes where it stopped.
+
+        Archived months keep their full-text index and can still be
+        searched; they are decompressed on demand into a small cache.
+
+        Args:
+            db_path (str): Path to the hot SQLite database.
+            directory (str): Where archive files are written.
+            keep (int): Months kept in the hot database besides the current one.
+            chunk_size (int): Rows moved per transaction.
+            pause (float): Seconds to yield between chunks.
+        """
+        self.db_path = db_path
+        self.directory = directory
+        self.keep = keep
+        self.chunk_size = chunk_size
+        self.pause = pause
+        self.cache = OrderedDict()  # month -> decompressed archive path
+        self.counters = Counter()
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(directory, "cache"), exist_ok=True)
+
+    def path(self, month, suffix=".db.gz"):
+        return os.path.join(self.directory, f"logs-{month}{suffix}")
+
+    def months(self):
+        """
+        Returns:
+            list: The archived months ("YYYY-MM"), oldest first.
+        """
+        return sorted(
+            name[5:12]
+            for name in os.listdir(self.directory)
+            if name.startswith("logs-") and name.endswith(".db.gz")
+        )
+
+    def archive_due(self, today=None):
+        """
+        Archives every month older than the retention period.
+
+        Returns:
+            list: The months archived.
+        """
+        cutoff = month_bounds(cutoff_month(today, self.keep))[0]
+        archived = []
+        while True:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            first = conn.execute("SELECT MIN(timestamp) FROM logs").fetchone()[0]
+            conn.close()
+            if first is None or str(first) >= cutoff:
+                return archived
+            month = str(first)[:7]
+            if not MONTH_PATTERN.match(month):
+                logging.warning(f"Cannot archive logs with timestamp {first!r}")
+                return archived
+            if not self.archive_month(month):
+                return archived
+            archived.append(month)
+
+    def archive_month(self, month):
+        """
+        Moves one month of logs to its archive file.
+
+        Args:
+            month (str): The month, as "YYYY-MM".
+
+        Returns:
+            int: The number of rows moved.
+        """
+        start, end = month_bounds(month)
+        partial = self.path(month, ".db.partial")
+        if os.path.exists(self.path(month)) and not os.path.exists(partial):
+            # Rows logged late for an archived month are folded back in
+            self.decompress(self.path(month), partial)
+        archive = sqlite3.connect(partial)
+        archive.execute(
+            """
+            CREATE TABLE IF NOT EXISTS logs (
+                id INTEGER PRIMARY KEY,
+                event TEXT NOT NULL,
+                timestamp DATETIME
+            )
+        """
+        )
+        hot = sqlite3.connect(self.db_path, timeout=10)
+        moved = 0
+        try:
+            while True:
+                rows = hot.execute(
+                    "SELECT id, event, timestamp FROM logs "
+                    "WHERE timestamp >= ? AND timestamp < ? "
+                    "ORDER BY timestamp LIMIT ?",
+                    (start, end, self.chunk_size),
+                ).fetchall()
+                if not rows:
+                    break
+                # Committed to the archive before leaving the hot database,
+                # so a crash in between only repeats the copy
+                with archive:
+                    archive.executemany(
+                        "INSERT OR IGNORE INTO logs (id, event, timestamp) "
+                        "VALUES (?, ?, ?)",
+                        rows,
+                    )
+                with hot:
+                    hot.executemany(
+                        "DELETE FROM logs WHERE id = ?", [(row[0],) for row in rows]
+                    )
+                moved += len(rows)
+                time.sleep(self.pause)
+        finally:
+            hot.close()
+        initialize_log_search(archive)
+        archive.execute("VACUUM")
+        archive.close()
+        self.compress(partial, self.path(month))
+        os.remove(partial)
+        with self.lock:
+            stale = self.cache.pop(month, None)
+        if stale and os.path.exists(stale):
+            os.remove(stale)
+        self.counters["months"] += 1
+        self.counters["rows"] += moved
+        logging.info(f"Archived {moved} log rows from {month}")
+        return moved
+
+    def compress(self, source, target):
+        with open(source, "rb") as src, gzip.open(f"{target}.tmp", "wb") as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(f"{target}.tmp", target)
+
+    def decompress(self, source, target):
+        with gzip.open(source, "rb") as src, open(f"{target}.tmp", "wb") as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(f"{target}.tmp", target)
+
+    def open(self, month):
+        """
+        Opens an archived month read-only, decompressing it on first use.
+
+        Args:
+            month (str): The month, as "YYYY-MM".
+
+        Returns:
+            sqlite3.Connection: A connection to the month's logs.
+
+        Raises:
+            ValueError: If the month is malformed or not archived.
+        """
+        if not MONTH_PATTERN.match(month) or not os.path.exists(self.path(month)):
+            raise ValueError(f"No archived logs for {month}")
+        with self.lock:
+            path = self.cache.get(month)
+            if path is not None:
+                self.cache.move_to_end(month)
+                self.counters["cache_hits"] += 1
+            else:
+                path = os.path.join(self.directory, "cache", f"logs-{month}.db")
+                self.decompress(self.path(month), path)
+                self.cache[month] = path
+                self.counters["cache_misses"] += 1
+                while len(self.cache) > ARCHIVE_CACHE_SIZE:
+                    os.remove(self.cache.popitem(last=False)[1])
+            return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+    def run(self, interval=ARCHIVE_INTERVAL):
+        """
+        Archives due months periodically; run in a daemon thread.
+        """
+        while True:
+            try:
+                self.archive_due()
+            except (sqlite3.Error, OSError) as e:
+                logging.error(f"Log archival failed: {e}")
+            time.sleep(interval)
+
+    def start_thread(self):
+        threading.Thread(target=self.run, name="log-archiver", daemon=True).start()
+
+    def stats(self):
+        """
+        Returns:
+            dict: Months and rows archived and archive cache hits and misses.
+        """
+        return dict(self.counters)
@@ -0,0 +1,162 @@
+import os
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+# Audit Log Settings
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", 10000))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", 256))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", 0.005))  # seconds
+
+LOG_EVENT_SQL = "INSERT INTO logs (event, timestamp) VALUES (?, ?)"
+
+
+class AuditWriter:
+    def __init__(
+        self,
+        db_path="database.db",
+        queue_size=AUDIT_QUEUE_SIZE,
+        batch_size=AUDIT_BATCH_SIZE,
+        flush_interval=AUDIT_FLUSH_INTERVAL,
+    ):
+        """
+        Group-commits audit inserts. Request threads only queue their
+        statements; a writer thread collects whatever arrives within a few
+        milliseconds and commits it in one transaction, so a burst of
+        events costs one fsync instead of one each. Everything queued is
+        written before the process exits.
+
+        Args:
+            db_path (str): Path to the SQLite database.
+            queue_size (int): Statements that can wait for the writer. When
+                full, callers write their statement themselves.
+            batch_size (int): Most statements committed together.
+            flush_interval (float): Seconds a batch waits for more statements.
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.counters = Counter()
+        self.high_water = 0
+        self.commit_time = 0.0
+        self.lock = threading.Lock()
+        self.writer = threading.Thread(
+            target=self.run, name="audit-writer", daemon=True
+        )
+        self.writer.start()
+        atexit.register(self.close)
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def log(self, event):
+        """
+        Queues an event for the logs table.
+
+        Args:
+            event (str): The event description.
+        """
+        self.write(LOG_EVENT_SQL, (event, datetime.now()))
+
+    def write(self, sql, args=()):
+        """
+        Queues an audit insert. When the queue is full the statement is
+        written immediately instead, so audit records are never dropped.
+
+        Args:
+            sql (str): The statement.
+            args (tuple): Its parameters.
+        """
+        try:
+            self.queue.put_nowait((sql, args))
+        except queue.Full:
+            self.counters["overflow"] += 1
+            conn = self.connect()
+            with conn:
+                conn.execute(sql, args)
+            conn.close()
+            return
+        self.counters["queued"] += 1
+        depth = self.queue.qsize()
+        if depth > self.high_water:
+            self.high_water = depth
+
+    def run(self):
+        conn = self.connect()
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            if batch[0] is None:
+                self.queue.task_done()
+                break
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self.queue.get(timeout=max(remaining, 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True  # stop after this batch is written
+                    self.queue.task_done()
+                    break
+                batch.append(item)
+            started = time.monotonic()
+            try:
+                with conn:
+                    for sql, args in batch:
+                        conn.execute(sql, args)
+                self.counters["written"] += len(batch)
+                self.counters["batches"] += 1
+            except sqlite3.Error as e:
+                self.counters["failed"] += len(batch)
+                logging.error(f"Failed to write {len(batch)} audit records: {e}")
+            finally:
+                self.commit_time += time.monotonic() - started
+                for _ in batch:
+                    self.queue.task_done()
+        conn.close()
+
+    def flush(self):
+        """
+        Blocks until every queued statement has been written.
+        """
+        self.queue.join()
+
+    def close(self):
+        """
+        Writes out every queued statement and stops the writer.
+        """
+        with self.lock:
+            if not self.writer.is_alive():
+                return
+            self.queue.put(None)
+            self.writer.join()
+
+    def stats(self):
+        """
+        Returns:
+            dict: Queue depth and high-water mark, statement and batch
+            counts, average batch size and commit time in milliseconds.
+        """
+        batches = self.counters["batches"]
+        return {
+            **self.counters,
+            "depth": self.queue.qsize(),
+            "high_water": self.high_water,
+            "batch_size_avg": (
+                round(self.counters["written"] / batches, 1) if batches else 0.0
+            ),
+            "commit_ms_avg": (
+                round(1000 * self.commit_time / batches, 3) if batches else 0.0
+            ),
+        }
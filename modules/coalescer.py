@@ -0,0 +1,126 @@
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from modules.scheduler import WARNING
+
+# Coalescing Settings
+COALESCE_WINDOW = float(os.getenv("COALESCE_WINDOW", 60))  # seconds
+
+
+class Window:
+    def __init__(self, priority, closes_at):
+        self.priority = priority  # most severe alert sent in this window
+        self.closes_at = closes_at
+        self.pending = []  # (priority, sequence, alert) held for the digest
+
+
+class AlertCoalescer:
+    def __init__(self, flush, window=COALESCE_WINDOW):
+        """
+        Limits each recipient to one message per channel per window during
+        alert storms. Warnings and national alerts are never held. Watches
+        and less urgent alerts go out straight away when they open a window
+        or are more severe than those already sent in it; the rest are held
+        and merged into a single digest when the window closes.
+
+        Args:
+            flush (callable): Called as flush(digests) with a list of
+                (recipient, channel, priority, alerts) tuples, alerts ordered
+                most severe first.
+            window (float): Length of the coalescing window in seconds.
+        """
+        self.flush = flush
+        self.window = window
+        self.windows = {}  # (recipient, channel) -> Window
+        self.deadlines = []  # heap of (closes_at, sequence, key)
+        self.sequence = itertools.count()
+        self.counters = Counter()
+        self.condition = threading.Condition()
+        threading.Thread(target=self.run, name="coalescer", daemon=True).start()
+
+    def admit(self, recipient, channel, alert, priority):
+        """
+        Decides whether an alert is sent now or held for the digest.
+
+        Args:
+            recipient (str): The recipient.
+            channel (str): The delivery channel.
+            alert: The alert, passed back to `flush` if held.
+            priority (int): The severity class, lower being more urgent.
+
+        Returns:
+            bool: True if the caller should deliver the alert immediately.
+        """
+        key = (recipient, channel)
+        with self.condition:
+            self.counters["submitted"] += 1
+            window = self.windows.get(key)
+            if window is None:
+                window = Window(priority, time.monotonic() + self.window)
+                self.windows[key] = window
+                heapq.heappush(
+                    self.deadlines, (window.closes_at, next(self.sequence), key)
+                )
+                self.condition.notify()
+            # Holding a warning behind an earlier one would delay life-safety
+            # instructions by up to a window, so only watches and below merge
+            elif priority <= WARNING or priority < window.priority:
+                window.priority = min(priority, window.priority)
+            else:
+                window.pending.append((priority, next(self.sequence), alert))
+                self.counters["held"] += 1
+                return False
+            self.counters["sent"] += 1
+            return True
+
+    def close_due(self, now):
+        """
+        Closes every window whose time is up. Windows that held alerts
+        are reopened so the next alerts keep coalescing.
+
+        Returns:
+            list: The digests to flush.
+        """
+        digests = []
+        while self.deadlines and self.deadlines[0][0] <= now:
+            _, _, key = heapq.heappop(self.deadlines)
+            window = self.windows.pop(key)
+            if not window.pending:
+                continue
+            window.pending.sort()
+            priority = window.pending[0][0]
+            digests.append((*key, priority, [alert for _, _, alert in window.pending]))
+            self.windows[key] = Window(priority, now + self.window)
+            heapq.heappush(
+                self.deadlines, (now + self.window, next(self.sequence), key)
+            )
+        self.counters["sent"] += len(digests)
+        return digests
+
+    def run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.deadlines)
+                timeout = self.deadlines[0][0] - time.monotonic()
+                if timeout > 0:
+                    self.condition.wait(timeout)
+                    continue
+                digests = self.close_due(time.monotonic())
+            if not digests:
+                continue
+            try:
+                self.flush(digests)
+            except Exception as e:
+                logging.error(f"Failed to flush {len(digests)} coalesced alerts: {e}")
+
+    def stats(self):
+        """
+        Returns:
+            dict: Alerts submitted, messages sent and alerts held for digests.
+        """
+        with self.condition:
+            return dict(self.counters)
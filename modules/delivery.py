@@ -0,0 +1,290 @@
+import os
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+# Delivery Tracking Settings
+DELIVERY_QUEUE_SIZE = int(os.getenv("DELIVERY_QUEUE_SIZE", 10000))
+DELIVERY_BATCH_SIZE = int(os.getenv("DELIVERY_BATCH_SIZE", 500))
+DELIVERY_FLUSH_INTERVAL = float(os.getenv("DELIVERY_FLUSH_INTERVAL", 0.2))  # seconds
+DELIVERY_REGISTER_WAIT = float(os.getenv("DELIVERY_REGISTER_WAIT", 1))  # seconds
+
+# Provider statuses by how far along a message is; callbacks can arrive
+# out of order, so a status never replaces one of a higher rank
+STATUS_RANK = {
+    "accepted": 0,
+    "scheduled": 0,
+    "queued": 0,
+    "initiated": 1,
+    "sending": 1,
+    "sent": 1,
+    "ringing": 1,
+    "in-progress": 2,
+    "delivered": 3,
+    "read": 3,
+    "completed": 3,
+    "undelivered": 3,
+    "failed": 3,
+    "busy": 3,
+    "no-answer": 3,
+    "canceled": 3,
+}
+DELIVERED = {"delivered", "read", "completed"}
+FAILED = {"undelivered", "failed", "busy", "no-answer", "canceled"}
+
+REGISTER_SQL = """
+    INSERT INTO deliveries (sid, alert_id, recipient, channel, status, rank, updated)
+    VALUES (?, ?, ?, ?, 'queued', 0, ?)
+    ON CONFLICT(sid) DO UPDATE SET
+        alert_id = excluded.alert_id,
+        recipient = excluded.recipient,
+        channel = excluded.channel
+"""
+STATUS_SQL = """
+    INSERT INTO deliveries (sid, status, rank, error_code, updated)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(sid) DO UPDATE SET
+        status = excluded.status,
+        rank = excluded.rank,
+        error_code = excluded.error_code,
+        updated = excluded.updated
+    WHERE excluded.rank >= deliveries.rank
+"""
+
+
+class DeliveryLedger:
+    def __init__(self, db_path="database.db"):
+        """
+        Tracks the provider status of every message sent for an alert.
+        Updates are queued and applied by a single writer thread in batched
+        transactions, so neither dispatchers nor webhook requests wait on
+        the database.
+
+        Args:
+            db_path (str): Path to the SQLite database.
+        """
+        self.db_path = db_path
+        self.queue = queue.Queue(maxsize=DELIVERY_QUEUE_SIZE)
+        self.counters = Counter()
+        self.initialize_table()
+        self.writer = threading.Thread(
+            target=self.run, name="delivery-writer", daemon=True
+        )
+        self.writer.start()
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")  # readers never block the writer
+        return conn
+
+    def initialize_table(self):
+        """
+        Creates the delivery table if it does not exist.
+        """
+        conn = self.connect()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS deliveries (
+                sid TEXT PRIMARY KEY,
+                alert_id INTEGER,
+                recipient TEXT,
+                channel TEXT,
+                status TEXT NOT NULL,
+                rank INTEGER NOT NULL DEFAULT 0,
+                error_code TEXT,
+                updated REAL
+            )
+        """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS deliveries_alert "
+            "ON deliveries (alert_id, status)"
+        )
+        conn.commit()
+        conn.close()
+
+    def register(self, sid, alert_id, recipient, channel):
+        """
+        Records a message handed to the provider. Fallback decisions rely
+        on these records, so when the queue stays full for
+        DELIVERY_REGISTER_WAIT the record is written directly instead of
+        being dropped.
+
+        Args:
+            sid (str): The provider's message or call id.
+            alert_id (int): The alert the message belongs to.
+            recipient (str): The recipient.
+            channel (str): "sms" or "voice".
+
+        Returns:
+            bool: False if the record could not be written.
+        """
+        args = (sid, alert_id, recipient, channel, time.time())
+        try:
+            self.queue.put((REGISTER_SQL, args), timeout=DELIVERY_REGISTER_WAIT)
+        except queue.Full:
+            self.counters["written_directly"] += 1
+            try:
+                conn = self.connect()
+                with conn:
+                    conn.execute(REGISTER_SQL, args)
+                conn.close()
+            except sqlite3.Error as e:
+                logging.error(f"Failed to register delivery {sid}: {e}")
+                return False
+            return True
+        self.counters["received"] += 1
+        return True
+
+    def update(self, sid, status, error_code=None):
+        """
+        Records a status callback from the provider.
+
+        Args:
+            sid (str): The provider's message or call id.
+            status (str): The reported status.
+            error_code (str, optional): The provider's error code.
+
+        Returns:
+            bool: False if the queue is full; the provider should retry.
+
+        Raises:
+            ValueError: If the status is unknown.
+        """
+        status = status.lower()
+        if status not in STATUS_RANK:
+            raise ValueError(f"Unknown delivery status: {status}")
+        return self.enqueue(
+            (STATUS_SQL, (sid, status, STATUS_RANK[status], error_code, time.time()))
+        )
+
+    def enqueue(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.counters["dropped"] += 1
+            return False
+        self.counters["received"] += 1
+        return True
+
+    def run(self):
+        conn = self.connect()
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            if batch[0] is None:
+                self.queue.task_done()
+                break
+            deadline = time.monotonic() + DELIVERY_FLUSH_INTERVAL
+            while len(batch) < DELIVERY_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self.queue.get(timeout=max(remaining, 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True  # stop after this batch is written
+                    self.queue.task_done()
+                    break
+                batch.append(item)
+            try:
+                with conn:
+                    for sql, args in batch:
+                        conn.execute(sql, args)
+                self.counters["written"] += len(batch)
+                self.counters["batches"] += 1
+            except sqlite3.Error as e:
+                logging.error(f"Failed to write {len(batch)} delivery updates: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+        conn.close()
+
+    def flush(self):
+        """
+        Blocks until every queued update has been written.
+        """
+        self.queue.join()
+
+    def close(self):
+        """
+        Writes out every queued update and stops the writer.
+        """
+        self.queue.put(None)
+        self.writer.join()
+
+    def progress(self, alert_id):
+        """
+        Summarizes the delivery status of an alert's messages.
+
+        Args:
+            alert_id (int): The alert id.
+
+        Returns:
+            dict: Message counts and the delivered and failed percentages.
+        """
+        conn = self.connect()
+        rows = conn.execute(
+            "SELECT status, COUNT(*) FROM deliveries WHERE alert_id = ? "
+            "GROUP BY status",
+            (alert_id,),
+        ).fetchall()
+        conn.close()
+        statuses = dict(rows)
+        total = sum(statuses.values())
+        delivered = sum(n for s, n in statuses.items() if s in DELIVERED)
+        failed = sum(n for s, n in statuses.items() if s in FAILED)
+        return {
+            "alert_id": alert_id,
+            "total": total,
+            "delivered": delivered,
+            "failed": failed,
+            "pending": total - delivered - failed,
+            "delivered_percent": round(100 * delivered / total, 1) if total else 0.0,
+            "failed_percent": round(100 * failed / total, 1) if total else 0.0,
+            "statuses": statuses,
+        }
+
+    def delivered(self, alert_id, recipients):
+        """
+        Finds which of an alert's recipients have a confirmed delivery.
+
+        Args:
+            alert_id (int): The alert id.
+            recipients (list): The recipients to check.
+
+        Returns:
+            set: The recipients with at least one delivered message.
+        """
+        conn = self.connect()
+        rows = conn.execute(
+            "SELECT DISTINCT recipient FROM deliveries WHERE alert_id = ? "
+            f"AND status IN ({', '.join('?' * len(DELIVERED))})",
+            (alert_id, *sorted(DELIVERED)),
+        ).fetchall()
+        conn.close()
+        wanted = set(recipients)
+        return {recipient for recipient, in rows if recipient in wanted}
+
+    def status(self, sid):
+        """
+        Returns:
+            str: The latest recorded status of a message or call, or None.
+        """
+        conn = self.connect()
+        row = conn.execute(
+            "SELECT status FROM deliveries WHERE sid = ?", (sid,)
+        ).fetchone()
+        conn.close()
+        return row[0] if row else None
+
+    def stats(self):
+        """
+        Returns:
+            dict: Updates received, written, written directly, dropped and
+                batches committed.
+        """
+        return dict(self.counters, queued=self.queue.qsize())
@@ -0,0 +1,282 @@
+import os
+import logging
+import sqlite3
+import threading
+import time
+from collections import Counter
+from utils.timer_wheel import HierarchicalTimerWheel
+
+# Escalation Settings
+# Tiers as "delay=contact,contact;delay=contact", delays in seconds since the alert
+ESCALATION_TIERS = os.getenv("ESCALATION_TIERS", "")
+ESCALATION_TICK = 1.0  # timer wheel resolution in seconds
+
+
+def parse_tiers(value):
+    """
+    Parses escalation tiers from their environment form.
+
+    Args:
+        value (str): Tiers as "delay=contact,contact;delay=contact".
+
+    Returns:
+        list: (delay, contacts) tuples ordered by delay.
+
+    Raises:
+        ValueError: If a tier is malformed.
+    """
+    tiers = []
+    for tier in filter(None, (t.strip() for t in value.split(";"))):
+        delay, _, contacts = tier.partition("=")
+        contacts = [c.strip() for c in contacts.split(",") if c.strip()]
+        if not contacts:
+            raise ValueError(f"Escalation tier has no contacts: {tier}")
+        tiers.append((float(delay), contacts))
+    return sorted(tiers, key=lambda tier: tier[0])
+
+
+def acknowledge(alert_id, user, db_path="database.db"):
+    """
+    Records an acknowledgement. Usable from any process; the engine
+    owning the escalation sees it before the next tier fires.
+
+    Args:
+        alert_id (int): The alert id.
+        user (str): Who acknowledged the alert.
+        db_path (str): Path to the SQLite database.
+
+    Returns:
+        bool: True if an unacknowledged escalation was acknowledged.
+    """
+    conn = sqlite3.connect(db_path, timeout=10)
+    with conn:
+        cursor = conn.execute(
+            "UPDATE escalations SET acknowledged_by = ?, acknowledged_at = ? "
+            "WHERE alert_id = ? AND acknowledged_at IS NULL",
+            (user, time.time(), alert_id),
+        )
+    conn.close()
+    return cursor.rowcount == 1
+
+
+class Escalation:
+    __slots__ = ("alert_id", "summary", "opened", "level", "timer")
+
+    def __init__(self, alert_id, summary, opened, level=0):
+        self.alert_id = alert_id
+        self.summary = summary
+        self.opened = opened  # wall-clock time, so deadlines survive restarts
+        self.level = level  # tiers already notified
+        self.timer = None
+
+
+class EscalationEngine:
+    def __init__(self, notify, tiers=None, db_path="database.db", wheel=None):
+        """
+        Escalates alerts that nobody acknowledges through tiers of
+        contacts. Outstanding escalations live in a dict keyed by alert id
+        with their next tier on a hierarchical timer wheel, so an
+        acknowledgement is a dict pop and a timer cancel.
+
+        Args:
+            notify (callable): Called as notify(contacts, alert_id, summary,
+                level) when a tier is reached.
+            tiers (list, optional): (delay, contacts) tuples. Defaults to
+                ESCALATION_TIERS.
+            db_path (str): Path to the SQLite database.
+            wheel (HierarchicalTimerWheel, optional): Shared timer wheel.
+        """
+        self.notify = notify
+        self.tiers = parse_tiers(ESCALATION_TIERS) if tiers is None else tiers
+        self.db_path = db_path
+        self.wheel = HierarchicalTimerWheel(ESCALATION_TICK) if wheel is None else wheel
+        self.pending = {}  # alert id -> Escalation
+        self.counters = Counter()
+        self.lock = threading.Lock()
+        self.initialize_table()
+
+    def initialize_table(self):
+        """
+        Creates the escalation table if it does not exist.
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS escalations (
+                alert_id INTEGER PRIMARY KEY,
+                summary TEXT NOT NULL,
+                opened REAL NOT NULL,
+                level INTEGER NOT NULL DEFAULT 0,
+                acknowledged_by TEXT,
+                acknowledged_at REAL
+            )
+        """
+        )
+        conn.commit()
+        conn.close()
+
+    def schedule(self, escalation, elapsed, now=None):
+        """
+        Puts an escalation's next tier on the wheel, or drops it from the
+        pending set once every tier has been notified.
+
+        Args:
+            escalation (Escalation): The escalation.
+            elapsed (float): Seconds since the alert was opened.
+            now (float, optional): Current wheel time.
+        """
+        if escalation.level >= len(self.tiers):
+            self.pending.pop(escalation.alert_id, None)
+            return
+        delay = self.tiers[escalation.level][0] - elapsed
+        escalation.timer = self.wheel.schedule(max(delay, 0), escalation, now)
+        self.pending[escalation.alert_id] = escalation
+
+    def open(self, alert_id, summary, now=None):
+        """
+        Starts the escalation clock for an alert.
+
+        Args:
+            alert_id (int): The alert id.
+            summary (str): Short description sent to the contacts.
+            now (float, optional): Current wheel time.
+        """
+        if not self.tiers:
+            return
+        escalation = Escalation(alert_id, summary, time.time())
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        with conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO escalations (alert_id, summary, opened) "
+                "VALUES (?, ?, ?)",
+                (alert_id, summary, escalation.opened),
+            )
+        conn.close()
+        with self.lock:
+            self.schedule(escalation, 0, now)
+        self.counters["opened"] += 1
+
+    def acknowledge(self, alert_id, user):
+        """
+        Acknowledges an alert, stopping any further escalation.
+
+        Args:
+            alert_id (int): The alert id.
+            user (str): Who acknowledged the alert.
+
+        Returns:
+            bool: True if the alert was awaiting acknowledgement.
+        """
+        with self.lock:
+            escalation = self.pending.pop(alert_id, None)
+            if escalation and escalation.timer:
+                escalation.timer.cancel()
+        acknowledged = acknowledge(alert_id, user, self.db_path)
+        if acknowledged:
+            self.counters["acknowledged"] += 1
+        return acknowledged
+
+    def restore(self, now=None):
+        """
+        Reloads unacknowledged escalations after a restart. Tiers whose
+        time passed while the system was down fire on the next tick.
+
+        Returns:
+            int: The number of escalations restored.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        rows = conn.execute(
+            "SELECT alert_id, summary, opened, level FROM escalations "
+            "WHERE acknowledged_at IS NULL AND level < ?",
+            (len(self.tiers),),
+        ).fetchall()
+        conn.close()
+        with self.lock:
+            for alert_id, summary, opened, level in rows:
+                if alert_id not in self.pending:
+                    escalation = Escalation(alert_id, summary, opened, level)
+                    self.schedule(escalation, time.time() - opened, now)
+        logging.info(f"Restored {len(rows)} unacknowledged escalations")
+        return len(rows)
+
+    def acknowledged(self, alert_ids):
+        """
+        Returns:
+            set: Those of `alert_ids` acknowledged in the database.
+        """
+        found = set()
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        for start in range(0, len(alert_ids), 500):
+            chunk = alert_ids[start : start + 500]
+            rows = conn.execute(
+                "SELECT alert_id FROM escalations WHERE acknowledged_at IS NOT NULL "
+                f"AND alert_id IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            )
+            found.update(alert_id for alert_id, in rows)
+        conn.close()
+        return found
+
+    def expire(self, now=None):
+        """
+        Notifies the next tier of every escalation whose deadline passed.
+
+        Args:
+            now (float, optional): Current wheel time.
+        """
+        due = self.wheel.expire(now)
+        if not due:
+            return
+        # Acknowledgements made by other processes only reach the database
+        acknowledged = self.acknowledged([e.alert_id for e in due])
+        fired = []
+        with self.lock:
+            for escalation in due:
+                if self.pending.get(escalation.alert_id) is not escalation:
+                    continue
+                if escalation.alert_id in acknowledged:
+                    del self.pending[escalation.alert_id]
+                    continue
+                fired.append((escalation, escalation.level))
+                escalation.level += 1
+                self.schedule(escalation, self.tiers[escalation.level - 1][0], now)
+        if not fired:
+            return
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        with conn:
+            conn.executemany(
+                "UPDATE escalations SET level = ? WHERE alert_id = ?",
+                [(level + 1, e.alert_id) for e, level in fired],
+            )
+        conn.close()
+        for escalation, level in fired:
+            self.counters["escalated"] += 1
+            logging.warning(
+                f"Alert {escalation.alert_id} unacknowledged; escalating to tier "
+                f"{level + 1}"
+            )
+            try:
+                self.notify(
+                    self.tiers[level][1], escalation.alert_id, escalation.summary, level
+                )
+            except Exception as e:
+                logging.error(f"Failed to escalate alert {escalation.alert_id}: {e}")
+
+    def run(self, interval=ESCALATION_TICK):
+        """
+        Drives the timer wheel; run in a daemon thread.
+        """
+        while True:
+            time.sleep(interval)
+            self.expire()
+
+    def start_thread(self):
+        threading.Thread(target=self.run, name="escalation", daemon=True).start()
+
+    def stats(self):
+        """
+        Returns:
+            dict: Outstanding escalations and opened, acknowledged and
+            escalated counts.
+        """
+        return {"outstanding": len(self.pending), **self.counters}
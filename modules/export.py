@@ -0,0 +1,152 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+
+# Export Settings
+EXPORT_FETCH = 1000  # rows fetched from SQLite at a time
+EXPORT_GZIP_LEVEL = 6
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def parse_time(value):
+    """
+    Returns:
+        float: Epoch seconds of an ISO 8601 date or time.
+    """
+    return datetime.fromisoformat(value).timestamp()
+
+
+def parse_log_time(value):
+    """
+    Returns:
+        str: An ISO 8601 date or time in the format log timestamps are
+        stored in, so the bounds compare correctly as text.
+    """
+    return datetime.fromisoformat(value).strftime("%Y-%m-%d %H:%M:%S")
+
+
+# Dataset -> (query, columns, time column, parser for since/until)
+DATASETS = {
+    "logs": (
+        "SELECT id, event, timestamp FROM logs",
+        ("id", "event", "timestamp"),
+        "timestamp",
+        parse_log_time,
+    ),
+    "deliveries": (
+        "SELECT sid, alert_id, recipient, channel, status, error_code, updated "
+        "FROM deliveries",
+        ("sid", "alert_id", "recipient", "channel", "status", "error_code", "updated"),
+        "updated",
+        parse_time,
+    ),
+    "escalations": (
+        "SELECT alert_id, summary, opened, level, acknowledged_by, acknowledged_at "
+        "FROM escalations",
+        (
+            "alert_id",
+            "summary",
+            "opened",
+            "level",
+            "acknowledged_by",
+            "acknowledged_at",
+        ),
+        "opened",
+        parse_time,
+    ),
+}
+
+
+def query_dataset(conn, dataset, since=None, until=None):
+    """
+    Starts reading a dataset in a streamable order. Logs follow their
+    timestamp index; the other tables are read in storage order, so no
+    query ever sorts the whole table.
+
+    Args:
+        conn (sqlite3.Connection): A database connection.
+        dataset (str): "logs", "deliveries" or "escalations".
+        since (str, optional): ISO 8601 lower bound, inclusive.
+        until (str, optional): ISO 8601 upper bound, exclusive.
+
+    Returns:
+        tuple: The open cursor and the column names.
+
+    Raises:
+        ValueError: If the dataset or a bound is invalid.
+        sqlite3.OperationalError: If the dataset's table does not exist.
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset: {dataset}")
+    sql, columns, time_column, parse = DATASETS[dataset]
+    conditions, args = [], []
+    if since:
+        conditions.append(f"{time_column} >= ?")
+        args.append(parse(since))
+    if until:
+        conditions.append(f"{time_column} < ?")
+        args.append(parse(until))
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY timestamp, id" if dataset == "logs" else " ORDER BY rowid"
+    return conn.execute(sql, args), columns
+
+
+def encode_rows(cursor, columns, fmt, fetch_size=EXPORT_FETCH):
+    """
+    Encodes rows as they are fetched, one chunk per fetch.
+
+    Args:
+        cursor (sqlite3.Cursor): The executed query.
+        columns (tuple): Column names, for the CSV header and NDJSON keys.
+        fmt (str): "csv" or "ndjson".
+        fetch_size (int): Rows fetched at a time.
+
+    Yields:
+        str: Chunks of the export.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == "csv":
+        writer.writerow(columns)
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            break
+        if fmt == "csv":
+            writer.writerows(rows)
+        else:
+            for row in rows:
+                buffer.write(json.dumps(dict(zip(columns, row)), default=str))
+                buffer.write("\n")
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def gzip_chunks(chunks, level=EXPORT_GZIP_LEVEL):
+    """
+    Gzips a stream of text chunks on the fly.
+
+    Args:
+        chunks (iterable): Text chunks.
+        level (int): Compression level.
+
+    Yields:
+        bytes: Gzip data.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,283 @@
+import os
+import logging
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+from utils.timer_wheel import TimerWheel
+
+# Fallback Settings
+FALLBACK_DEADLINE = float(os.getenv("FALLBACK_DEADLINE", 120))  # seconds per channel
+FALLBACK_CHANNELS = ["sms", "voice"]  # tried in order after the preferred channel
+PREFERRED_CHANNELS = {"websocket", "sms", "voice"}  # per-recipient channels
+CONFIRMABLE_CHANNELS = {"sms", "voice"}  # channels with delivery status callbacks
+FALLBACK_TICK = 1.0  # timer wheel resolution in seconds
+
+
+class RecipientState:
+    __slots__ = ("alert_id", "recipient", "step", "timer")
+
+    def __init__(self, alert_id, recipient):
+        self.alert_id = alert_id
+        self.recipient = recipient
+        self.step = 0
+        self.timer = None
+
+
+class FallbackEngine:
+    def __init__(
+        self,
+        dispatch,
+        confirmed=None,
+        deadline=FALLBACK_DEADLINE,
+        db_path="database.db",
+        wheel=None,
+    ):
+        """
+        Delivers each alert on the recipient's preferred channel, then
+        falls back to SMS and voice when no delivery is confirmed within
+        the deadline. Every (alert, recipient) pair is a small state object
+        advanced by a shared timer wheel rather than a sleeping thread.
+
+        A channel without delivery status, such as WebSocket, gets the same
+        deadline and is assumed undelivered when it passes. SMS and voice
+        are only followed up when deliveries can be confirmed; otherwise
+        the chain ends at the first of them, so a missing status callback
+        does not call every recipient of every alert.
+
+        Args:
+            dispatch (callable): Called as dispatch(channel, alert_id,
+                recipients, content) to queue deliveries; it must not block.
+            confirmed (callable, optional): Called as confirmed(alert_id,
+                recipients) when deadlines pass; returns the recipients whose
+                delivery was confirmed meanwhile. Without it SMS and voice
+                are not followed up.
+            deadline (float): Seconds allowed per channel.
+            db_path (str): Path to the SQLite database.
+            wheel (TimerWheel, optional): Shared timer wheel.
+        """
+        self.dispatch = dispatch
+        self.confirmed = confirmed
+        self.deadline = deadline
+        self.db_path = db_path
+        self.wheel = TimerWheel(FALLBACK_TICK) if wheel is None else wheel
+        self.confirmable = CONFIRMABLE_CHANNELS if confirmed else set()
+        self.states = {}  # (alert_id, recipient) -> RecipientState
+        self.outstanding = Counter()  # alert id -> unconfirmed recipients
+        self.contents = {}  # alert id -> content, while deadlines are pending
+        self.counters = Counter()
+        self.lock = threading.Lock()
+        self.initialize_table()
+        self.preferences = self.load_preferences()
+
+    def initialize_table(self):
+        """
+        Creates the channel preference table if it does not exist.
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS channel_preferences (
+                recipient TEXT PRIMARY KEY,
+                channel TEXT NOT NULL
+            )
+        """
+        )
+        conn.commit()
+        conn.close()
+
+    def load_preferences(self):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("SELECT recipient, channel FROM channel_preferences")
+        preferences = dict(rows)
+        conn.close()
+        return preferences
+
+    def set_preference(self, recipient, channel):
+        """
+        Stores the channel a recipient wants alerts on first.
+
+        Args:
+            recipient (str): The recipient.
+            channel (str): The preferred channel.
+
+        Raises:
+            ValueError: If the channel cannot deliver to a single recipient.
+        """
+        if channel not in PREFERRED_CHANNELS:
+            raise ValueError(f"Unsupported channel: {channel}")
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO channel_preferences (recipient, channel) "
+                "VALUES (?, ?)",
+                (recipient, channel),
+            )
+        conn.close()
+        self.preferences[recipient] = channel
+
+    def chain(self, recipient):
+        """
+        Returns:
+            list: The channels tried for a recipient, in order.
+        """
+        preferred = self.preferences.get(recipient)
+        if preferred in (None, *FALLBACK_CHANNELS):
+            return FALLBACK_CHANNELS[FALLBACK_CHANNELS.index(preferred or "sms") :]
+        return [preferred, *FALLBACK_CHANNELS]
+
+    def awaits(self, channel):
+        """
+        Returns:
+            bool: True if a recipient reached on `channel` gets a deadline
+            after which they move to their next channel.
+        """
+        return channel in self.confirmable or channel not in FALLBACK_CHANNELS
+
+    def start(self, alert_id, recipients, content=None, sent=(), now=None):
+        """
+        Sends an alert to each recipient on their first channel and starts
+        their fallback deadlines.
+
+        Args:
+            alert_id (int): The alert id.
+            recipients (list): The recipients to reach.
+            content: Passed to dispatch for this alert, and kept until the
+                alert's last deadline has passed.
+            sent (iterable, optional): Channels the alert has already been
+                queued on for every recipient; they are not sent again.
+            now (float, optional): Current time. Defaults to time.monotonic().
+
+        Returns:
+            dict: Number of recipients reached per channel.
+        """
+        batches = defaultdict(list)
+        reached = Counter()
+        with self.lock:
+            for recipient in recipients:
+                key = (alert_id, recipient)
+                if key in self.states:
+                    continue
+                channel = self.chain(recipient)[0]
+                reached[channel] += 1
+                if channel not in sent:
+                    batches[channel].append(recipient)
+                if not self.awaits(channel):
+                    self.counters["untracked"] += 1
+                    continue
+                state = RecipientState(alert_id, recipient)
+                state.timer = self.wheel.schedule(self.deadline, state, now)
+                self.states[key] = state
+                self.outstanding[alert_id] += 1
+            if alert_id in self.outstanding:
+                self.contents[alert_id] = content
+        self.send(alert_id, batches, content)
+        return dict(reached)
+
+    def confirm(self, alert_id, recipient):
+        """
+        Ends the fallback chain for a recipient whose delivery is confirmed.
+
+        Args:
+            alert_id (int): The alert id.
+            recipient (str): The recipient.
+
+        Returns:
+            bool: True if the recipient was still awaiting confirmation.
+        """
+        with self.lock:
+            state = self.states.pop((alert_id, recipient), None)
+            if state is None:
+                return False
+            state.timer.cancel()
+            self.release(alert_id)
+            self.counters["confirmed"] += 1
+            return True
+
+    def release(self, alert_id):
+        self.outstanding[alert_id] -= 1
+        if self.outstanding[alert_id] <= 0:
+            del self.outstanding[alert_id]
+            self.contents.pop(alert_id, None)
+
+    def expire(self, now=None):
+        """
+        Moves every recipient whose deadline has passed to their next
+        channel. Confirmations are looked up once per alert.
+
+        Args:
+            now (float, optional): Current time. Defaults to time.monotonic().
+        """
+        due = defaultdict(list)
+        for state in self.wheel.expire(now):
+            due[state.alert_id].append(state)
+        for alert_id, states in due.items():
+            confirmed = set()
+            if self.confirmed:
+                try:
+                    confirmed = set(
+                        self.confirmed(alert_id, [s.recipient for s in states])
+                    )
+                except Exception as e:
+                    logging.error(f"Failed to check deliveries of {alert_id}: {e}")
+            batches = defaultdict(list)
+            with self.lock:
+                content = self.contents.get(alert_id)
+                for state in states:
+                    if self.states.get((alert_id, state.recipient)) is not state:
+                        continue  # confirmed while the deadline was firing
+                    if state.recipient in confirmed:
+                        del self.states[(alert_id, state.recipient)]
+                        self.release(alert_id)
+                        self.counters["confirmed"] += 1
+                        continue
+                    chain = self.chain(state.recipient)
+                    state.step += 1
+                    if state.step >= len(chain):
+                        del self.states[(alert_id, state.recipient)]
+                        self.release(alert_id)
+                        self.counters["exhausted"] += 1
+                        continue
+                    channel = chain[state.step]
+                    batches[channel].append(state.recipient)
+                    self.counters["fallbacks"] += 1
+                    if self.awaits(channel):
+                        state.timer = self.wheel.schedule(self.deadline, state, now)
+                    else:
+                        del self.states[(alert_id, state.recipient)]
+                        self.release(alert_id)
+            if batches:
+                count = sum(len(batch) for batch in batches.values())
+                logging.info(f"Alert {alert_id}: {count} recipients fell back")
+            self.send(alert_id, batches, content)
+
+    def send(self, alert_id, batches, content):
+        for channel, recipients in batches.items():
+            try:
+                self.dispatch(channel, alert_id, recipients, content)
+            except Exception as e:
+                logging.error(f"Failed to queue {channel} for alert {alert_id}: {e}")
+
+    def run(self, interval=FALLBACK_TICK):
+        """
+        Drives the timer wheel; run in a daemon thread.
+        """
+        while True:
+            time.sleep(interval)
+            self.expire()
+
+    def start_thread(self):
+        threading.Thread(target=self.run, name="fallback", daemon=True).start()
+
+    def stats(self):
+        """
+        Returns:
+            dict: Recipients awaiting confirmation, alerts outstanding and
+            confirmed, untracked, fallback and exhausted counts.
+        """
+        with self.lock:
+            return {
+                "pending": len(self.states),
+                "alerts": len(self.outstanding),
+                **self.counters,
+            }
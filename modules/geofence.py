@@ -0,0 +1,277 @@
+import csv
+import logging
+import sqlite3
+import threading
+import numpy as np
+
+# Targeting Settings
+GRID_CELL_DEGREES = 0.02  # roughly 2 km cells
+PIP_CHUNK_SIZE = 1 << 22  # point/edge pairs evaluated per vectorized step
+
+
+def polygon_edges(polygon):
+    """
+    Splits a ring into edges, dropping horizontal ones which can never
+    cross a horizontal ray.
+
+    Args:
+        polygon (numpy.ndarray): (N, 2) array of (lat, lon) vertices.
+
+    Returns:
+        tuple: Arrays of edge start lat, start lon, end lat and slope.
+    """
+    y1, x1 = polygon[:, 0], polygon[:, 1]
+    y2, x2 = np.roll(y1, -1), np.roll(x1, -1)
+    keep = y1 != y2
+    y1, x1, y2, x2 = y1[keep], x1[keep], y2[keep], x2[keep]
+    return y1, x1, y2, (x2 - x1) / (y2 - y1)
+
+
+def points_in_polygon(xs, ys, edges):
+    """
+    Even-odd ray casting test, vectorized over points and polygon edges.
+
+    Args:
+        xs (numpy.ndarray): Point longitudes.
+        ys (numpy.ndarray): Point latitudes.
+        edges (tuple): Edges as returned by polygon_edges.
+
+    Returns:
+        numpy.ndarray: Boolean mask of points inside the polygon.
+    """
+    y1, x1, y2, slope = edges
+    inside = np.zeros(len(xs), dtype=bool)
+    step = max(1, PIP_CHUNK_SIZE // max(1, len(y1)))
+    for start in range(0, len(xs), step):
+        px = xs[start : start + step, None]
+        py = ys[start : start + step, None]
+        crosses = (y1 > py) != (y2 > py)
+        crosses &= px < x1 + (py - y1) * slope
+        inside[start : start + step] = np.count_nonzero(crosses, axis=1) & 1
+    return inside
+
+
+class PointIndex:
+    def __init__(self, ids, lats, lons, cell_size=GRID_CELL_DEGREES):
+        """
+        Buckets points into a uniform lat/lon grid, stored as one sorted
+        array plus per-cell offsets.
+
+        Args:
+            ids (list): Identifier of each point.
+            lats (list): Latitudes in degrees.
+            lons (list): Longitudes in degrees.
+            cell_size (float): Grid cell size in degrees.
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        self.cell_size = cell_size
+        if len(lats):
+            self.origin = (lats.min(), lons.min())
+            self.rows = int((lats.max() - self.origin[0]) // cell_size) + 1
+            self.cols = int((lons.max() - self.origin[1]) // cell_size) + 1
+        else:
+            self.origin, self.rows, self.cols = (0.0, 0.0), 0, 0
+
+        cells = self.cell_of(lats, lons)
+        order = np.argsort(cells, kind="stable")
+        self.ids = np.asarray(ids, dtype=object)[order]
+        self.lats = lats[order]
+        self.lons = lons[order]
+        self.offsets = np.searchsorted(
+            cells[order], np.arange(self.rows * self.cols + 1)
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def cell_of(self, lats, lons):
+        row = ((lats - self.origin[0]) // self.cell_size).astype(np.int64)
+        col = ((lons - self.origin[1]) // self.cell_size).astype(np.int64)
+        return row * self.cols + col
+
+    def gather(self, cells):
+        """
+        Returns positions in the sorted arrays of every point in `cells`.
+        """
+        starts = self.offsets[cells]
+        lengths = self.offsets[cells + 1] - starts
+        total = lengths.sum()
+        if not total:
+            return np.empty(0, dtype=np.int64)
+        shift = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return shift + np.arange(total)
+
+    def query(self, polygon):
+        """
+        Finds points inside a polygon. Cells entirely inside are accepted
+        wholesale; only points in cells touched by an edge are tested.
+
+        Args:
+            polygon (list): (lat, lon) vertices of a single ring.
+
+        Returns:
+            list: Identifiers of the points inside the polygon.
+        """
+        polygon = np.asarray(polygon, dtype=np.float64)
+        if len(self) == 0 or len(polygon) < 3:
+            return []
+        size = self.cell_size
+        row0 = max(int((polygon[:, 0].min() - self.origin[0]) // size), 0)
+        row1 = min(int((polygon[:, 0].max() - self.origin[0]) // size), self.rows - 1)
+        col0 = max(int((polygon[:, 1].min() - self.origin[1]) // size), 0)
+        col1 = min(int((polygon[:, 1].max() - self.origin[1]) // size), self.cols - 1)
+        if row0 > row1 or col0 > col1:
+            return []
+
+        # Mark cells touched by an edge, sampled at half a cell and dilated by one
+        boundary = np.zeros((row1 - row0 + 3, col1 - col0 + 3), dtype=bool)
+        ends = np.roll(polygon, -1, axis=0)
+        steps = np.ceil(np.abs(ends - polygon).max(axis=1) / (size / 2)).astype(int) + 2
+        first = np.repeat(np.cumsum(steps) - steps, steps)
+        t = (np.arange(steps.sum()) - first) / np.repeat(steps - 1, steps)
+        start = np.repeat(polygon, steps, axis=0)
+        samples = start + (np.repeat(ends, steps, axis=0) - start) * t[:, None]
+        rows = ((samples[:, 0] - self.origin[0]) // size).astype(np.int64) - row0 + 1
+        cols = ((samples[:, 1] - self.origin[1]) // size).astype(np.int64) - col0 + 1
+        valid = (rows >= 0) & (rows < boundary.shape[0])
+        valid &= (cols >= 0) & (cols < boundary.shape[1])
+        boundary[rows[valid], cols[valid]] = True
+        dilated = boundary.copy()
+        dilated[1:] |= boundary[:-1]
+        dilated[:-1] |= boundary[1:]
+        dilated[:, 1:] |= dilated[:, :-1].copy()
+        dilated[:, :-1] |= dilated[:, 1:].copy()
+        near_edge = dilated[1:-1, 1:-1]
+
+        # Scan one grid row at a time against only the edges spanning it
+        y1, x1, y2, slope = polygon_edges(polygon)
+        edge_low, edge_high = np.minimum(y1, y2), np.maximum(y1, y2)
+        columns = np.arange(col0, col1 + 1)
+        centre_lons = self.origin[1] + (columns + 0.5) * size
+        found = []
+        for row in range(row0, row1 + 1):
+            low = self.origin[0] + row * size
+            band = (edge_low <= low + size) & (edge_high >= low)
+            if not band.any():
+                continue
+            edges = (y1[band], x1[band], y2[band], slope[band])
+            cells = row * self.cols + columns
+            touched = near_edge[row - row0]
+
+            # Cells clear of every edge are classified by their centre
+            clear = ~touched
+            centre_lats = np.full(clear.sum(), low + size / 2)
+            centres_inside = points_in_polygon(centre_lons[clear], centre_lats, edges)
+            found.append(self.gather(cells[clear][centres_inside]))
+            candidates = self.gather(cells[touched])
+            found.append(
+                candidates[
+                    points_in_polygon(
+                        self.lons[candidates], self.lats[candidates], edges
+                    )
+                ]
+            )
+        if not found:
+            return []
+        return self.ids[np.concatenate(found)].tolist()
+
+
+class RecipientGeofence:
+    def __init__(self, db_path="database.db"):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.index = None
+        self.initialize_table()
+
+    def initialize_table(self):
+        """
+        Creates the recipient location table if it does not exist.
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS recipient_locations (
+                recipient TEXT PRIMARY KEY,
+                lat REAL NOT NULL,
+                lon REAL NOT NULL
+            )
+        """
+        )
+        conn.commit()
+        conn.close()
+
+    def set_locations(self, locations):
+        """
+        Stores recipient coordinates in a single transaction.
+
+        Args:
+            locations (list): (recipient, lat, lon) tuples.
+        """
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO recipient_locations (recipient, lat, lon) "
+                "VALUES (?, ?, ?)",
+                locations,
+            )
+        conn.close()
+        with self.lock:
+            self.index = None  # rebuilt on the next query
+
+    def seed(self, path):
+        """
+        Stores the coordinates listed in a CSV file with recipient, lat and
+        lon columns. Rows without coordinates are skipped, so the
+        subscription file can carry them as optional columns.
+
+        Args:
+            path (str): Path to the CSV file.
+
+        Raises:
+            ValueError: If a coordinate is not a number.
+        """
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            locations = [
+                (row["recipient"].strip(), float(row["lat"]), float(row["lon"]))
+                for row in csv.DictReader(f)
+                if (row.get("recipient") or "").strip()
+                and (row.get("lat") or "").strip()
+                and (row.get("lon") or "").strip()
+            ]
+        self.set_locations(locations)
+        logging.info(f"Seeded locations for {len(locations)} recipients")
+
+    def load(self):
+        """
+        Builds the grid index from the stored coordinates.
+
+        Returns:
+            PointIndex: The point index.
+        """
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("SELECT recipient, lat, lon FROM recipient_locations")
+        ids, lats, lons = [], [], []
+        for recipient, lat, lon in rows:
+            ids.append(recipient)
+            lats.append(lat)
+            lons.append(lon)
+        conn.close()
+        logging.info(f"Indexed {len(ids)} recipient locations")
+        return PointIndex(ids, lats, lons)
+
+    def recipients_in(self, polygon):
+        """
+        Finds recipients whose stored coordinates fall inside a polygon.
+
+        Args:
+            polygon (list): (lat, lon) vertices of the alert polygon.
+
+        Returns:
+            list: The recipients inside the polygon.
+        """
+        with self.lock:
+            if self.index is None:
+                self.index = self.load()
+            index = self.index
+        return index.query(polygon)
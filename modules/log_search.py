@@ -0,0 +1,109 @@
+import html
+import re
+
+# Log Search Settings
+SEARCH_PAGE_SIZE = 20
+SEARCH_PAGE_MAX = 100
+HIGHLIGHT_START, HIGHLIGHT_END = "\x02", "\x03"  # swapped for <mark> after escaping
+
+LOG_SEARCH_SCHEMA = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5(
+        event,
+        content='logs',
+        content_rowid='id',
+        prefix='2 3'
+    );
+    CREATE TRIGGER IF NOT EXISTS logs_fts_insert AFTER INSERT ON logs BEGIN
+        INSERT INTO logs_fts (rowid, event) VALUES (new.id, new.event);
+    END;
+    CREATE TRIGGER IF NOT EXISTS logs_fts_delete AFTER DELETE ON logs BEGIN
+        INSERT INTO logs_fts (logs_fts, rowid, event)
+            VALUES ('delete', old.id, old.event);
+    END;
+    CREATE TRIGGER IF NOT EXISTS logs_fts_update AFTER UPDATE OF event ON logs BEGIN
+        INSERT INTO logs_fts (logs_fts, rowid, event)
+            VALUES ('delete', old.id, old.event);
+        INSERT INTO logs_fts (rowid, event) VALUES (new.id, new.event);
+    END;
+"""
+
+SEARCH_SQL = """
+    SELECT logs.id, logs.timestamp, highlight(logs_fts, 0, ?, ?), logs_fts.rank
+    FROM logs_fts JOIN logs ON logs.id = logs_fts.rowid
+    WHERE logs_fts MATCH ?
+    ORDER BY logs_fts.rank
+    LIMIT ? OFFSET ?
+"""
+
+
+def initialize_log_search(conn):
+    """
+    Creates the full-text index over the logs table and the triggers that
+    keep it in sync. Rows logged before the index existed are indexed once
+    when it is created.
+
+    Args:
+        conn (sqlite3.Connection): Connection to a database with the logs table.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'logs_fts'"
+    ).fetchone()
+    conn.executescript(f"BEGIN; {LOG_SEARCH_SCHEMA} COMMIT;")
+    if not exists:
+        with conn:
+            conn.execute("INSERT INTO logs_fts (logs_fts) VALUES ('rebuild')")
+
+
+def match_expression(query):
+    """
+    Turns operator input into an FTS5 query. Every word must match and is
+    quoted, so punctuation in event text is never parsed as query syntax;
+    a trailing * keeps prefix matching.
+
+    Args:
+        query (str): The search box contents.
+
+    Returns:
+        str: The MATCH expression, or None if there is nothing to search for.
+    """
+    terms = []
+    for word in query.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*")
+        if not re.search(r"\w", word):
+            continue
+        terms.append('"' + word.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return " ".join(terms) or None
+
+
+def search_logs(conn, query, limit=SEARCH_PAGE_SIZE, offset=0):
+    """
+    Finds log events matching a query, best matches first.
+
+    Args:
+        conn (sqlite3.Connection): A database connection.
+        query (str): The search box contents.
+        limit (int): Results per page.
+        offset (int): Results to skip.
+
+    Returns:
+        list: Dicts with the id, timestamp, HTML-escaped event with matches
+        wrapped in <mark>, and bm25 rank (lower is better) of each result.
+    """
+    expression = match_expression(query)
+    if expression is None:
+        return []
+    rows = conn.execute(
+        SEARCH_SQL, (HIGHLIGHT_START, HIGHLIGHT_END, expression, limit, offset)
+    )
+    return [
+        {
+            "id": log_id,
+            "timestamp": timestamp,
+            "event": html.escape(event)
+            .replace(HIGHLIGHT_START, "<mark>")
+            .replace(HIGHLIGHT_END, "</mark>"),
+            "rank": rank,
+        }
+        for log_id, timestamp, event, rank in rows
+    ]
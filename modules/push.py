@@ -0,0 +1,225 @@
+import os
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+
+# Push Settings
+FCM_ENDPOINT = os.getenv("FCM_ENDPOINT", "https://fcm.googleapis.com/fcm/send")
+FCM_BATCH_SIZE = int(os.getenv("FCM_BATCH_SIZE", 500))  # FCM caps at 1000
+FCM_POOL_SIZE = int(os.getenv("FCM_POOL_SIZE", 4))
+FCM_TIMEOUT = float(os.getenv("FCM_TIMEOUT", 10))  # seconds
+
+# Per-token errors meaning the token will never be deliverable again
+STALE_TOKEN_ERRORS = {"NotRegistered", "InvalidRegistration", "MismatchSenderId"}
+
+
+class DeviceTokenRegistry:
+    def __init__(self, db_path="database.db"):
+        self.db_path = db_path
+        self.initialize_table()
+
+    def initialize_table(self):
+        """
+        Creates the device token table if it does not exist.
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS device_tokens (
+                token TEXT PRIMARY KEY,
+                username TEXT,
+                created DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """
+        )
+        conn.commit()
+        conn.close()
+
+    def register(self, token, username=None):
+        """
+        Registers a device token, replacing any previous owner.
+
+        Args:
+            token (str): The FCM registration token.
+            username (str, optional): The user owning the device.
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "INSERT OR REPLACE INTO device_tokens (token, username) VALUES (?, ?)",
+            [token, username],
+        )
+        conn.commit()
+        conn.close()
+
+    def tokens(self):
+        """
+        Fetches every registered device token.
+
+        Returns:
+            list: A list of registration tokens.
+        """
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("SELECT token FROM device_tokens").fetchall()
+        conn.close()
+        return [row[0] for row in rows]
+
+    def remove(self, tokens):
+        """
+        Removes many tokens in a single transaction.
+
+        Args:
+            tokens (list): The tokens to remove.
+
+        Returns:
+            int: The number of tokens removed.
+        """
+        if not tokens:
+            return 0
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            cursor = conn.executemany(
+                "DELETE FROM device_tokens WHERE token = ?", [(t,) for t in tokens]
+            )
+        conn.close()
+        return cursor.rowcount
+
+    def replace(self, replacements):
+        """
+        Swaps outdated tokens for their canonical ids in a single transaction.
+
+        Args:
+            replacements (list): (old_token, canonical_token) pairs.
+        """
+        if not replacements:
+            return
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.executemany(
+                "UPDATE OR REPLACE device_tokens SET token = ? WHERE token = ?",
+                [(new, old) for old, new in replacements],
+            )
+        conn.close()
+
+
+class FCMPushChannel:
+    def __init__(
+        self,
+        server_key=None,
+        registry=None,
+        endpoint=FCM_ENDPOINT,
+        batch_size=FCM_BATCH_SIZE,
+        pool_size=FCM_POOL_SIZE,
+        timeout=FCM_TIMEOUT,
+    ):
+        server_key = server_key or os.getenv("FCM_SERVER_KEY")
+        if not server_key:
+            raise EnvironmentError("FCM_SERVER_KEY environment variable is missing.")
+        self.registry = registry or DeviceTokenRegistry()
+        self.endpoint = endpoint
+        self.batch_size = min(batch_size, 1000)
+        self.timeout = timeout
+
+        # One keep-alive connection per worker, reused across batches and alerts
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {
+                "Authorization": f"key={server_key}",
+                "Content-Type": "application/json",
+            }
+        )
+        self.executor = ThreadPoolExecutor(
+            max_workers=pool_size, thread_name_prefix="fcm"
+        )
+
+    def send(self, title, body, tokens=None, data=None):
+        """
+        Sends a notification to every token using multicast batches.
+
+        Args:
+            title (str): The notification title.
+            body (str): The notification body.
+            tokens (list, optional): Target tokens. Defaults to the registry.
+            data (dict, optional): Extra key/value data for the app.
+
+        Returns:
+            dict: Success, failure and pruned token counts.
+        """
+        if tokens is None:
+            tokens = self.registry.tokens()
+        payload = {
+            "notification": {"title": title, "body": body},
+            "priority": "high",
+        }
+        if data:
+            payload["data"] = data
+
+        batches = [
+            tokens[i : i + self.batch_size]
+            for i in range(0, len(tokens), self.batch_size)
+        ]
+        summary = {"success": 0, "failure": 0, "pruned": 0, "batches": len(batches)}
+        stale, canonical = [], []
+        for result in self.executor.map(
+            lambda batch: self.send_batch(batch, payload), batches
+        ):
+            summary["success"] += result["success"]
+            summary["failure"] += result["failure"]
+            stale.extend(result["stale"])
+            canonical.extend(result["canonical"])
+
+        summary["pruned"] = self.registry.remove(stale)
+        self.registry.replace(canonical)
+        logging.info(
+            f"Push sent: {summary['success']} delivered, {summary['failure']} failed, "
+            f"{summary['pruned']} stale tokens pruned in {summary['batches']} batches"
+        )
+        return summary
+
+    def send_batch(self, tokens, payload):
+        """
+        Posts one multicast request and classifies the per-token results.
+
+        Args:
+            tokens (list): Up to `batch_size` registration tokens.
+            payload (dict): The shared notification payload.
+
+        Returns:
+            dict: Counts plus the stale and canonical tokens found.
+        """
+        result = {"success": 0, "failure": 0, "stale": [], "canonical": []}
+        try:
+            response = self.session.post(
+                self.endpoint,
+                json=dict(payload, registration_ids=tokens),
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            outcomes = response.json().get("results", [])
+        except Exception as e:
+            logging.error(f"Failed to send push batch of {len(tokens)} tokens: {e}")
+            result["failure"] = len(tokens)
+            return result
+
+        # Results are returned in the same order as registration_ids
+        for token, outcome in zip(tokens, outcomes):
+            if "message_id" in outcome:
+                result["success"] += 1
+                if "registration_id" in outcome:
+                    result["canonical"].append((token, outcome["registration_id"]))
+            else:
+                result["failure"] += 1
+                if outcome.get("error") in STALE_TOKEN_ERRORS:
+                    result["stale"].append(token)
+        return result
+
+    def close(self):
+        """
+        Releases the worker pool and pooled connections.
+        """
+        self.executor.shutdown(wait=True)
+        self.session.close()
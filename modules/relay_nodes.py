@@ -0,0 +1,323 @@
+import os
+import json
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Relay Node Settings
+MQTT_BROKER = os.getenv("MQTT_BROKER")  # remote relays are disabled without it
+MQTT_PORT = int(os.getenv("MQTT_PORT", 1883))
+RELAY_TOPIC_PREFIX = os.getenv("RELAY_TOPIC_PREFIX", "pisafe/relays")
+RELAY_NODES = [n for n in os.getenv("RELAY_NODES", "").split(",") if n.strip()]
+RELAY_ACK_TIMEOUT = float(os.getenv("RELAY_ACK_TIMEOUT", 1))  # seconds per attempt
+RELAY_RETRIES = int(os.getenv("RELAY_RETRIES", 2))  # resends of a command
+RELAY_SYNC_LEAD = float(os.getenv("RELAY_SYNC_LEAD", 0.5))  # seconds
+RELAY_SYNC_INTERVAL = float(os.getenv("RELAY_SYNC_INTERVAL", 60))  # seconds
+RELAY_SYNC_SAMPLES = 8  # clock samples kept per node
+
+
+def command_topic(node_id, prefix=RELAY_TOPIC_PREFIX):
+    return f"{prefix}/{node_id}/command"
+
+
+def ack_topic(node_id, prefix=RELAY_TOPIC_PREFIX):
+    return f"{prefix}/{node_id}/ack"
+
+
+class NodeState:
+    def __init__(self, node_id):
+        self.node_id = node_id
+        self.seq = 0
+        self.samples = deque(maxlen=RELAY_SYNC_SAMPLES)  # (rtt, offset)
+        self.latencies = deque(maxlen=1000)
+        self.failures = 0
+
+    @property
+    def offset(self):
+        """
+        Node clock minus controller clock, from the sample with the lowest
+        round trip since queueing delays only ever add to it.
+        """
+        return min(self.samples)[1] if self.samples else 0.0
+
+
+class RelayController:
+    supports_groups = True
+
+    def __init__(
+        self,
+        client,
+        nodes=RELAY_NODES,
+        prefix=RELAY_TOPIC_PREFIX,
+        ack_timeout=RELAY_ACK_TIMEOUT,
+        retries=RELAY_RETRIES,
+        lead=RELAY_SYNC_LEAD,
+        clock=time.time,
+    ):
+        """
+        Commands relay nodes on other Pis over MQTT. Every command carries
+        a per-node sequence number and is published with QoS 1; the node
+        acknowledges it on its ack topic, and unacknowledged commands are
+        resent with the same sequence number so a redelivery is never
+        acted on twice. Activation times are sent in each node's own
+        clock, corrected by an offset measured with NTP-style pings, so
+        nodes keyed together sound together.
+
+        Siren ids handled by this transport are "<node>/<relay>".
+
+        Args:
+            client: A connected paho-mqtt client, or anything with the same
+                publish, subscribe and message_callback_add methods.
+            nodes (list): Node ids to keep clock offsets for.
+            prefix (str): Topic prefix shared with the nodes.
+            ack_timeout (float): Seconds to wait for each acknowledgement.
+            retries (int): Times an unacknowledged command is resent.
+            lead (float): Seconds between sending a synchronized activation
+                and the relays keying, covering the slowest node.
+            clock (callable): Wall clock of the controller.
+        """
+        self.client = client
+        self.prefix = prefix
+        self.ack_timeout = ack_timeout
+        self.retries = retries
+        self.lead = lead
+        self.clock = clock
+        self.session = int(clock() * 1000)  # lets nodes tell a restart from a replay
+        self.nodes = {}
+        self.pending = {}  # (node id, seq) -> {"event", "ack"}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(thread_name_prefix="relay-command")
+        self.client.message_callback_add(ack_topic("+", prefix), self.on_ack)
+        self.client.subscribe(ack_topic("+", prefix), qos=1)
+        for node_id in nodes:
+            self.node(node_id)
+
+    def node(self, node_id):
+        with self.lock:
+            if node_id not in self.nodes:
+                self.nodes[node_id] = NodeState(node_id)
+            return self.nodes[node_id]
+
+    def on_ack(self, client, userdata, message):
+        try:
+            ack = json.loads(message.payload)
+            key = (message.topic.split("/")[-2], ack["seq"])
+        except (ValueError, KeyError, IndexError) as e:
+            logging.error(f"Malformed relay acknowledgement: {e}")
+            return
+        received = self.clock()
+        with self.lock:
+            waiting = self.pending.get(key)
+            if waiting is None or waiting["ack"] is not None:
+                return  # late or duplicate acknowledgement
+            waiting["ack"] = (ack, received)
+        waiting["event"].set()
+
+    def send(self, node_id, command):
+        """
+        Publishes a command and waits for its acknowledgement, resending it
+        with the same sequence number until acknowledged or out of retries.
+
+        Args:
+            node_id (str): The node.
+            command (dict): The command, without seq.
+
+        Returns:
+            tuple: The acknowledgement, the controller time the command was
+            last sent and the time the acknowledgement arrived.
+
+        Raises:
+            TimeoutError: If the node never acknowledged.
+        """
+        node = self.node(node_id)
+        with self.lock:
+            node.seq += 1
+            key = (node_id, node.seq)
+            waiting = {"event": threading.Event(), "ack": None}
+            self.pending[key] = waiting
+        try:
+            for _ in range(self.retries + 1):
+                # Timestamps are taken at each send so they match the copy
+                # being acknowledged
+                payload = {
+                    "session": self.session,
+                    "seq": node.seq,
+                    **command,
+                    "sent": self.clock(),
+                }
+                if "at" in command:
+                    payload["at"] = command["at"] + node.offset
+                self.client.publish(
+                    command_topic(node_id, self.prefix), json.dumps(payload), qos=1
+                )
+                if waiting["event"].wait(self.ack_timeout):
+                    ack, received = waiting["ack"]
+                    node.latencies.append(received - ack["sent_at"])
+                    return ack, ack["sent_at"], received
+            node.failures += 1
+            raise TimeoutError(f"Relay node {node_id} did not acknowledge")
+        finally:
+            with self.lock:
+                del self.pending[key]
+
+    def sync(self, node_id):
+        """
+        Measures a node's clock offset with one ping.
+
+        Returns:
+            float: The node's current offset estimate in seconds.
+        """
+        ack, sent, received = self.send(node_id, {"action": "ping"})
+        rtt = (received - sent) - (ack["replied"] - ack["received"])
+        offset = ((ack["received"] - sent) + (ack["replied"] - received)) / 2
+        node = self.nodes[node_id]
+        node.samples.append((rtt, offset))
+        return node.offset
+
+    def sync_all(self):
+        for node_id in list(self.nodes):
+            try:
+                self.sync(node_id)
+            except TimeoutError as e:
+                logging.warning(f"Clock sync failed: {e}")
+
+    def run(self, interval=RELAY_SYNC_INTERVAL):
+        """
+        Keeps the clock offsets fresh; run in a daemon thread.
+        """
+        while True:
+            self.sync_all()
+            time.sleep(interval)
+
+    def start_thread(self):
+        threading.Thread(target=self.run, name="relay-sync", daemon=True).start()
+
+    def activate_group(self, siren_ids, duration):
+        """
+        Keys the relays of several nodes at the same instant.
+
+        Args:
+            siren_ids (list): "<node>/<relay>" siren ids.
+            duration (int): Seconds the relays stay keyed.
+
+        Returns:
+            dict: Command latency of each acknowledged siren, None for
+            sirens whose node never acknowledged.
+        """
+        relays = {}
+        for siren_id in siren_ids:
+            node_id, _, relay = siren_id.partition("/")
+            relays.setdefault(node_id, []).append(relay)
+        at = self.clock() + self.lead
+        futures = {
+            node_id: self.executor.submit(
+                self.send,
+                node_id,
+                {"action": "activate", "relays": r, "duration": duration, "at": at},
+            )
+            for node_id, r in relays.items()
+        }
+        latencies = {}
+        for node_id, future in futures.items():
+            try:
+                _, sent, received = future.result()
+                latency = received - sent
+            except Exception as e:
+                logging.error(f"Relay node {node_id} failed: {e}")
+                latency = None
+            for relay in relays[node_id]:
+                latencies[f"{node_id}/{relay}"] = latency
+        return latencies
+
+    def stats(self):
+        """
+        Returns:
+            dict: Per node, the clock offset, command latency percentiles in
+            seconds and unacknowledged commands.
+        """
+        stats = {}
+        for node_id, node in list(self.nodes.items()):
+            latencies = sorted(node.latencies)
+            stats[node_id] = {
+                "offset": node.offset,
+                "commands": len(latencies),
+                "failures": node.failures,
+                "latency_p50": latencies[len(latencies) // 2] if latencies else None,
+                "latency_p95": (
+                    latencies[int(len(latencies) * 0.95)] if latencies else None
+                ),
+            }
+        return stats
+
+
+class RelayNode:
+    def __init__(
+        self, node_id, client, activate, prefix=RELAY_TOPIC_PREFIX, clock=time.time
+    ):
+        """
+        Runs on each remote Pi: acknowledges commands from the controller
+        and keys its relays at the requested time on its own clock.
+
+        Args:
+            node_id (str): This node's id.
+            client: A connected paho-mqtt client or stand-in.
+            activate (callable): Called as activate(relays, duration).
+            prefix (str): Topic prefix shared with the controller.
+            clock (callable): Wall clock of the node.
+        """
+        self.node_id = node_id
+        self.client = client
+        self.activate = activate
+        self.prefix = prefix
+        self.clock = clock
+        self.session = None
+        self.last_seq = 0
+        self.client.message_callback_add(
+            command_topic(node_id, prefix), self.on_command
+        )
+        self.client.subscribe(command_topic(node_id, prefix), qos=1)
+
+    def on_command(self, client, userdata, message):
+        received = self.clock()
+        try:
+            command = json.loads(message.payload)
+            seq = command["seq"]
+        except (ValueError, KeyError) as e:
+            logging.error(f"Malformed relay command: {e}")
+            return
+        if command.get("session") != self.session:
+            self.session, self.last_seq = command.get("session"), 0
+        # Redeliveries are acknowledged again but only acted on once
+        if seq > self.last_seq:
+            self.last_seq = seq
+            if command.get("action") == "activate":
+                delay = max(command["at"] - self.clock(), 0)
+                threading.Timer(
+                    delay, self.activate, (command["relays"], command["duration"])
+                ).start()
+        ack = {
+            "seq": seq,
+            "sent_at": command["sent"],
+            "received": received,
+            "replied": self.clock(),
+        }
+        self.client.publish(
+            ack_topic(self.node_id, self.prefix), json.dumps(ack), qos=1
+        )
+
+
+if __name__ == "__main__":
+    # Relay node entry point, run on each remote Pi
+    import paho.mqtt.client as mqtt
+    from eas_alert import trigger_relay
+
+    client = mqtt.Client(client_id=os.getenv("RELAY_NODE_ID"), clean_session=False)
+    client.connect(MQTT_BROKER, MQTT_PORT)
+    RelayNode(
+        os.getenv("RELAY_NODE_ID"),
+        client,
+        lambda relays, duration: trigger_relay(duration),
+    )
+    client.loop_forever()
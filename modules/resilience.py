@@ -0,0 +1,217 @@
+import os
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Resilience Settings
+PROVIDER_TIMEOUT = float(os.getenv("PROVIDER_TIMEOUT", 5))  # seconds per request
+PROVIDER_DEADLINE = float(os.getenv("PROVIDER_DEADLINE", 8))  # seconds per send
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", 5))
+BREAKER_RESET = float(os.getenv("BREAKER_RESET", 30))  # seconds before probing
+HEDGE_DELAY = os.getenv("HEDGE_DELAY") or None  # seconds; unset disables hedging
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self, name, failure_threshold=BREAKER_FAILURES, reset_timeout=BREAKER_RESET
+    ):
+        """
+        Args:
+            name (str): The provider name.
+            failure_threshold (int): Consecutive failures that open the circuit.
+            reset_timeout (float): Seconds the circuit stays open before a probe.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """
+        Checks whether a request may be sent. Once the reset timeout has
+        passed an open circuit lets a single probe through.
+
+        Returns:
+            bool: True if the request may proceed.
+        """
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self.probing = False
+            if self.probing:
+                return False
+            self.probing = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            if self.state != self.CLOSED:
+                logging.info(f"Circuit for {self.name} closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.probing = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logging.warning(f"Circuit for {self.name} opened")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class Provider:
+    def __init__(self, name, send, breaker=None, trips=None):
+        """
+        Args:
+            name (str): The provider name.
+            send (callable): Performs one delivery attempt.
+            breaker (CircuitBreaker, optional): Defaults to a new breaker.
+            trips (callable, optional): Decides whether an exception counts
+                against the breaker. Defaults to every exception.
+        """
+        self.name = name
+        self.send = send
+        self.breaker = breaker or CircuitBreaker(name)
+        self.trips = trips or (lambda error: True)
+
+
+class ResilientChannel:
+    def __init__(
+        self, providers, deadline=PROVIDER_DEADLINE, hedge_delay=HEDGE_DELAY, workers=8
+    ):
+        """
+        Sends through the first healthy provider, failing over in order
+        when a provider fails in a way that trips its breaker. Throttling
+        and rejected requests are raised to the caller instead.
+
+        Args:
+            providers (list): Providers in order of preference.
+            deadline (float): Maximum seconds a send may take overall.
+            hedge_delay (float, optional): Seconds after which a still-pending
+                request is hedged to the next provider. None disables hedging.
+            workers (int): Size of the worker pool running attempts.
+        """
+        self.providers = providers
+        self.deadline = deadline
+        self.hedge_delay = None if hedge_delay is None else float(hedge_delay)
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="provider"
+        )
+
+    def next_provider(self, queue):
+        # Breakers are consulted lazily so unused providers are not left probing
+        while queue:
+            provider = queue.pop(0)
+            if provider.breaker.allow():
+                return provider
+        return None
+
+    def attempt(self, provider, args, settled):
+        future = self.executor.submit(provider.send, *args)
+
+        def record(done):
+            with settled["lock"]:
+                if done in settled["timed_out"]:
+                    return  # already counted as a failure at the deadline
+            error = done.exception()
+            if error is None or not provider.trips(error):
+                provider.breaker.record_success()
+            else:
+                provider.breaker.record_failure()
+
+        future.add_done_callback(record)
+        return future
+
+    def send(self, *args):
+        """
+        Delivers through the providers within the deadline.
+
+        Returns:
+            The result of the first successful provider.
+
+        Raises:
+            CircuitOpenError: If every provider's circuit is open.
+            TimeoutError: If no provider succeeded before the deadline.
+        """
+        queue = list(self.providers)
+        provider = self.next_provider(queue)
+        if provider is None:
+            raise CircuitOpenError("All providers are unavailable.")
+        settled = {"lock": threading.Lock(), "timed_out": set()}
+        started = time.monotonic()
+        active = {self.attempt(provider, args, settled): provider}
+        hedge_at = None if self.hedge_delay is None else started + self.hedge_delay
+        last_error = None
+
+        while active:
+            now = time.monotonic()
+            timeout = started + self.deadline - now
+            if queue and hedge_at is not None:
+                timeout = min(timeout, hedge_at - now)
+            done, _ = wait(active, timeout=max(timeout, 0), return_when=FIRST_COMPLETED)
+            for future in done:
+                provider = active.pop(future)
+                if future.exception() is None:
+                    return future.result()
+                last_error = future.exception()
+                logging.warning(f"{provider.name} failed: {last_error}")
+                if not provider.trips(last_error):
+                    # Throttled or rejected: another provider would fare no
+                    # better, and the caller must see the error
+                    queue.clear()
+                elif not active:
+                    # Fail over straight away rather than waiting for the hedge
+                    provider = self.next_provider(queue)
+                    if provider:
+                        active[self.attempt(provider, args, settled)] = provider
+            now = time.monotonic()
+            if now >= started + self.deadline:
+                break
+            if not done and hedge_at is not None and now >= hedge_at:
+                hedge_at = None
+                provider = self.next_provider(queue)
+                if provider:
+                    logging.info(f"Hedging request to {provider.name}")
+                    active[self.attempt(provider, args, settled)] = provider
+
+        if not active:
+            raise last_error or CircuitOpenError("All providers are unavailable.")
+        with settled["lock"]:
+            hung = {f: p for f, p in active.items() if not f.done()}
+            settled["timed_out"].update(hung)
+        for future in active:
+            if future not in hung and future.exception() is None:
+                return future.result()
+        for provider in hung.values():
+            provider.breaker.record_failure()
+        raise TimeoutError(f"No provider responded within {self.deadline}s.")
+
+    def stats(self):
+        """
+        Returns:
+            dict: Circuit state and consecutive failures per provider.
+        """
+        return {
+            p.name: {"state": p.breaker.state, "failures": p.breaker.failures}
+            for p in self.providers
+        }
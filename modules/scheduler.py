@@ -0,0 +1,225 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+# Severity classes, most urgent first (lower value runs first)
+PRESIDENTIAL = 0
+WARNING = 1
+WATCH = 2
+STATEMENT = 3
+TEST = 4
+
+NATIONAL_EVENTS = {"EAN", "EAT", "NIC"}
+TEST_EVENTS = {"RWT", "RMT", "DMO", "NPT", "NAT", "NST"}
+# Warnings and emergencies whose codes do not follow the W/A/S suffix convention
+WARNING_EVENTS = {"BLU", "CAE", "CDW", "CEM", "EVI", "SVR", "TOR"}
+# Codes that end in W or E without being warnings (NOW: Short Term Forecast)
+STATEMENT_EVENTS = {"NOW"}
+
+
+def priority_for_event(event_code):
+    """
+    Derives the severity class of a SAME event code.
+
+    Args:
+        event_code (str): The three-letter SAME event code.
+
+    Returns:
+        int: The severity class, PRESIDENTIAL being the most urgent.
+    """
+    code = (event_code or "").upper()
+    if code in NATIONAL_EVENTS:
+        return PRESIDENTIAL
+    if code in TEST_EVENTS:
+        return TEST
+    if code in STATEMENT_EVENTS:
+        return STATEMENT
+    if code in WARNING_EVENTS or code.endswith(("W", "E")):
+        return WARNING
+    if code.endswith("A"):
+        return WATCH
+    return STATEMENT
+
+
+class ChannelQueue:
+    def __init__(self, name, handler, workers=1):
+        self.name = name
+        self.handler = handler
+        self.heap = []
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.unfinished = 0
+        for i in range(workers):
+            threading.Thread(target=self.run, name=f"{name}-{i}", daemon=True).start()
+
+    def put(self, priority, alert_id, args):
+        """
+        Queues one delivery. Lower-priority work already queued stays
+        behind it and resumes once the more urgent work has drained.
+
+        Args:
+            priority (int): The severity class of the alert.
+            alert_id (int): The alert the delivery belongs to.
+            args (tuple): Arguments passed to the channel handler.
+        """
+        with self.condition:
+            heapq.heappush(self.heap, (priority, next(self.sequence), alert_id, args))
+            self.unfinished += 1
+            self.condition.notify()
+
+    def pending(self, alert_id=None):
+        """
+        Counts queued deliveries, optionally for a single alert.
+
+        Returns:
+            int: The number of deliveries not yet started.
+        """
+        with self.condition:
+            if alert_id is None:
+                return len(self.heap)
+            return sum(1 for item in self.heap if item[2] == alert_id)
+
+    def join(self, timeout=None):
+        """
+        Blocks until every queued delivery has been handled.
+
+        Returns:
+            bool: True if the queue drained before the timeout.
+        """
+        with self.condition:
+            return self.condition.wait_for(lambda: self.unfinished == 0, timeout)
+
+    def run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.heap)
+                priority, _, alert_id, args = heapq.heappop(self.heap)
+            try:
+                self.handler(*args)
+            except Exception as e:
+                logging.error(f"{self.name} delivery for alert {alert_id} failed: {e}")
+            finally:
+                with self.condition:
+                    self.unfinished -= 1
+                    self.condition.notify_all()
+
+
+class PreemptibleOutput(ChannelQueue):
+    def __init__(self, name, action):
+        """
+        A single-occupancy output such as the speaker or the relay.
+
+        Args:
+            name (str): The output name.
+            action (callable): Called as action(*args, offset=, interrupted=);
+                it must stop early when `interrupted` is set.
+        """
+        self.current = None
+        super().__init__(name, action, workers=1)
+
+    def put(self, priority, alert_id, args, offset=0):
+        with self.condition:
+            heapq.heappush(
+                self.heap, (priority, next(self.sequence), alert_id, (args, offset))
+            )
+            self.unfinished += 1
+            current = self.current
+            if current and priority < current[0]:
+                logging.warning(
+                    f"{self.name}: alert {alert_id} preempts alert {current[1]}"
+                )
+                current[2].set()
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.heap)
+                priority, _, alert_id, (args, offset) = heapq.heappop(self.heap)
+                interrupted = threading.Event()
+                self.current = (priority, alert_id, interrupted)
+            started = time.monotonic()
+            try:
+                self.handler(*args, offset=offset, interrupted=interrupted)
+            except Exception as e:
+                logging.error(f"{self.name} output for alert {alert_id} failed: {e}")
+            with self.condition:
+                self.current = None
+                self.unfinished -= 1
+                if interrupted.is_set():
+                    # Paused, not dropped: resume where it left off
+                    resume_at = offset + time.monotonic() - started
+                    heapq.heappush(
+                        self.heap,
+                        (priority, next(self.sequence), alert_id, (args, resume_at)),
+                    )
+                    self.unfinished += 1
+                self.condition.notify_all()
+
+
+class AlertScheduler:
+    def __init__(self, first_id=1):
+        self.channels = {}
+        self.alert_ids = itertools.count(first_id)
+
+    def add_channel(self, name, handler, workers=1):
+        """
+        Registers a delivery channel with its own priority queue.
+
+        Args:
+            name (str): The channel name.
+            handler (callable): Called with the arguments of each delivery.
+            workers (int): Number of concurrent deliveries.
+        """
+        self.channels[name] = ChannelQueue(name, handler, workers)
+
+    def add_output(self, name, action):
+        """
+        Registers a preemptible output such as audio or the relay.
+
+        Args:
+            name (str): The output name.
+            action (callable): See PreemptibleOutput.
+        """
+        self.channels[name] = PreemptibleOutput(name, action)
+
+    def reserve_id(self):
+        """
+        Allocates an alert id ahead of submit, for deliveries that need
+        to carry it.
+
+        Returns:
+            int: The alert id.
+        """
+        return next(self.alert_ids)
+
+    def submit(self, priority, deliveries, alert_id=None):
+        """
+        Queues all deliveries of one alert on their channels.
+
+        Args:
+            priority (int): The severity class of the alert.
+            deliveries (dict): Channel name to a list of argument tuples.
+            alert_id (int, optional): An id from reserve_id. Defaults to a new id.
+
+        Returns:
+            int: The scheduler's id for the alert.
+        """
+        if alert_id is None:
+            alert_id = self.reserve_id()
+        for name, items in deliveries.items():
+            channel = self.channels.get(name)
+            if channel is None:
+                continue
+            for args in items:
+                channel.put(priority, alert_id, args)
+        logging.info(f"Alert {alert_id} scheduled with priority {priority}")
+        return alert_id
+
+    def join(self, timeout=None):
+        """
+        Blocks until every channel has drained.
+        """
+        return all(channel.join(timeout) for channel in self.channels.values())
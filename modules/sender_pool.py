@@ -0,0 +1,191 @@
+import os
+import hashlib
+import logging
+import threading
+import time
+
+# Sender Settings
+SENDER_RATE = float(os.getenv("SENDER_RATE", 1))  # messages/second per number
+THROTTLE_COOLDOWN = float(os.getenv("THROTTLE_COOLDOWN", 30))  # seconds
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        """
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float, optional): Burst size. Defaults to one second's worth.
+        """
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        """
+        Takes a token if one is available.
+
+        Returns:
+            bool: True if a token was taken.
+        """
+        with self.lock:
+            self.refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def wait_time(self):
+        """
+        Returns:
+            float: Seconds until the next token is available.
+        """
+        with self.lock:
+            self.refill()
+            return max(0.0, (1 - self.tokens) / self.rate)
+
+    def set_rate(self, rate):
+        with self.lock:
+            self.refill()
+            self.rate = rate
+
+
+class Sender:
+    def __init__(self, number, rate):
+        self.number = number
+        self.configured_rate = rate
+        self.bucket = TokenBucket(rate)
+        self.cooldown_until = 0.0
+        self.sent = 0
+        self.throttled = 0
+
+
+class SenderPool:
+    def __init__(self, numbers, rate=SENDER_RATE, cooldown=THROTTLE_COOLDOWN):
+        """
+        Shards recipients across several sender numbers, each shaped by its
+        own token bucket.
+
+        Args:
+            numbers (list): Sender phone numbers.
+            rate (float): Messages per second allowed for each number.
+            cooldown (float): Seconds a throttled number is taken out of rotation.
+        """
+        if not numbers:
+            raise ValueError("At least one sender number is required.")
+        self.senders = [Sender(number, rate) for number in numbers]
+        self.by_number = {sender.number: sender for sender in self.senders}
+        self.cooldown = cooldown
+        self.lock = threading.Lock()
+
+    def healthy(self):
+        now = time.monotonic()
+        active = [s for s in self.senders if s.cooldown_until <= now]
+        return active or self.senders
+
+    def ranked(self, recipient, senders):
+        """
+        Orders senders by rendezvous hash, so a recipient keeps its number
+        while that number is healthy and only the recipients of a number
+        taken out of rotation move elsewhere.
+
+        Args:
+            recipient (str): The recipient's phone number.
+            senders (list): The senders to rank.
+
+        Returns:
+            list: The senders, preferred first.
+        """
+        return sorted(
+            senders,
+            key=lambda sender: hashlib.blake2b(
+                f"{sender.number}:{recipient}".encode(), digest_size=8
+            ).digest(),
+            reverse=True,
+        )
+
+    def acquire(self, recipient, timeout=None):
+        """
+        Picks the sender number for a recipient, waiting for capacity.
+        Recipients stick to one number while it is healthy; when its bucket
+        is empty the next healthy number in its ranking with capacity is
+        used instead.
+
+        Args:
+            recipient (str): The recipient's phone number.
+            timeout (float, optional): Maximum seconds to wait.
+
+        Returns:
+            str: The sender number to use, or None on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            senders = self.ranked(recipient, self.healthy())
+            for sender in senders:
+                if sender.bucket.try_acquire():
+                    sender.sent += 1
+                    return sender.number
+            wait = min(sender.bucket.wait_time() for sender in senders)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def report_throttled(self, number):
+        """
+        Halves a number's rate and takes it out of rotation for a cooldown,
+        so its share of recipients moves to the other numbers.
+
+        Args:
+            number (str): The sender number the provider throttled.
+        """
+        sender = self.by_number.get(number)
+        if sender is None:
+            return
+        with self.lock:
+            sender.throttled += 1
+            sender.bucket.set_rate(max(sender.bucket.rate / 2, 0.1))
+            sender.cooldown_until = time.monotonic() + self.cooldown
+        logging.warning(
+            f"Sender {number} throttled; rate now {sender.bucket.rate:.2f}/s"
+        )
+
+    def report_success(self, number):
+        """
+        Gradually restores a throttled number's rate.
+
+        Args:
+            number (str): The sender number that delivered successfully.
+        """
+        sender = self.by_number.get(number)
+        if sender is None or sender.bucket.rate >= sender.configured_rate:
+            return
+        with self.lock:
+            sender.bucket.set_rate(
+                min(
+                    sender.configured_rate,
+                    sender.bucket.rate + sender.configured_rate * 0.1,
+                )
+            )
+
+    def stats(self):
+        """
+        Returns:
+            dict: Per-number rate, sent and throttled counts.
+        """
+        return {
+            sender.number: {
+                "rate": sender.bucket.rate,
+                "sent": sender.sent,
+                "throttled": sender.throttled,
+            }
+            for sender in self.senders
+        }
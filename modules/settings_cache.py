@@ -0,0 +1,91 @@
+import os
+import threading
+import time
+
+# Settings Cache Settings
+SETTINGS_CHECK_INTERVAL = float(os.getenv("SETTINGS_CHECK_INTERVAL", 1))  # seconds
+DEFAULT_SETTINGS = ("light", "en")  # theme, language
+
+SETTINGS_VERSION_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS settings_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO settings_version (id, version) VALUES (1, 0);
+    CREATE TRIGGER IF NOT EXISTS settings_version_insert AFTER INSERT ON settings BEGIN
+        UPDATE settings_version SET version = version + 1 WHERE id = 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS settings_version_update AFTER UPDATE ON settings BEGIN
+        UPDATE settings_version SET version = version + 1 WHERE id = 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS settings_version_delete AFTER DELETE ON settings BEGIN
+        UPDATE settings_version SET version = version + 1 WHERE id = 1;
+    END;
+"""
+
+
+def initialize_settings_version(conn):
+    """
+    Creates the settings version counter and the triggers that bump it
+    whenever the settings table changes, whichever process changes it.
+
+    Args:
+        conn (sqlite3.Connection): Connection to a database that already
+            has the settings table.
+    """
+    conn.executescript(f"BEGIN; {SETTINGS_VERSION_SCHEMA} COMMIT;")
+
+
+class SettingsCache:
+    def __init__(self, check_interval=SETTINGS_CHECK_INTERVAL):
+        """
+        Keeps the settings as an in-memory snapshot tagged with the version
+        counter it was read at. The counter is checked at most once per
+        `check_interval` seconds, a single-row primary key read, and the
+        settings are only re-read when it has moved, so a change saved in
+        one worker reaches the others within the interval.
+
+        Args:
+            check_interval (float): Seconds between version checks.
+        """
+        self.check_interval = check_interval
+        self.snapshot = DEFAULT_SETTINGS
+        self.version = None
+        self.next_check = 0.0
+        self.lock = threading.Lock()
+
+    def get(self, conn):
+        """
+        Returns the settings, checking their version through `conn` when the
+        check interval has passed.
+
+        Args:
+            conn (sqlite3.Connection): A database connection.
+
+        Returns:
+            tuple: The theme and language.
+        """
+        now = time.monotonic()
+        if now < self.next_check:
+            return self.snapshot
+        with self.lock:
+            if now < self.next_check:
+                return self.snapshot
+            version = conn.execute(
+                "SELECT version FROM settings_version WHERE id = 1"
+            ).fetchone()[0]
+            if version != self.version:
+                row = conn.execute(
+                    "SELECT theme, language FROM settings WHERE id = 1"
+                ).fetchone()
+                self.snapshot = tuple(row) if row else DEFAULT_SETTINGS
+                self.version = version
+            self.next_check = now + self.check_interval
+            return self.snapshot
+
+    def invalidate(self):
+        """
+        Checks the version on the next read, so this worker sees its own
+        change immediately.
+        """
+        self.next_check = 0.0
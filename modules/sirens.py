@@ -0,0 +1,438 @@
+import os
+import csv
+import logging
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from modules.geofence import PointIndex
+from modules.subscriptions import SubscriptionIndex
+
+# Siren Settings
+SIREN_WORKERS = int(os.getenv("SIREN_WORKERS", 16))  # concurrent activations
+SIREN_ACK_TIMEOUT = float(os.getenv("SIREN_ACK_TIMEOUT", 5))  # seconds
+SIREN_DURATION = int(os.getenv("SIREN_DURATION", 180))  # seconds
+
+
+class CallbackTransport:
+    supports_groups = False
+
+    def __init__(self, activate):
+        """
+        Activates sirens one at a time through a function.
+
+        Args:
+            activate (callable): Called as activate(siren_id, duration); it
+                returns once the siren has acknowledged and raises on failure.
+        """
+        self.activate = activate
+
+
+class SirenRegistry:
+    def __init__(self, db_path="database.db"):
+        """
+        Sirens with their zones, coordinates and the SAME/FIPS location
+        codes they cover, persisted in SQLite. The sirens for every code
+        that can match a registered siren are precomputed, so an alert's
+        locations resolve with a few dictionary lookups; changes only
+        recompute the affected counties.
+
+        Args:
+            db_path (str): Path to the SQLite database.
+        """
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.sirens = {}  # siren id -> (zone, transport, lat, lon)
+        self.zones = defaultdict(set)  # zone -> siren ids
+        self.areas = defaultdict(set)  # siren id -> SAME location codes
+        self.index = SubscriptionIndex()
+        self.resolved = {}  # SAME location code -> frozenset of siren ids
+        self.points = None  # PointIndex over the siren coordinates
+        self.initialize_table()
+        self.load()
+
+    def initialize_table(self):
+        """
+        Creates the siren tables if they do not exist.
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sirens (
+                siren_id TEXT PRIMARY KEY,
+                zone TEXT NOT NULL,
+                transport TEXT NOT NULL DEFAULT 'local',
+                lat REAL,
+                lon REAL
+            )
+        """
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(sirens)")}
+        for column in ("lat", "lon"):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE sirens ADD COLUMN {column} REAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS siren_areas (
+                siren_id TEXT NOT NULL,
+                code TEXT NOT NULL,
+                PRIMARY KEY (siren_id, code)
+            )
+        """
+        )
+        conn.commit()
+        conn.close()
+
+    def load(self):
+        conn = sqlite3.connect(self.db_path)
+        for siren_id, zone, transport, lat, lon in conn.execute(
+            "SELECT siren_id, zone, transport, lat, lon FROM sirens"
+        ):
+            self.sirens[siren_id] = (zone, transport, lat, lon)
+            self.zones[zone].add(siren_id)
+        for siren_id, code in conn.execute("SELECT siren_id, code FROM siren_areas"):
+            self.areas[siren_id].add(code)
+            self.index.add_location(siren_id, code)
+        conn.close()
+        self.precompute({code for codes in self.areas.values() for code in codes})
+        logging.info(f"Loaded {len(self.sirens)} sirens")
+
+    def precompute(self, codes):
+        """
+        Recomputes the resolved sirens of the location codes affected by a
+        change to `codes`: a county's codes when one of its parts changes,
+        and every county of the state when the whole state changes.
+        """
+        counties = defaultdict(set)  # state -> counties to recompute
+        for code in codes:
+            state, county = code[1:3], code[3:6]
+            if county == "000":
+                counties[state].update(
+                    covered[3:6]
+                    for siren_id in self.index.state.get(state, ())
+                    for covered in self.areas[siren_id]
+                    if covered[1:3] == state
+                )
+                counties[state].update(
+                    known[3:6] for known in self.resolved if known[1:3] == state
+                )
+            else:
+                counties[state].add(county)
+        for state, affected in counties.items():
+            self.resolve(f"0{state}000")
+            for county in affected - {"000"}:
+                for part in "0123456789":
+                    self.resolve(f"{part}{state}{county}")
+
+    def resolve(self, code):
+        sirens = frozenset(self.index.locate(code))
+        if sirens:
+            self.resolved[code] = sirens
+        else:
+            self.resolved.pop(code, None)
+
+    def register(self, siren_id, zone, transport="local", lat=None, lon=None, areas=()):
+        """
+        Adds or updates a siren.
+
+        Args:
+            siren_id (str): The siren identifier.
+            zone (str): The zone the siren covers.
+            transport (str): Name of the transport that commands it.
+            lat (float, optional): Latitude of the siren.
+            lon (float, optional): Longitude of the siren.
+            areas (list): 6-digit SAME location codes the siren covers.
+
+        Raises:
+            ValueError: If a location code is not 6 digits.
+        """
+        areas = set(areas)
+        for code in areas:
+            if len(code) != 6 or not code.isdigit():
+                raise ValueError(f"Invalid SAME location code: {code}")
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sirens (siren_id, zone, transport, lat, lon) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (siren_id, zone, transport, lat, lon),
+            )
+            conn.execute("DELETE FROM siren_areas WHERE siren_id = ?", (siren_id,))
+            conn.executemany(
+                "INSERT INTO siren_areas (siren_id, code) VALUES (?, ?)",
+                [(siren_id, code) for code in areas],
+            )
+        conn.close()
+        with self.lock:
+            changed = self.forget(siren_id)
+            self.sirens[siren_id] = (zone, transport, lat, lon)
+            self.zones[zone].add(siren_id)
+            self.areas[siren_id] = areas
+            for code in areas:
+                self.index.add_location(siren_id, code)
+            self.precompute(changed | areas)
+            self.points = None
+
+    def seed(self, path):
+        """
+        Registers the sirens listed in a CSV file with siren_id, zone,
+        transport, lat, lon and areas columns. Areas are SAME location
+        codes separated by spaces; transport, coordinates and areas may be
+        empty. Listed sirens are replaced and others are kept, so the file
+        can be applied at every start.
+
+        Args:
+            path (str): Path to the CSV file.
+
+        Raises:
+            ValueError: If a row has no id or zone, or invalid coordinates
+                or location codes.
+        """
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            rows = list(csv.DictReader(f))
+        for line_number, row in enumerate(rows, 2):
+            siren_id = (row.get("siren_id") or "").strip()
+            zone = (row.get("zone") or "").strip()
+            if not siren_id or not zone:
+                raise ValueError(
+                    f"{path}:{line_number}: siren_id and zone are required"
+                )
+            lat, lon = (row.get("lat") or "").strip(), (row.get("lon") or "").strip()
+            self.register(
+                siren_id,
+                zone,
+                transport=(row.get("transport") or "").strip() or "local",
+                lat=float(lat) if lat else None,
+                lon=float(lon) if lon else None,
+                areas=(row.get("areas") or "").split(),
+            )
+        logging.info(f"Seeded {len(rows)} sirens from {path}")
+
+    def remove(self, siren_id):
+        """
+        Removes a siren from the registry.
+
+        Args:
+            siren_id (str): The siren identifier.
+        """
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.execute("DELETE FROM sirens WHERE siren_id = ?", (siren_id,))
+            conn.execute("DELETE FROM siren_areas WHERE siren_id = ?", (siren_id,))
+        conn.close()
+        with self.lock:
+            self.precompute(self.forget(siren_id))
+            self.points = None
+
+    def forget(self, siren_id):
+        """
+        Drops a siren from the in-memory indexes.
+
+        Returns:
+            set: The location codes the siren covered.
+        """
+        if siren_id in self.sirens:
+            self.zones[self.sirens.pop(siren_id)[0]].discard(siren_id)
+        codes = self.areas.pop(siren_id, set())
+        for code in codes:
+            self.index.remove_location(siren_id, code)
+        return codes
+
+    def for_locations(self, codes):
+        """
+        Finds the sirens covering any of an alert's SAME location codes;
+        000000 covers the whole country.
+
+        Args:
+            codes (list): 6-digit SAME location codes.
+
+        Returns:
+            set: The siren ids.
+        """
+        found = set()
+        for code in codes:
+            if code[3:6] == "000":
+                code = f"0{code[1:]}"  # every part of a whole state is the state
+            if code == "000000":
+                return set(self.sirens)
+            sirens = self.resolved.get(code)
+            if sirens is None and code[1:3] in self.index.whole_state:
+                sirens = self.index.locate(code)  # county with no sirens of its own
+            found.update(sirens or ())
+        return found
+
+    def in_polygon(self, polygon, codes=None):
+        """
+        Finds the sirens whose coordinates fall inside a polygon. Sirens
+        registered without coordinates are matched by location code instead.
+
+        Args:
+            polygon (list): (lat, lon) vertices of the alert polygon.
+            codes (list, optional): The alert's SAME location codes.
+
+        Returns:
+            set: The siren ids.
+        """
+        unlocated = {
+            siren_id
+            for siren_id in self.for_locations(codes or ())
+            if self.sirens[siren_id][2] is None
+        }
+        with self.lock:
+            if self.points is None:
+                located = [
+                    (s, v[2], v[3]) for s, v in self.sirens.items() if v[2] is not None
+                ]
+                self.points = PointIndex(
+                    [s for s, _, _ in located],
+                    [lat for _, lat, _ in located],
+                    [lon for _, _, lon in located],
+                )
+            points = self.points
+        return set(points.query(polygon)) | unlocated
+
+    def in_zones(self, zones=None):
+        """
+        Finds the sirens covering any of the zones.
+
+        Args:
+            zones (list, optional): Zone names. Defaults to every siren.
+
+        Returns:
+            list: (siren_id, transport) tuples.
+        """
+        if zones is None:
+            return self.transports(self.sirens)
+        return self.transports({s for zone in zones for s in self.zones.get(zone, ())})
+
+    def transports(self, siren_ids):
+        """
+        Returns:
+            list: (siren_id, transport) tuples for the known siren ids.
+        """
+        sirens = self.sirens
+        return [
+            (siren_id, sirens[siren_id][1])
+            for siren_id in sorted(siren_ids)
+            if siren_id in sirens
+        ]
+
+
+class SirenDispatcher:
+    def __init__(
+        self, registry, transports, workers=SIREN_WORKERS, timeout=SIREN_ACK_TIMEOUT
+    ):
+        """
+        Activates every siren in the affected zones at once: one group
+        command per transport that supports it, otherwise one concurrent
+        command per siren.
+
+        Args:
+            registry (SirenRegistry): The siren registry.
+            transports (dict): Transport name to transport object. Transports
+                provide activate(siren_id, duration) or, with supports_groups
+                set, activate_group(siren_ids, duration) returning each
+                siren's acknowledgement latency.
+            workers (int): Concurrent per-siren commands.
+            timeout (float): Seconds to wait for acknowledgements.
+        """
+        self.registry = registry
+        self.transports = transports
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="siren"
+        )
+
+    def activate_one(self, transport, siren_id, duration):
+        started = time.monotonic()
+        transport.activate(siren_id, duration)
+        return {siren_id: time.monotonic() - started}
+
+    def activate(self, zones=None, duration=SIREN_DURATION):
+        """
+        Sounds the sirens of the given zones and collects acknowledgements.
+
+        Args:
+            zones (list, optional): Zones to activate. Defaults to every siren.
+            duration (int): Seconds the sirens sound.
+
+        Returns:
+            dict: See activate_sirens.
+        """
+        return self.activate_sirens(self.registry.in_zones(zones), duration)
+
+    def activate_sirens(self, sirens, duration=SIREN_DURATION):
+        """
+        Sounds the given sirens and collects acknowledgements.
+
+        Args:
+            sirens (list): (siren_id, transport) tuples.
+            duration (int): Seconds the sirens sound.
+
+        Returns:
+            dict: Per-siren acknowledgement and latency, plus the time until
+            every acknowledged siren was sounding.
+        """
+        by_transport = {}
+        for siren_id, transport in sirens:
+            by_transport.setdefault(transport, []).append(siren_id)
+
+        started = time.monotonic()
+        futures = {}
+        results = {}
+        for name, siren_ids in by_transport.items():
+            transport = self.transports.get(name)
+            if transport is None:
+                for siren_id in siren_ids:
+                    results[siren_id] = {
+                        "acked": False,
+                        "error": f"no {name} transport",
+                    }
+            elif transport.supports_groups:
+                future = self.executor.submit(
+                    transport.activate_group, siren_ids, duration
+                )
+                futures[future] = siren_ids
+            else:
+                for siren_id in siren_ids:
+                    future = self.executor.submit(
+                        self.activate_one, transport, siren_id, duration
+                    )
+                    futures[future] = [siren_id]
+
+        done, pending = wait(futures, timeout=self.timeout)
+        for future in pending:
+            future.cancel()
+            for siren_id in futures[future]:
+                results[siren_id] = {"acked": False, "error": "timeout"}
+        for future in done:
+            siren_ids = futures[future]
+            error = future.exception()
+            if error is not None:
+                for siren_id in siren_ids:
+                    results[siren_id] = {"acked": False, "error": str(error)}
+            else:
+                # Latency per siren, missing or None if it never acknowledged
+                latencies = future.result()
+                for siren_id in siren_ids:
+                    latency = latencies.get(siren_id)
+                    results[siren_id] = (
+                        {"acked": True, "latency": latency}
+                        if latency is not None
+                        else {"acked": False, "error": "no acknowledgement"}
+                    )
+
+        acked = [r["latency"] for r in results.values() if r["acked"]]
+        report = {
+            "sirens": results,
+            "acked": len(acked),
+            "total": len(results),
+            "all_sounding": max(acked) if acked else None,
+            "elapsed": time.monotonic() - started,
+        }
+        logging.info(
+            f"Sirens: {report['acked']}/{report['total']} acknowledged, "
+            f"all sounding after {report['all_sounding']}s"
+        )
+        return report
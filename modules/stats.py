@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+
+# Dashboard Settings
+STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", 5))  # seconds
+
+STATS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS stats (
+        name TEXT PRIMARY KEY,
+        value
+    );
+    INSERT OR IGNORE INTO stats (name, value)
+        VALUES ('logs_count', (SELECT COUNT(*) FROM logs));
+    INSERT OR IGNORE INTO stats (name, value)
+        VALUES ('logs_first', (SELECT MIN(timestamp) FROM logs));
+    INSERT OR IGNORE INTO stats (name, value)
+        VALUES ('users_count', (SELECT COUNT(*) FROM users));
+    CREATE TRIGGER IF NOT EXISTS logs_stats_insert AFTER INSERT ON logs BEGIN
+        UPDATE stats SET value = value + 1 WHERE name = 'logs_count';
+        UPDATE stats SET value = new.timestamp
+            WHERE name = 'logs_first' AND (value IS NULL OR new.timestamp < value);
+    END;
+    CREATE TRIGGER IF NOT EXISTS logs_stats_delete AFTER DELETE ON logs BEGIN
+        UPDATE stats SET value = value - 1 WHERE name = 'logs_count';
+        UPDATE stats SET value = (SELECT MIN(timestamp) FROM logs)
+            WHERE name = 'logs_first' AND old.timestamp <= value;
+    END;
+    CREATE TRIGGER IF NOT EXISTS users_stats_insert AFTER INSERT ON users BEGIN
+        UPDATE stats SET value = value + 1 WHERE name = 'users_count';
+    END;
+    CREATE TRIGGER IF NOT EXISTS users_stats_delete AFTER DELETE ON users BEGIN
+        UPDATE stats SET value = value - 1 WHERE name = 'users_count';
+    END;
+"""
+
+
+def initialize_stats(conn):
+    """
+    Creates the stats table and the triggers that keep it current. The
+    counters are seeded from the existing rows once, in the same
+    transaction that creates the triggers.
+
+    Args:
+        conn (sqlite3.Connection): Connection to a database that already
+            has the logs and users tables.
+    """
+    conn.executescript(f"BEGIN; {STATS_SCHEMA} COMMIT;")
+
+
+class StatsCache:
+    def __init__(self, ttl=STATS_CACHE_TTL):
+        """
+        Serves the dashboard counters from memory, re-reading the stats
+        table at most once per `ttl` seconds. Each read is a primary key
+        lookup, so the cost does not grow with the log.
+
+        Args:
+            ttl (float): Seconds a read stays fresh.
+        """
+        self.ttl = ttl
+        self.values = None
+        self.expires = 0.0
+        self.lock = threading.Lock()
+
+    def get(self, conn):
+        """
+        Returns the counters, reading them through `conn` when stale.
+
+        Args:
+            conn (sqlite3.Connection): A database connection.
+
+        Returns:
+            dict: logs_count, logs_first and users_count.
+        """
+        now = time.monotonic()
+        with self.lock:
+            if self.values is not None and now < self.expires:
+                return self.values
+        values = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+        with self.lock:
+            self.values, self.expires = values, now + self.ttl
+        return values
+
+    def invalidate(self):
+        with self.lock:
+            self.values = None
@@ -0,0 +1,245 @@
+import csv
+import logging
+import sqlite3
+import threading
+from collections import defaultdict
+
+# Subscribers with no event subscriptions receive every event
+ALL_EVENTS = "*"
+
+
+class SubscriptionIndex:
+    def __init__(self):
+        self.exact = defaultdict(set)  # PSSCCC -> recipients
+        self.county = defaultdict(set)  # SSCCC -> recipients in any part of it
+        self.whole_county = defaultdict(set)  # SSCCC -> recipients of 0SSCCC
+        self.state = defaultdict(set)  # SS -> recipients anywhere in the state
+        self.whole_state = defaultdict(set)  # SS -> recipients of 0SS000
+        self.events = defaultdict(set)  # event code -> recipients
+        self.all_events = set()
+        self.everyone = set()  # recipients with any location, for 000000
+
+    def add_location(self, recipient, code):
+        part, state, county = code[0], code[1:3], code[3:6]
+        self.everyone.add(recipient)
+        self.state[state].add(recipient)
+        if county == "000":
+            self.whole_state[state].add(recipient)
+            return
+        self.exact[code].add(recipient)
+        self.county[state + county].add(recipient)
+        if part == "0":
+            self.whole_county[state + county].add(recipient)
+
+    def remove_location(self, recipient, code):
+        # Only used when every location of the recipient is being removed
+        state, county = code[1:3], code[3:6]
+        self.everyone.discard(recipient)
+        self.state[state].discard(recipient)
+        self.whole_state[state].discard(recipient)
+        self.exact[code].discard(recipient)
+        self.county[state + county].discard(recipient)
+        self.whole_county[state + county].discard(recipient)
+
+    def add_event(self, recipient, event):
+        if event == ALL_EVENTS:
+            self.all_events.add(recipient)
+        else:
+            self.events[event].add(recipient)
+
+    def remove_event(self, recipient, event):
+        self.all_events.discard(recipient)
+        self.events[event].discard(recipient)
+
+    def locate(self, code):
+        """
+        Finds recipients whose areas overlap one SAME location code;
+        000000 covers the whole country.
+        """
+        part, state, county = code[0], code[1:3], code[3:6]
+        if code == "000000":
+            return set(self.everyone)
+        if county == "000":
+            return set(self.state.get(state, ()))
+        if part == "0":
+            matches = [self.county.get(state + county, ())]
+        else:
+            matches = [
+                self.exact.get(code, ()),
+                self.whole_county.get(state + county, ()),
+            ]
+        matches.append(self.whole_state.get(state, ()))
+        return set().union(*matches)
+
+
+class SubscriptionStore:
+    def __init__(self, db_path="database.db"):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.initialize_table()
+        self.index = self.compile()
+
+    def initialize_table(self):
+        """
+        Creates the subscriptions table if it does not exist.
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS subscriptions (
+                recipient TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (recipient, kind, value)
+            )
+        """
+        )
+        conn.commit()
+        conn.close()
+
+    def compile(self):
+        """
+        Builds the inverted indexes from the persisted subscriptions.
+
+        Returns:
+            SubscriptionIndex: The compiled index.
+        """
+        index = SubscriptionIndex()
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("SELECT recipient, kind, value FROM subscriptions")
+        evented = set()
+        recipients = set()
+        for recipient, kind, value in rows:
+            recipients.add(recipient)
+            if kind == "location":
+                index.add_location(recipient, value)
+            else:
+                index.add_event(recipient, value)
+                evented.add(recipient)
+        conn.close()
+        index.all_events.update(recipients - evented)
+        logging.info(f"Compiled subscriptions for {len(recipients)} recipients")
+        return index
+
+    def subscribe(self, recipient, locations=(), events=()):
+        """
+        Subscribes a recipient to FIPS location codes and event codes.
+
+        Args:
+            recipient (str): The recipient's contact detail.
+            locations (list): SAME location codes (PSSCCC).
+            events (list, optional): Event codes. Empty means every event.
+        """
+        self.subscribe_many([(recipient, locations, events)])
+
+    def subscribe_many(self, subscriptions):
+        """
+        Adds many subscriptions in a single transaction.
+
+        Args:
+            subscriptions (list): (recipient, locations, events) tuples.
+        """
+        subscriptions = list(subscriptions)
+        rows = []
+        for recipient, locations, events in subscriptions:
+            for code in locations:
+                if len(code) != 6 or not code.isdigit():
+                    raise ValueError(f"Invalid SAME location code: {code}")
+                rows.append((recipient, "location", code))
+            rows.extend((recipient, "event", event.upper()) for event in events)
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO subscriptions (recipient, kind, value) "
+                "VALUES (?, ?, ?)",
+                rows,
+            )
+        conn.close()
+        with self.lock:
+            for recipient, kind, value in rows:
+                if kind == "location":
+                    self.index.add_location(recipient, value)
+                else:
+                    self.index.all_events.discard(recipient)
+                    self.index.add_event(recipient, value)
+            for recipient, _, events in subscriptions:
+                if not events and not self.has_events(recipient):
+                    self.index.all_events.add(recipient)
+
+    def seed(self, path):
+        """
+        Adds the subscriptions listed in a CSV file with recipient,
+        locations and events columns. Codes within a column are separated
+        by spaces; an empty events column means every event. Existing
+        subscriptions are kept, so the file can be applied at every start.
+
+        Args:
+            path (str): Path to the CSV file.
+
+        Raises:
+            ValueError: If a location code is invalid.
+        """
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            subscriptions = [
+                (
+                    row["recipient"].strip(),
+                    (row.get("locations") or "").split(),
+                    (row.get("events") or "").split(),
+                )
+                for row in csv.DictReader(f)
+                if (row.get("recipient") or "").strip()
+            ]
+        self.subscribe_many(subscriptions)
+        logging.info(f"Seeded subscriptions for {len(subscriptions)} recipients")
+
+    def unsubscribe(self, recipient):
+        """
+        Removes every subscription of a recipient.
+
+        Args:
+            recipient (str): The recipient's contact detail.
+        """
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            rows = conn.execute(
+                "SELECT kind, value FROM subscriptions WHERE recipient = ?",
+                [recipient],
+            ).fetchall()
+            conn.execute("DELETE FROM subscriptions WHERE recipient = ?", [recipient])
+        conn.close()
+        with self.lock:
+            for kind, value in rows:
+                if kind == "location":
+                    self.index.remove_location(recipient, value)
+                else:
+                    self.index.remove_event(recipient, value)
+            self.index.all_events.discard(recipient)
+
+    def has_events(self, recipient):
+        return any(recipient in members for members in self.index.events.values())
+
+    def match(self, locations, event=None):
+        """
+        Finds recipients subscribed to any of the locations and the event.
+        Cost is proportional to the matches, not to the subscriber count.
+
+        Args:
+            locations (list): SAME location codes from the alert header.
+            event (str, optional): The SAME event code.
+
+        Returns:
+            list: The matching recipients.
+        """
+        with self.lock:
+            index = self.index
+            matches = set()
+            for code in locations:
+                matches |= index.locate(code)
+            if event is None:
+                return list(matches)
+            event_members = index.events.get(event.upper(), ())
+            return [
+                recipient
+                for recipient in matches
+                if recipient in index.all_events or recipient in event_members
+            ]
@@ -0,0 +1,177 @@
+import os
+import csv
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash
+from modules.export import FORMATS, encode_rows
+
+# User Import Settings
+USER_IMPORT_WORKERS = int(os.getenv("USER_IMPORT_WORKERS", 4))  # hashing threads
+USER_IMPORT_CHUNK = 256  # rows validated and hashed together
+USER_IMPORT_MAX_ERRORS = 1000  # row errors reported back
+VALID_ROLES = {"user", "admin"}
+
+
+def read_rows(stream, fmt):
+    """
+    Parses an upload one row at a time.
+
+    Args:
+        stream: Binary file-like object with the upload.
+        fmt (str): "csv" (with a header row) or "ndjson".
+
+    Yields:
+        tuple: The line number and the row as a dict, or the parse error.
+
+    Raises:
+        ValueError: If the format is not supported, or the upload is not
+            UTF-8 or not parseable as CSV. Nothing is imported then.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    line_number = 0
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            for row in reader:
+                line_number = reader.line_num
+                yield line_number, row
+            return
+        for line_number, line in enumerate(text, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, e
+                continue
+            yield line_number, row if isinstance(row, dict) else ValueError(
+                "Expected a JSON object"
+            )
+    except UnicodeDecodeError:
+        raise ValueError("Upload is not valid UTF-8") from None
+    except csv.Error as e:
+        raise ValueError(f"Malformed CSV after line {line_number}: {e}") from None
+
+
+def validate(row):
+    """
+    Returns:
+        str: Why the row cannot be imported, or None if it can.
+    """
+    if isinstance(row, Exception):
+        return f"Malformed row: {row}"
+    username, password, role = (
+        row.get("username"),
+        row.get("password"),
+        row.get("role") or "user",
+    )
+    if not isinstance(username, str) or not username.strip():
+        return "Missing username"
+    if not isinstance(password, str) or not password:
+        return "Missing password"
+    if not isinstance(role, str) or role not in VALID_ROLES:
+        return f"Unknown role: {role}"
+    return None
+
+
+def import_users(conn, rows, workers=USER_IMPORT_WORKERS, hasher=None):
+    """
+    Adds users from parsed upload rows. Rows are validated and their
+    passwords hashed a chunk at a time on a thread pool, since each hash
+    is deliberately slow; every valid row is then inserted with one
+    executemany in a single short transaction, so the database is never
+    locked while hashing.
+
+    Args:
+        conn (sqlite3.Connection): A database connection.
+        rows (iterable): (line number, row) pairs from read_rows().
+        workers (int): Password hashing threads.
+        hasher (callable, optional): Password hash function. Defaults to
+            werkzeug's generate_password_hash.
+
+    Returns:
+        dict: The number of users imported and per-row errors with their
+        line numbers.
+
+    Raises:
+        ValueError: If the upload cannot be read. Nothing is imported then.
+    """
+    hasher = hasher or generate_password_hash
+    existing = {username for username, in conn.execute("SELECT username FROM users")}
+    seen = set()
+    accepted = []
+    lines = []  # line number of each accepted row
+    errors = []
+
+    def reject(line_number, username, error):
+        if len(errors) < USER_IMPORT_MAX_ERRORS:
+            errors.append({"line": line_number, "username": username, "error": error})
+
+    def hash_chunk(executor, chunk):
+        hashes = executor.map(hasher, [row["password"] for _, row in chunk])
+        for (line_number, row), password in zip(chunk, hashes):
+            accepted.append(
+                (row["username"].strip(), password, row.get("role") or "user")
+            )
+            lines.append(line_number)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        chunk = []
+        for line_number, row in rows:
+            error = validate(row)
+            username = None if isinstance(row, Exception) else row.get("username")
+            if error is None:
+                username = username.strip()
+                if username in existing:
+                    error = "User already exists"
+                elif username in seen:
+                    error = "Duplicate username in upload"
+            if error:
+                reject(line_number, username, error)
+                continue
+            seen.add(username)
+            chunk.append((line_number, row))
+            if len(chunk) == USER_IMPORT_CHUNK:
+                hash_chunk(executor, chunk)
+                chunk = []
+        hash_chunk(executor, chunk)
+
+    with conn:
+        imported = conn.executemany(
+            "INSERT OR IGNORE INTO users (username, password, role) VALUES (?, ?, ?)",
+            accepted,
+        ).rowcount
+        if imported < len(accepted):
+            # Users created by someone else since the snapshot keep their
+            # password; each hash is salted, so a kept row has another hash
+            for line_number, (username, password, _) in zip(lines, accepted):
+                stored = conn.execute(
+                    "SELECT password FROM users WHERE username = ?", (username,)
+                ).fetchone()
+                if stored[0] != password:
+                    reject(line_number, username, "User already exists")
+            errors.sort(key=lambda error: error["line"])
+    return {"imported": imported, "errors": errors}
+
+
+def export_users(conn, fmt):
+    """
+    Streams every user's name and role; password hashes are never exported.
+
+    Args:
+        conn (sqlite3.Connection): A database connection.
+        fmt (str): "csv" or "ndjson".
+
+    Yields:
+        str: Chunks of the export.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    cursor = conn.execute("SELECT username, role FROM users ORDER BY username")
+    yield from encode_rows(cursor, ("username", "role"), fmt)
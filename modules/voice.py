@@ -0,0 +1,245 @@
+import os
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from xml.sax.saxutils import escape, quoteattr
+
+# Voice Settings
+VOICE_SLOTS = int(os.getenv("VOICE_SLOTS", 4))  # concurrent outbound calls
+VOICE_CALL_TIMEOUT = float(os.getenv("VOICE_CALL_TIMEOUT", 120))  # seconds
+VOICE_POLL_INTERVAL = float(os.getenv("VOICE_POLL_INTERVAL", 2))  # seconds
+VOICE_LOOPS = int(os.getenv("VOICE_LOOPS", 2))  # times the message is read out
+VOICE_CONTENT_DIR = os.getenv("VOICE_CONTENT_DIR", "static/voice")
+VOICE_BASE_URL = os.getenv("VOICE_BASE_URL")  # public URL of VOICE_CONTENT_DIR
+VOICE_CACHE_SIZE = 64
+
+# Call statuses after which the line is free again
+TERMINAL_CALL_STATUSES = {"completed", "busy", "no-answer", "failed", "canceled"}
+
+
+def render_twiml(text, audio_url=None, loops=VOICE_LOOPS):
+    """
+    Builds the TwiML document read out on every call for an alert.
+
+    Args:
+        text (str): The announcement.
+        audio_url (str, optional): Pre-recorded audio played instead of speech.
+        loops (int): Times the announcement is repeated.
+
+    Returns:
+        str: The TwiML document.
+    """
+    if audio_url:
+        body = f"<Play loop={quoteattr(str(loops))}>{escape(audio_url)}</Play>"
+    else:
+        body = f'<Say voice="alice" loop={quoteattr(str(loops))}>{escape(text)}</Say>'
+    return f'<?xml version="1.0" encoding="UTF-8"?><Response>{body}</Response>'
+
+
+class VoiceContentCache:
+    def __init__(
+        self,
+        directory=VOICE_CONTENT_DIR,
+        base_url=VOICE_BASE_URL,
+        size=VOICE_CACHE_SIZE,
+        keep=VOICE_CALL_TIMEOUT,
+    ):
+        """
+        Renders each alert's TwiML once and reuses it for every call. When
+        a public base URL is configured the document is also written under
+        `directory` so Twilio fetches a static file. Files of alerts that
+        have left the cache are deleted once no call can still fetch them.
+
+        Args:
+            directory (str): Where rendered documents are written.
+            base_url (str, optional): Public URL that serves `directory`.
+            size (int): Alerts whose documents are kept.
+            keep (float): Seconds a published file is kept after its alert
+                leaves the cache.
+        """
+        self.directory = directory
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.size = size
+        self.keep = keep
+        self.documents = OrderedDict()  # alert id -> (twiml, url)
+        self.counters = Counter()
+        self.lock = threading.Lock()
+        if self.base_url:
+            self.prune()
+
+    def get(self, alert_id, text, audio_url=None):
+        """
+        Returns the alert's TwiML, rendering it on first use.
+
+        Args:
+            alert_id (int): The alert id.
+            text (str): The announcement.
+            audio_url (str, optional): Pre-recorded audio for the alert.
+
+        Returns:
+            tuple: The TwiML document and its URL, or None without a base URL.
+        """
+        with self.lock:
+            if alert_id in self.documents:
+                self.documents.move_to_end(alert_id)
+                self.counters["hits"] += 1
+                return self.documents[alert_id]
+            self.counters["misses"] += 1
+            twiml = render_twiml(text, audio_url)
+            url = self.publish(alert_id, twiml) if self.base_url else None
+            self.documents[alert_id] = (twiml, url)
+            if len(self.documents) > self.size:
+                self.documents.popitem(last=False)
+                if self.base_url:
+                    self.prune()
+            return twiml, url
+
+    def publish(self, alert_id, twiml):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"alert-{alert_id}.xml")
+        with open(f"{path}.tmp", "w") as f:
+            f.write(twiml)
+        os.replace(f"{path}.tmp", path)  # calls never see a partial document
+        return f"{self.base_url}/alert-{alert_id}.xml"
+
+    def prune(self):
+        """
+        Deletes published documents of alerts no longer cached, including
+        those left by earlier runs, once they are older than `keep`.
+        """
+        if not os.path.isdir(self.directory):
+            return
+        cached = {f"alert-{alert_id}.xml" for alert_id in self.documents}
+        cutoff = time.time() - self.keep
+        for name in os.listdir(self.directory):
+            if not name.startswith("alert-") or name in cached:
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    self.counters["pruned"] += 1
+            except OSError as e:
+                logging.warning(f"Could not remove {path}: {e}")
+
+
+class VoiceDispatcher:
+    def __init__(
+        self,
+        client,
+        from_number,
+        slots=VOICE_SLOTS,
+        cache=None,
+        status_callback=None,
+        ledger=None,
+        call_timeout=VOICE_CALL_TIMEOUT,
+        poll_interval=VOICE_POLL_INTERVAL,
+    ):
+        """
+        Places outbound calls, holding one of `slots` lines for the whole
+        call so the account's concurrent call limit is never exceeded.
+
+        Args:
+            client: A Twilio REST client.
+            from_number (str): The caller id.
+            slots (int): Maximum concurrent calls.
+            cache (VoiceContentCache, optional): Shared rendered content.
+            status_callback (str, optional): Webhook for call status updates.
+            ledger (DeliveryLedger, optional): Where the webhook records
+                those updates. When given with `status_callback`, call status
+                is read from it instead of polling the calls API.
+            call_timeout (float): Seconds before a slot is reclaimed.
+            poll_interval (float): Seconds between call status checks.
+        """
+        self.client = client
+        self.from_number = from_number
+        self.slots = threading.BoundedSemaphore(slots)
+        self.cache = cache or VoiceContentCache()
+        self.status_callback = status_callback
+        self.ledger = ledger if status_callback else None
+        self.call_timeout = call_timeout
+        self.poll_interval = poll_interval
+        self.latencies = deque(maxlen=1000)
+        self.counters = Counter()
+        self.active = 0
+        self.started = None
+        self.lock = threading.Lock()
+
+    def call(self, recipient, alert_id, text, audio_url=None):
+        """
+        Calls a recipient and waits for the call to end.
+
+        Args:
+            recipient (str): The phone number to call.
+            alert_id (int): The alert, used to share its rendered content.
+            text (str): The announcement.
+            audio_url (str, optional): Pre-recorded audio for the alert.
+
+        Returns:
+            tuple: The call sid and its final status.
+        """
+        twiml, url = self.cache.get(alert_id, text, audio_url)
+        params = {"to": recipient, "from_": self.from_number}
+        params.update({"url": url} if url else {"twiml": twiml})
+        if self.status_callback:
+            params["status_callback"] = self.status_callback
+            params["status_callback_event"] = ["completed"]
+
+        with self.slots:
+            started = time.monotonic()
+            with self.lock:
+                self.active += 1
+                self.started = self.started or started
+            try:
+                call = self.client.calls.create(**params)
+                self.counters["placed"] += 1
+                status = self.wait(call.sid, call.status)
+            except Exception:
+                self.counters["failed"] += 1
+                raise
+            finally:
+                with self.lock:
+                    self.active -= 1
+        self.latencies.append(time.monotonic() - started)
+        self.counters["completed" if status == "completed" else "failed"] += 1
+        logging.info(f"Call {call.sid} to {recipient} ended: {status}")
+        return call.sid, status
+
+    def wait(self, sid, status):
+        """
+        Holds the slot until the call ends or the call timeout passes. The
+        call's status is read from the delivery ledger, where the status
+        webhook records it, or else polled from the calls API.
+        """
+        deadline = time.monotonic() + self.call_timeout
+        while status not in TERMINAL_CALL_STATUSES:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return "timeout"
+            time.sleep(min(self.poll_interval, remaining))
+            if self.ledger is not None:
+                status = self.ledger.status(sid) or status
+            else:
+                status = self.client.calls(sid).fetch().status
+        return status
+
+    def stats(self):
+        """
+        Returns:
+            dict: Call counts, active calls, throughput in calls per minute
+            and completion latency percentiles in seconds.
+        """
+        latencies = sorted(self.latencies)
+        elapsed = time.monotonic() - self.started if self.started else 0
+        done = self.counters["completed"] + self.counters["failed"]
+        return {
+            **self.counters,
+            "active": self.active,
+            "calls_per_minute": round(60 * done / elapsed, 1) if elapsed else 0.0,
+            "latency_p50": latencies[len(latencies) // 2] if latencies else None,
+            "latency_p95": (
+                latencies[int(len(latencies) * 0.95)] if latencies else None
+            ),
+            "content_cache": dict(self.cache.counters),
+        }
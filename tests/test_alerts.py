@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from modules.alerts import AlertSystem
+from modules.geofence import RecipientGeofence
+from modules.subscriptions import SubscriptionStore
+from utils.eas_utils import parse_header
+
+HEADER = 'ZCZC-WXR-TOR-048113-048027+0030-1231500-KFWD/NWS-'
+
+
+class TestAlertTargeting(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.system = AlertSystem.__new__(AlertSystem)
+        self.system.subscriptions = SubscriptionStore(
+            os.path.join(self.tmp.name, 'test.db')
+        )
+        self.system.geofence = RecipientGeofence(
+            os.path.join(self.tmp.name, 'test.db')
+        )
+        self.env = mock.patch.dict(
+            os.environ, {'ALERT_RECIPIENTS': '+15550001,+15550002'}
+        )
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def recipients(self):
+        header = parse_header(HEADER)
+        return sorted(
+            self.system.get_recipients(header['locations'], header['event'])
+        )
+
+    def test_header_alert_with_empty_store_reaches_alert_recipients(self):
+        self.assertEqual(self.recipients(), ['+15550001', '+15550002'])
+
+    def test_national_alert_reaches_every_subscriber(self):
+        self.system.subscriptions.subscribe('+15550003', ['048113'], ['TOR'])
+        self.system.subscriptions.subscribe('+15550004', ['006000'])
+        self.assertEqual(
+            sorted(self.system.get_recipients(['000000'], 'EAN')), ['+15550004']
+        )
+        self.assertEqual(
+            sorted(self.system.get_recipients(['000000'])), ['+15550003', '+15550004']
+        )
+
+    def test_header_alert_targets_matching_subscribers(self):
+        self.system.subscriptions.subscribe('+15550003', ['048113'], ['TOR'])
+        self.assertEqual(self.recipients(), ['+15550003'])
+        self.system.subscriptions.unsubscribe('+15550003')
+        self.system.subscriptions.subscribe('+15550004', ['006001'])
+        self.assertEqual(self.recipients(), ['+15550001', '+15550002'])
+
+    def test_polygon_without_located_recipients_falls_back_to_area(self):
+        square = [(39.0, -94.7), (39.2, -94.7), (39.2, -94.5), (39.0, -94.5)]
+        self.system.subscriptions.subscribe('+15550003', ['048113'], ['TOR'])
+        self.assertEqual(
+            self.system.get_recipients(['048113'], 'TOR', polygon=square),
+            ['+15550003'],
+        )
+        self.assertEqual(
+            sorted(self.system.get_recipients(['006001'], 'TOR', polygon=square)),
+            ['+15550001', '+15550002'],
+        )
+        self.system.geofence.set_locations([('+15550005', 39.10, -94.58)])
+        self.assertEqual(
+            self.system.get_recipients(['048113'], 'TOR', polygon=square),
+            ['+15550005'],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
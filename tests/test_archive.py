@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date
+from modules.archive import LogArchiver, cutoff_month, month_bounds
+from modules.log_search import initialize_log_search, search_logs
+from modules.stats import initialize_stats
+
+
+class TestLogArchiver(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'test.db')
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('CREATE TABLE users (username TEXT PRIMARY KEY)')
+        conn.execute(
+            'CREATE TABLE logs (id INTEGER PRIMARY KEY, event TEXT NOT NULL, '
+            'timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)'
+        )
+        conn.execute('CREATE INDEX logs_timestamp ON logs (timestamp)')
+        conn.commit()
+        initialize_stats(conn)
+        initialize_log_search(conn)
+        rows = []
+        for month in ('2024-01', '2024-02', '2024-05'):
+            rows += [
+                (
+                    f'{month} event {n} county {n % 7}',
+                    f'{month}-{n % 28 + 1:02d} 12:00',
+                )
+                for n in range(1200)
+            ]
+        conn.executemany('INSERT INTO logs (event, timestamp) VALUES (?, ?)', rows)
+        conn.commit()
+        conn.close()
+        self.archiver = LogArchiver(
+            self.db_path, os.path.join(self.tmp.name, 'archive'), keep=3, pause=0
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def query(self, sql):
+        conn = sqlite3.connect(self.db_path)
+        value = conn.execute(sql).fetchone()[0]
+        conn.close()
+        return value
+
+    def test_month_arithmetic(self):
+        self.assertEqual(month_bounds('2024-12'), ('2024-12-01', '2025-01-01'))
+        self.assertEqual(cutoff_month(date(2024, 2, 15), keep=3), '2023-11')
+
+    def test_old_months_move_to_searchable_archives(self):
+        archived = self.archiver.archive_due(today=date(2024, 6, 10))
+        self.assertEqual(archived, ['2024-01', '2024-02'])
+        self.assertEqual(self.archiver.months(), ['2024-01', '2024-02'])
+        self.assertEqual(self.query('SELECT COUNT(*) FROM logs'), 1200)
+        self.assertEqual(
+            self.query("SELECT value FROM stats WHERE name = 'logs_count'"), 1200
+        )
+        self.assertEqual(
+            self.query("SELECT value FROM stats WHERE name = 'logs_first'"),
+            '2024-05-01 12:00',
+        )
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(search_logs(conn, '2024-01'), [])
+        conn.close()
+        conn = self.archiver.open('2024-01')
+        results = search_logs(conn, 'county 3', limit=1000)
+        conn.close()
+        self.assertEqual(len(results), len(range(3, 1200, 7)))
+        self.assertIn('<mark>county</mark> <mark>3</mark>', results[0]['event'])
+        self.assertEqual(self.archiver.archive_due(today=date(2024, 6, 10)), [])
+
+    def test_late_rows_are_folded_into_existing_archive(self):
+        self.archiver.archive_due(today=date(2024, 6, 10))
+        conn = self.archiver.open('2024-02')
+        conn.close()
+        hot = sqlite3.connect(self.db_path)
+        hot.execute(
+            "INSERT INTO logs (event, timestamp) VALUES ('late', '2024-02-03 00:00:00')"
+        )
+        hot.commit()
+        hot.close()
+        self.archiver.archive_due(today=date(2024, 6, 10))
+        conn = self.archiver.open('2024-02')
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM logs').fetchone()[0], 1201)
+        self.assertEqual(len(search_logs(conn, 'late')), 1)
+        conn.close()
+
+    def test_writers_are_not_blocked_while_archiving(self):
+        self.archiver.chunk_size = 100
+        self.archiver.pause = 0.001
+        done = threading.Event()
+        waits = []
+
+        def write():
+            conn = sqlite3.connect(self.db_path, timeout=1)
+            while not done.is_set():
+                started = time.monotonic()
+                with conn:
+                    conn.execute("INSERT INTO logs (event) VALUES ('live')")
+                waits.append(time.monotonic() - started)
+                time.sleep(0.001)
+            conn.close()
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        try:
+            self.archiver.archive_due(today=date(2024, 6, 10))
+        finally:
+            done.set()
+            writer.join()
+        self.assertEqual(self.archiver.stats()['rows'], 2400)
+        self.assertGreater(len(waits), 10)
+        self.assertLess(max(waits), 0.5)
+
+    def test_unknown_month(self):
+        with self.assertRaises(ValueError):
+            self.archiver.open('2024-13')
+        with self.assertRaises(ValueError):
+            self.archiver.open('2023-01')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from modules.audit import AuditWriter
+
+
+class TestAuditWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'test.db')
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            'CREATE TABLE logs (id INTEGER PRIMARY KEY, event TEXT NOT NULL, '
+            'timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)'
+        )
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def count(self):
+        conn = sqlite3.connect(self.db_path)
+        count = conn.execute('SELECT COUNT(*) FROM logs').fetchone()[0]
+        conn.close()
+        return count
+
+    def test_bursts_are_group_committed(self):
+        writer = AuditWriter(self.db_path, flush_interval=0.02)
+
+        def burst(n):
+            for i in range(250):
+                writer.log(f'user{n} event {i}')
+
+        threads = [threading.Thread(target=burst, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        writer.flush()
+        self.assertEqual(self.count(), 2000)
+        stats = writer.stats()
+        self.assertEqual(stats['written'], 2000)
+        self.assertLess(stats['batches'], 100)
+        self.assertGreater(stats['batch_size_avg'], 20)
+        writer.close()
+
+    def test_close_writes_everything_queued(self):
+        writer = AuditWriter(self.db_path, flush_interval=1)
+        for i in range(10):
+            writer.log(f'event {i}')
+        writer.close()
+        writer.close()
+        self.assertEqual(self.count(), 10)
+
+    def test_stop_mid_batch_never_blocks_on_the_queue(self):
+        writer = AuditWriter(self.db_path, flush_interval=1)
+        writer.close()
+        writer.queue = queue.Queue(maxsize=2)  # full: a put would block
+        writer.log('event 0')
+        writer.queue.put_nowait(None)
+        with mock.patch.object(writer.queue, 'put', side_effect=AssertionError):
+            writer.run()
+        self.assertEqual(self.count(), 1)
+        self.assertTrue(writer.queue.empty())
+
+    def test_full_queue_writes_directly(self):
+        writer = AuditWriter(self.db_path, queue_size=1, flush_interval=0.5)
+        for i in range(5):
+            writer.log(f'event {i}')
+        writer.close()
+        self.assertEqual(self.count(), 5)
+        self.assertGreater(writer.stats()['overflow'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import time
+import unittest
+from utils.cache import TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+    def setUp(self):
+        self.loads = 0
+
+    def load(self, value):
+        def load():
+            self.loads += 1
+            return value
+
+        return load
+
+    def test_read_through_and_hit_rate(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        for _ in range(9):
+            record = cache.get('admin', self.load(('admin', 'admin')))
+            self.assertEqual(record, ('admin', 'admin'))
+        self.assertIsNone(cache.get('ghost', self.load(None)))
+        self.assertIsNone(cache.get('ghost', self.load(None)))
+        self.assertEqual(self.loads, 2)
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (9, 2))
+        self.assertEqual(stats['hit_rate'], 0.818)
+
+    def test_invalidation_expiry_and_bound(self):
+        cache = TTLCache(maxsize=2, ttl=0.05)
+        cache.get('a', self.load(1))
+        cache.invalidate('a')
+        self.assertEqual(cache.get('a', self.load(2)), 2)
+        time.sleep(0.06)
+        self.assertEqual(cache.get('a', self.load(3)), 3)
+        cache.get('b', self.load(4))
+        cache.get('a', self.load(5))
+        cache.get('c', self.load(6))
+        self.assertEqual(list(cache.entries), ['a', 'c'])
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import threading
+import time
+import unittest
+from modules.coalescer import AlertCoalescer
+from modules.scheduler import PRESIDENTIAL, STATEMENT, WARNING, WATCH
+
+
+class TestAlertCoalescer(unittest.TestCase):
+    def setUp(self):
+        self.digests = []
+        self.flushed = threading.Event()
+
+        def flush(digests):
+            self.digests.extend(digests)
+            self.flushed.set()
+
+        self.coalescer = AlertCoalescer(flush, window=0.1)
+
+    def test_first_alert_sent_and_rest_merged(self):
+        self.assertTrue(self.coalescer.admit('+1555', 'sms', 'SVA 1', WATCH))
+        self.assertFalse(self.coalescer.admit('+1555', 'sms', 'SVS', STATEMENT))
+        self.assertFalse(self.coalescer.admit('+1555', 'sms', 'SVA 2', WATCH))
+        self.assertTrue(self.flushed.wait(1))
+        self.assertEqual(self.digests, [('+1555', 'sms', WATCH, ['SVA 2', 'SVS'])])
+
+    def test_more_severe_alert_sent_immediately(self):
+        self.assertTrue(self.coalescer.admit('+1555', 'sms', 'SPS', STATEMENT))
+        self.assertTrue(self.coalescer.admit('+1555', 'sms', 'SVA', WATCH))
+        self.assertTrue(self.coalescer.admit('+1555', 'sms', 'TOR', WARNING))
+        self.assertFalse(self.coalescer.admit('+1555', 'sms', 'FFA', WATCH))
+
+    def test_warnings_are_never_held(self):
+        self.assertTrue(self.coalescer.admit('+1555', 'sms', 'TOR 1', WARNING))
+        self.assertTrue(self.coalescer.admit('+1555', 'sms', 'TOR 2', WARNING))
+        self.assertTrue(self.coalescer.admit('+1555', 'sms', 'EAN 1', PRESIDENTIAL))
+        self.assertTrue(self.coalescer.admit('+1555', 'sms', 'EAN 2', PRESIDENTIAL))
+        self.assertTrue(self.coalescer.admit('+1555', 'sms', 'SVR', WARNING))
+        self.assertFalse(self.flushed.wait(0.2))
+        self.assertEqual(self.coalescer.stats().get('held', 0), 0)
+
+    def test_windows_are_per_recipient_and_channel(self):
+        self.assertTrue(self.coalescer.admit('+1555', 'sms', 'TOR', WARNING))
+        self.assertTrue(self.coalescer.admit('+1666', 'sms', 'TOR', WARNING))
+        self.assertTrue(self.coalescer.admit('+1555', 'voice', 'TOR', WARNING))
+
+    def test_storm_cuts_provider_calls(self):
+        recipients = [f'+1555{i:04d}' for i in range(1000)]
+        sent = 0
+        for n in range(12):
+            for recipient in recipients:
+                sent += self.coalescer.admit(recipient, 'sms', f'SVA {n}', WATCH)
+        self.assertEqual(sent, 1000)
+        deadline = time.monotonic() + 2
+        while len(self.digests) < 1000 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(self.digests), 1000)
+        self.assertTrue(all(len(alerts) == 11 for _, _, _, alerts in self.digests))
+        self.assertEqual(self.coalescer.stats()['sent'], 2000)
+
+
+if __name__ == '__main__':
+    unittest.main()
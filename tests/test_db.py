@@ -0,0 +1,113 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from utils.db import ConnectionPool, KeysetPage
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pool = ConnectionPool(os.path.join(self.tmp.name, 'test.db'), size=2)
+        conn = self.pool.acquire()
+        conn.execute('CREATE TABLE logs (id INTEGER PRIMARY KEY, event TEXT)')
+        conn.commit()
+        self.pool.release(conn)
+
+    def tearDown(self):
+        self.pool.close()
+        self.tmp.cleanup()
+
+    def test_connections_are_reused_with_pragmas(self):
+        for _ in range(100):
+            conn = self.pool.acquire()
+            conn.execute('SELECT COUNT(*) FROM logs').fetchone()
+            self.pool.release(conn)
+        self.assertEqual(self.pool.stats(), {'opened': 1, 'idle': 1})
+        conn = self.pool.acquire()
+        self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        self.assertEqual(conn.execute('PRAGMA synchronous').fetchone()[0], 1)
+        self.assertGreater(conn.execute('PRAGMA mmap_size').fetchone()[0], 0)
+        self.pool.release(conn)
+
+    def test_release_rolls_back_uncommitted_work(self):
+        conn = self.pool.acquire()
+        conn.execute("INSERT INTO logs (event) VALUES ('lost')")
+        self.pool.release(conn)
+        conn = self.pool.acquire()
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM logs').fetchone()[0], 0)
+        self.pool.release(conn)
+
+    def test_threads_share_a_bounded_pool(self):
+        barrier = threading.Barrier(4)
+
+        def worker():
+            conn = self.pool.acquire()
+            barrier.wait()
+            conn.execute("INSERT INTO logs (event) VALUES ('x')")
+            conn.commit()
+            self.pool.release(conn)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.pool.stats(), {'opened': 4, 'idle': 2})
+        conn = self.pool.acquire()
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM logs').fetchone()[0], 4)
+        self.pool.release(conn)
+
+
+class TestKeysetPage(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute(
+            'CREATE TABLE logs (id INTEGER PRIMARY KEY, event TEXT, timestamp DATETIME)'
+        )
+        self.conn.execute('CREATE INDEX logs_timestamp ON logs (timestamp)')
+        # Ten events share each second, so pages split runs of equal timestamps
+        self.conn.executemany(
+            'INSERT INTO logs (event, timestamp) VALUES (?, ?)',
+            [
+                (f'event {n}', f'2024-03-01 08:{n // 600:02d}:{n // 10 % 60:02d}')
+                for n in range(1000)
+            ],
+        )
+
+    def page(self, before=None, limit=64):
+        if before is None:
+            cursor = self.conn.execute(
+                'SELECT id, event, timestamp FROM logs '
+                'ORDER BY timestamp DESC, id DESC LIMIT ?',
+                (limit + 1,),
+            )
+        else:
+            cursor = self.conn.execute(
+                'SELECT id, event, timestamp FROM logs WHERE (timestamp, id) < (?, ?) '
+                'ORDER BY timestamp DESC, id DESC LIMIT ?',
+                (before[2], before[0], limit + 1),
+            )
+        return KeysetPage(cursor, limit, fetch_size=10)
+
+    def test_pages_cover_every_row_once_in_order(self):
+        seen = []
+        page = self.page()
+        while True:
+            seen.extend(page)
+            if not page.more:
+                break
+            page = self.page(page.last)
+        self.assertEqual(len(seen), 1000)
+        self.assertEqual(len({row[0] for row in seen}), 1000)
+        self.assertEqual(seen, sorted(seen, key=lambda r: (r[2], r[0]), reverse=True))
+
+    def test_last_page(self):
+        page = self.page(limit=1000)
+        self.assertEqual(len(list(page)), 1000)
+        self.assertFalse(page.more)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import queue
+import tempfile
+import unittest
+from unittest import mock
+from modules.delivery import DeliveryLedger
+
+
+class TestDeliveryLedger(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.ledger = DeliveryLedger(os.path.join(self.tmp.name, 'test.db'))
+
+    def tearDown(self):
+        self.ledger.close()
+        self.tmp.cleanup()
+
+    def test_progress(self):
+        for i in range(4):
+            self.ledger.register(f'SM{i}', 7, f'+1555000{i}', 'sms')
+        self.ledger.update('SM0', 'sent')
+        self.ledger.update('SM0', 'delivered')
+        self.ledger.update('SM1', 'delivered')
+        self.ledger.update('SM2', 'undelivered', '30003')
+        self.ledger.flush()
+        progress = self.ledger.progress(7)
+        self.assertEqual(progress['total'], 4)
+        self.assertEqual(progress['delivered_percent'], 50.0)
+        self.assertEqual(progress['failed'], 1)
+        self.assertEqual(progress['pending'], 1)
+
+    def test_out_of_order_callbacks(self):
+        self.ledger.update('SM0', 'delivered')
+        self.ledger.register('SM0', 7, '+15550000', 'sms')
+        self.ledger.update('SM0', 'sent')
+        self.ledger.flush()
+        self.assertEqual(self.ledger.progress(7)['statuses'], {'delivered': 1})
+
+    def test_batches_burst(self):
+        for i in range(2000):
+            self.ledger.register(f'SM{i}', 8, '+15550000', 'sms')
+            self.ledger.update(f'SM{i}', 'delivered')
+        self.ledger.flush()
+        self.assertEqual(self.ledger.progress(8)['delivered'], 2000)
+        self.assertLess(self.ledger.stats()['batches'], 100)
+
+    def test_full_queue_sheds_callbacks_but_not_registrations(self):
+        self.ledger.close()  # nothing drains the queue from here on
+        self.ledger.queue = queue.Queue(maxsize=1)
+        self.ledger.queue.put_nowait(None)
+        with mock.patch('modules.delivery.DELIVERY_REGISTER_WAIT', 0.01):
+            self.assertTrue(self.ledger.register('SM0', 7, '+15550000', 'sms'))
+        self.assertFalse(self.ledger.update('SM0', 'delivered'))
+        self.ledger.queue = queue.Queue()  # room for tearDown's close
+        self.assertEqual(self.ledger.status('SM0'), 'queued')
+        self.assertEqual(self.ledger.stats()['written_directly'], 1)
+        self.assertEqual(self.ledger.stats()['dropped'], 1)
+
+    def test_unknown_status(self):
+        with self.assertRaises(ValueError):
+            self.ledger.update('SM0', 'lost')
+
+
+if __name__ == '__main__':
+    unittest.main()
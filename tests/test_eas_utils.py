@@ -0,0 +1,97 @@
+import threading
+import unittest
+from utils.eas_utils import (
+    count_sms,
+    fit_sms,
+    format_message,
+    parse_header,
+    render_digest,
+    render_message,
+    sms_counters,
+)
+from utils.gsm7 import segment_count, to_gsm7
+
+
+class TestParseHeader(unittest.TestCase):
+    def test_parse_header(self):
+        header = parse_header('ZCZC-WXR-TOR-029095-029037+0030-1051700-KEAX/NWS-')
+        self.assertEqual(header['event'], 'TOR')
+        self.assertEqual(header['locations'], ['029095', '029037'])
+        self.assertEqual(header['sender'], 'KEAX/NWS')
+
+    def test_parse_header_invalid(self):
+        with self.assertRaises(ValueError):
+            parse_header('TEST-EAS-ALERT')
+
+
+class TestSmsRendering(unittest.TestCase):
+    def test_segment_count(self):
+        self.assertEqual(segment_count('a' * 160), ('GSM-7', 1))
+        self.assertEqual(segment_count('a' * 161), ('GSM-7', 2))
+        self.assertEqual(segment_count('{' * 80), ('GSM-7', 1))
+        self.assertEqual(segment_count('’' * 70), ('UCS-2', 1))
+        self.assertEqual(segment_count('’' * 71), ('UCS-2', 2))
+
+    def test_transliteration_avoids_ucs2(self):
+        self.assertEqual(to_gsm7('“Don’t drown” — go'), '"Don\'t drown" - go')
+
+    def test_text_without_gsm7_equivalent_is_sent_as_ucs2(self):
+        for text in ('Aviso de tornado: refúgiese ya', 'Предупреждение о торнадо'):
+            self.assertEqual(to_gsm7(text), text)
+            self.assertEqual(segment_count(render_message(text))[0], 'UCS-2')
+        self.assertIn('“', to_gsm7('“Evacúe” ahora'))
+
+    def test_counters_count_sent_messages_only(self):
+        sms_counters.clear()
+        sms = render_message('Aviso de tornado: refúgiese ya')
+        render_digest(['TOR-Tornado', 'SVS-Statement'])
+        self.assertEqual(sms_counters['messages'], 0)
+        count_sms(sms)
+        count_sms(sms)
+        count_sms('a' * 161)
+        self.assertEqual(sms_counters['messages'], 3)
+        self.assertEqual(sms_counters['segments'], 4)
+        self.assertEqual(sms_counters['2_segment_messages'], 1)
+        self.assertEqual(sms_counters['ucs2_messages'], 2)
+
+    def test_concurrent_counts_are_not_lost(self):
+        sms_counters.clear()
+        workers = [
+            threading.Thread(target=lambda: [count_sms('a') for _ in range(2000)])
+            for _ in range(8)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(sms_counters['messages'], 16000)
+        self.assertEqual(sms_counters['segments'], 16000)
+
+    def test_banner_is_stripped(self):
+        sms = render_message(format_message('FLOOD-Move to higher ground.'))
+        self.assertEqual(sms, 'EAS: FLOOD-Move to higher ground.')
+
+    def test_abbreviates_only_as_needed(self):
+        short = fit_sms('The National Weather Service has issued a Tornado Warning.')
+        self.assertFalse(short['abbreviated'])
+        long = fit_sms('x' * 140 + ' National Weather Service Warning until')
+        self.assertEqual(long['segments'], 1)
+        self.assertTrue(long['text'].endswith('NWS Warning until'))
+
+    def test_rendering_is_deterministic(self):
+        message = format_message('TOR-Tornado Warning for Jackson County until 5:45 PM. ' * 3)
+        self.assertEqual(render_message(message), render_message(message))
+        self.assertEqual(segment_count(message)[1], 2)
+        self.assertEqual(segment_count(render_message(message)), ('GSM-7', 1))
+
+    def test_digest_merges_alerts(self):
+        digest = render_digest(
+            [format_message('TOR-Tornado Warning'), format_message('SVS-Statement')]
+        )
+        self.assertTrue(digest.startswith('EAS: 2 alerts: TOR-Tornado Warning'))
+        self.assertIn(' / SVS-Statement', digest)
+        self.assertEqual(render_digest(['TOR-Tornado']), render_message('TOR-Tornado'))
+
+
+if __name__ == '__main__':
+    unittest.main()
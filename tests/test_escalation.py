@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from modules.escalation import EscalationEngine, acknowledge, parse_tiers
+from utils.timer_wheel import HierarchicalTimerWheel
+
+
+class TestHierarchicalTimerWheel(unittest.TestCase):
+    def test_far_timers_cascade_to_exact_tick(self):
+        wheel = HierarchicalTimerWheel(tick=1, slots=8, levels=2, now=0)
+        for delay in (1, 7, 8, 9, 63, 64, 65, 200):
+            wheel.schedule(delay, delay, now=0)
+        fired = {}
+        for now in range(1, 250):
+            for delay in wheel.expire(now):
+                fired[delay] = now
+        self.assertEqual(fired, {d: d for d in (1, 7, 8, 9, 63, 64, 65, 200)})
+
+
+class TestEscalationEngine(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'test.db')
+        self.notified = []
+        self.tiers = parse_tiers('600=+1666;60=+1555,+1556')
+        self.engine = self.create_engine()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def create_engine(self):
+        return EscalationEngine(
+            lambda contacts, alert_id, summary, level: self.notified.append(
+                (alert_id, level, contacts)
+            ),
+            self.tiers,
+            self.db_path,
+            HierarchicalTimerWheel(tick=1, now=0),
+        )
+
+    def test_parse_tiers(self):
+        self.assertEqual(self.tiers, [(60.0, ['+1555', '+1556']), (600.0, ['+1666'])])
+        with self.assertRaises(ValueError):
+            parse_tiers('60=')
+
+    def test_escalates_through_tiers_until_acknowledged(self):
+        self.engine.open(1, 'TOR', now=0)
+        self.engine.open(2, 'SVR', now=0)
+        self.engine.expire(61)
+        self.assertEqual(
+            sorted(self.notified),
+            [(1, 0, ['+1555', '+1556']), (2, 0, ['+1555', '+1556'])],
+        )
+        self.assertTrue(self.engine.acknowledge(1, 'admin'))
+        self.assertFalse(self.engine.acknowledge(1, 'admin'))
+        self.engine.expire(601)
+        self.assertEqual(self.notified[2:], [(2, 1, ['+1666'])])
+        self.assertEqual(self.engine.stats()['outstanding'], 0)
+
+    def test_acknowledgement_from_another_process(self):
+        self.engine.open(1, 'TOR', now=0)
+        self.assertTrue(acknowledge(1, 'operator', self.db_path))
+        self.engine.expire(61)
+        self.assertEqual(self.notified, [])
+
+    def test_restored_after_restart(self):
+        self.engine.open(1, 'TOR', now=0)
+        self.engine.expire(61)
+        restarted = self.create_engine()
+        self.assertEqual(restarted.restore(now=0), 1)
+        restarted.expire(1)
+        self.assertEqual(self.notified, [(1, 0, ['+1555', '+1556'])])
+        restarted.expire(601)
+        self.assertEqual(self.notified[1:], [(1, 1, ['+1666'])])
+
+    def test_thousands_outstanding(self):
+        for alert_id in range(2000):
+            self.engine.open(alert_id, 'TOR', now=0)
+        for alert_id in range(0, 2000, 2):
+            self.engine.acknowledge(alert_id, 'admin')
+        with mock.patch.object(
+            self.engine, 'acknowledged', wraps=self.engine.acknowledged
+        ) as lookup:
+            for now in range(1, 60):
+                self.engine.expire(now)
+            # Idle ticks never reach the database
+            lookup.assert_not_called()
+            self.assertEqual(self.notified, [])
+            self.engine.expire(60)
+            lookup.assert_called_once()
+        self.assertEqual(len(self.notified), 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
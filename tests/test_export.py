@@ -0,0 +1,82 @@
+import csv
+import gzip
+import io
+import json
+import sqlite3
+import unittest
+from modules.export import encode_rows, gzip_chunks, query_dataset
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute(
+            'CREATE TABLE logs (id INTEGER PRIMARY KEY, event TEXT NOT NULL, '
+            'timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)'
+        )
+        self.conn.execute('CREATE INDEX logs_timestamp ON logs (timestamp)')
+        self.conn.executemany(
+            'INSERT INTO logs (event, timestamp) VALUES (?, ?)',
+            [
+                (f'event {n}, "quoted"', f'2024-{n % 12 + 1:02d}-01 00:00:00')
+                for n in range(60000)
+            ],
+        )
+        self.conn.execute(
+            'CREATE TABLE deliveries (sid TEXT PRIMARY KEY, alert_id INTEGER, '
+            'recipient TEXT, channel TEXT, status TEXT, rank INTEGER, '
+            'error_code TEXT, updated REAL)'
+        )
+        self.conn.execute(
+            "INSERT INTO deliveries VALUES ('SM1', 7, '+1555', 'sms', 'delivered', "
+            "3, NULL, 1717200000.0)"
+        )
+
+    def export(self, dataset, fmt, **bounds):
+        cursor, columns = query_dataset(self.conn, dataset, **bounds)
+        return ''.join(encode_rows(cursor, columns, fmt))
+
+    def test_csv_and_ndjson_round_trip(self):
+        rows = list(csv.reader(io.StringIO(self.export('logs', 'csv'))))
+        self.assertEqual(rows[0], ['id', 'event', 'timestamp'])
+        self.assertEqual(len(rows), 60001)
+        self.assertEqual(rows[1][1], 'event 0, "quoted"')
+        records = self.export('deliveries', 'ndjson').splitlines()
+        self.assertEqual(json.loads(records[0])['status'], 'delivered')
+
+    def test_time_bounds(self):
+        text = self.export('logs', 'ndjson', since='2024-03-01', until='2024-05-01')
+        self.assertEqual(len(text.splitlines()), 10000)
+        self.assertEqual(
+            self.export('deliveries', 'csv', since='2024-06-02').count('\r\n'), 1
+        )
+        self.assertEqual(
+            self.export('deliveries', 'csv', until='2024-06-02').count('\r\n'), 2
+        )
+        with self.assertRaises(ValueError):
+            query_dataset(self.conn, 'users')
+        with self.assertRaises(ValueError):
+            query_dataset(self.conn, 'deliveries', since='yesterday')
+
+    def test_log_bounds_accept_iso_times_and_reject_garbage(self):
+        text = self.export(
+            'logs', 'ndjson', since='2024-03-01T00:00:00', until='2024-04-01T00:00'
+        )
+        self.assertEqual(len(text.splitlines()), 5000)
+        with self.assertRaises(ValueError):
+            query_dataset(self.conn, 'logs', since='yesterday')
+
+    def test_streams_one_chunk_per_fetch(self):
+        cursor, columns = query_dataset(self.conn, 'logs')
+        chunks = list(encode_rows(cursor, columns, 'ndjson'))
+        self.assertEqual(len(chunks), 60)
+        cursor, columns = query_dataset(self.conn, 'logs')
+        compressed = b''.join(gzip_chunks(encode_rows(cursor, columns, 'ndjson')))
+        self.assertEqual(gzip.decompress(compressed).decode(), ''.join(chunks))
+        self.assertLess(len(compressed), sum(map(len, chunks)) / 5)
+        with self.assertRaises(ValueError):
+            next(encode_rows(cursor, columns, 'xml'))
+
+
+if __name__ == '__main__':
+    unittest.main()
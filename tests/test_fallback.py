@@ -0,0 +1,127 @@
+import os
+import tempfile
+import time
+import unittest
+from modules.fallback import FallbackEngine
+from utils.timer_wheel import TimerWheel
+
+
+class TestTimerWheel(unittest.TestCase):
+    def test_expiry_and_cancel(self):
+        wheel = TimerWheel(tick=1, slots=8, now=0)
+        wheel.schedule(3, 'a', now=0)
+        cancelled = wheel.schedule(3, 'b', now=0)
+        wheel.schedule(20, 'c', now=0)  # more than one rotation out
+        cancelled.cancel()
+        self.assertEqual(wheel.expire(2), [])
+        self.assertEqual(wheel.expire(3), ['a'])
+        self.assertEqual(wheel.expire(19), [])
+        self.assertEqual(wheel.expire(100), ['c'])
+        self.assertEqual(len(wheel), 0)
+
+
+class TestFallbackEngine(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.sent = []
+        self.delivered = set()
+        self.contents = []
+        self.engine = self.create_engine(
+            confirmed=lambda alert_id, recipients: self.delivered & set(recipients)
+        )
+
+    def create_engine(self, confirmed=None):
+        return FallbackEngine(
+            self.dispatch,
+            confirmed=confirmed,
+            deadline=60,
+            db_path=os.path.join(self.tmp.name, 'test.db'),
+            wheel=TimerWheel(tick=1, now=0),
+        )
+
+    def dispatch(self, channel, alert_id, recipients, content):
+        self.sent.extend((channel, r) for r in recipients)
+        self.contents.append(content)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sms_then_voice(self):
+        self.engine.start(1, ['+1555', '+1666'], 'TOR', now=0)
+        self.assertEqual(self.sent, [('sms', '+1555'), ('sms', '+1666')])
+        self.delivered.add('+1666')
+        self.engine.expire(60)
+        self.assertEqual(self.sent[2:], [('voice', '+1555')])
+        self.assertEqual(self.contents, ['TOR', 'TOR'])
+        self.engine.expire(120)
+        stats = self.engine.stats()
+        self.assertEqual(stats['pending'], 0)
+        self.assertEqual(stats['exhausted'], 1)
+        self.assertEqual(stats['confirmed'], 1)
+
+    def test_websocket_preference_falls_back_to_sms(self):
+        self.engine.set_preference('+1555', 'websocket')
+        queued = self.engine.start(1, ['+1555', '+1666'], sent=('websocket',), now=0)
+        self.assertEqual(queued, {'websocket': 1, 'sms': 1})
+        self.assertEqual(self.sent, [('sms', '+1666')])
+        self.engine.start(2, ['+1555'], now=0)
+        self.assertEqual(self.sent[1:], [('websocket', '+1555')])
+        self.engine.expire(60)
+        self.assertEqual(
+            sorted(self.sent[2:]),
+            [('sms', '+1555'), ('sms', '+1555'), ('voice', '+1666')],
+        )
+        self.delivered.add('+1555')
+        self.engine.expire(120)
+        self.assertEqual(len(self.sent), 5)
+        self.assertEqual(self.engine.stats()['pending'], 0)
+
+    def test_only_websocket_followed_up_without_confirmations(self):
+        engine = self.create_engine()
+        engine.set_preference('+1666', 'websocket')
+        engine.start(1, ['+1555', '+1666'], now=0)
+        engine.expire(60)
+        engine.expire(600)
+        self.assertEqual(
+            self.sent, [('sms', '+1555'), ('websocket', '+1666'), ('sms', '+1666')]
+        )
+        self.assertEqual(engine.stats()['pending'], 0)
+        self.assertEqual(engine.stats()['untracked'], 1)
+
+    def test_content_kept_while_deadlines_pending(self):
+        for alert_id in range(300):
+            self.engine.start(alert_id, ['+1555'], f'alert {alert_id}', now=0)
+        self.assertEqual(len(self.engine.contents), 300)
+        self.engine.expire(60)
+        self.assertEqual(self.contents[-1], 'alert 299')
+        self.engine.expire(120)
+        self.assertEqual(self.engine.contents, {})
+
+    def test_confirm_stops_chain(self):
+        self.engine.start(1, ['+1555'], now=0)
+        self.assertTrue(self.engine.confirm(1, '+1555'))
+        self.engine.expire(600)
+        self.assertEqual(self.sent, [('sms', '+1555')])
+
+    def test_preferences_persist(self):
+        self.engine.set_preference('+1555', 'voice')
+        reloaded = FallbackEngine(
+            lambda *args: None, db_path=os.path.join(self.tmp.name, 'test.db')
+        )
+        self.assertEqual(reloaded.chain('+1555'), ['voice'])
+        with self.assertRaises(ValueError):
+            reloaded.set_preference('+1555', 'pigeon')
+
+    def test_scales_to_100k_recipients(self):
+        recipients = [f'+1{i:010d}' for i in range(100000)]
+        started = time.monotonic()
+        self.engine.start(1, recipients, now=0)
+        self.engine.expire(30)
+        self.engine.expire(60)
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(self.engine.stats()['pending'], 100000)
+        self.assertEqual(self.sent.count(('voice', recipients[0])), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
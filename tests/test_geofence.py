@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from modules.geofence import PointIndex, RecipientGeofence, points_in_polygon, polygon_edges
+
+
+class TestPointIndex(unittest.TestCase):
+    def test_query_matches_brute_force(self):
+        rng = np.random.default_rng(7)
+        lats = rng.uniform(38, 40, 50000)
+        lons = rng.uniform(-95, -93, 50000)
+        index = PointIndex(np.arange(50000), lats, lons)
+
+        angles = np.linspace(0, 2 * np.pi, 300, endpoint=False)
+        radius = 0.5 + 0.3 * np.sin(angles * 11)
+        polygon = np.c_[39 + radius * np.sin(angles), -94 + radius * np.cos(angles)]
+
+        expected = np.nonzero(points_in_polygon(lons, lats, polygon_edges(polygon)))[0]
+        self.assertEqual(sorted(index.query(polygon)), sorted(expected.tolist()))
+
+    def test_polygon_outside_grid(self):
+        index = PointIndex(['a', 'b'], [39.0, 39.5], [-94.0, -94.5])
+        self.assertEqual(index.query([(10, 10), (10, 11), (11, 11)]), [])
+
+
+class TestRecipientGeofence(unittest.TestCase):
+    def test_recipients_in_polygon(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            geofence = RecipientGeofence(os.path.join(tmp, 'test.db'))
+            geofence.set_locations([
+                ('+15550001', 39.10, -94.58),
+                ('+15550002', 38.95, -94.40),
+                ('+15550003', 39.30, -94.90),
+            ])
+            square = [(39.0, -94.7), (39.2, -94.7), (39.2, -94.5), (39.0, -94.5)]
+            self.assertEqual(geofence.recipients_in(square), ['+15550001'])
+
+            geofence.set_locations([('+15550002', 39.05, -94.60)])
+            self.assertEqual(
+                sorted(geofence.recipients_in(square)), ['+15550001', '+15550002']
+            )
+
+    def test_seed_from_subscription_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'subscriptions.csv')
+            with open(path, 'w') as f:
+                f.write('recipient,locations,events,lat,lon\n')
+                f.write('+15550001,029095,,39.10,-94.58\n')
+                f.write('+15550002,029095,TOR,,\n')
+            geofence = RecipientGeofence(os.path.join(tmp, 'test.db'))
+            geofence.seed(path)
+            square = [(39.0, -94.7), (39.2, -94.7), (39.2, -94.5), (39.0, -94.5)]
+            self.assertEqual(geofence.recipients_in(square), ['+15550001'])
+
+
+if __name__ == '__main__':
+    unittest.main()
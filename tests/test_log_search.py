@@ -0,0 +1,64 @@
+import sqlite3
+import time
+import unittest
+from modules.log_search import initialize_log_search, match_expression, search_logs
+
+
+class TestLogSearch(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute(
+            'CREATE TABLE logs (id INTEGER PRIMARY KEY, event TEXT NOT NULL, '
+            'timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)'
+        )
+        self.conn.execute(
+            "INSERT INTO logs (event) VALUES ('admin triggered an alert')"
+        )
+        self.conn.commit()
+        initialize_log_search(self.conn)
+
+    def log(self, event):
+        self.conn.execute('INSERT INTO logs (event) VALUES (?)', (event,))
+
+    def test_existing_and_new_rows_are_indexed(self):
+        self.log('TOR warning for Canadian County <b>')
+        self.log('operator acknowledged alert 42')
+        self.assertEqual([r['id'] for r in search_logs(self.conn, 'admin')], [1])
+        results = search_logs(self.conn, 'canadian tor')
+        self.assertEqual(len(results), 1)
+        self.assertEqual(
+            results[0]['event'],
+            '<mark>TOR</mark> warning for <mark>Canadian</mark> County &lt;b&gt;',
+        )
+        self.assertEqual(len(search_logs(self.conn, 'ack*')), 1)
+        self.assertEqual(len(search_logs(self.conn, 'alert')), 2)
+
+    def test_deletes_and_updates_stay_in_sync(self):
+        self.log('siren test north')
+        self.conn.execute("UPDATE logs SET event = 'siren test south' WHERE id = 2")
+        self.assertEqual(search_logs(self.conn, 'north'), [])
+        self.assertEqual(len(search_logs(self.conn, 'south')), 1)
+        self.conn.execute('DELETE FROM logs WHERE id = 2')
+        self.assertEqual(search_logs(self.conn, 'siren'), [])
+
+    def test_query_syntax_is_neutralized(self):
+        self.assertEqual(match_expression('NOT "OR" ('), '"NOT" """OR"""')
+        self.assertIsNone(match_expression(' * - '))
+        self.assertEqual(search_logs(self.conn, 'admin) OR (x'), [])
+
+    def test_ranked_pages_over_many_events(self):
+        self.conn.executemany(
+            'INSERT INTO logs (event) VALUES (?)',
+            [(f'user{n % 50} viewed log page {n}',) for n in range(50000)],
+        )
+        self.log('user7 user7 user7 flood')
+        started = time.perf_counter()
+        page = search_logs(self.conn, 'user7', limit=20)
+        elapsed = time.perf_counter() - started
+        self.assertEqual(page[0]['event'].count('<mark>'), 3)
+        self.assertEqual(len(search_logs(self.conn, 'user7', 20, 990)), 11)
+        self.assertLess(elapsed, 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from modules.push import DeviceTokenRegistry, FCMPushChannel
+
+
+class MockFCMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real endpoint
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests.append((self.client_address, self.headers['Authorization'], body))
+        results = []
+        for token in body['registration_ids']:
+            if token.startswith('stale'):
+                results.append({'error': 'NotRegistered'})
+            elif token.startswith('busy'):
+                results.append({'error': 'Unavailable'})
+            else:
+                results.append({'message_id': f'id-{token}'})
+        data = json.dumps({'results': results}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestFCMPushChannel(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), MockFCMHandler)
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.registry = DeviceTokenRegistry(os.path.join(self.tmp.name, 'test.db'))
+        self.channel = FCMPushChannel(
+            server_key='test-key',
+            registry=self.registry,
+            endpoint=f'http://127.0.0.1:{self.server.server_port}/fcm/send',
+            batch_size=100,
+            pool_size=2,
+        )
+
+    def tearDown(self):
+        self.channel.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def test_send_chunks_tokens_into_multicast_batches(self):
+        for i in range(250):
+            self.registry.register(f'token-{i}')
+        summary = self.channel.send('EAS', 'Tornado Warning')
+        self.assertEqual(summary['batches'], 3)
+        self.assertEqual(summary['success'], 250)
+        sizes = sorted(len(body['registration_ids']) for _, _, body in self.server.requests)
+        self.assertEqual(sizes, [50, 100, 100])
+        self.assertTrue(all(auth == 'key=test-key' for _, auth, _ in self.server.requests))
+
+    def test_connections_are_reused(self):
+        tokens = [f'token-{i}' for i in range(1000)]
+        self.channel.send('EAS', 'Test', tokens=tokens)
+        clients = {client for client, _, _ in self.server.requests}
+        self.assertEqual(len(self.server.requests), 10)
+        self.assertLessEqual(len(clients), 2)
+
+    def test_stale_tokens_are_pruned(self):
+        for token in ['good-1', 'stale-1', 'busy-1', 'stale-2']:
+            self.registry.register(token)
+        summary = self.channel.send('EAS', 'Test')
+        self.assertEqual(summary['success'], 1)
+        self.assertEqual(summary['failure'], 3)
+        self.assertEqual(summary['pruned'], 2)
+        self.assertEqual(sorted(self.registry.tokens()), ['busy-1', 'good-1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
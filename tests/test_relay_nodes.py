@@ -0,0 +1,127 @@
+import threading
+import time
+import unittest
+from collections import defaultdict
+from modules.relay_nodes import RelayController, RelayNode
+
+
+class Message:
+    def __init__(self, topic, payload):
+        self.topic = topic
+        self.payload = payload
+
+
+class LocalBroker:
+    """In-process stand-in for an MQTT broker with per-topic delay and loss."""
+
+    def __init__(self, delay=0.005):
+        self.delay = delay
+        self.subscriptions = []
+        self.drop = defaultdict(int)  # topic -> messages still to lose
+
+    def client(self):
+        return LocalClient(self)
+
+    def deliver(self, topic, payload):
+        if self.drop[topic]:
+            self.drop[topic] -= 1
+            return
+        for pattern, callback in list(self.subscriptions):
+            if matches(pattern, topic):
+                threading.Timer(
+                    self.delay, callback, (None, None, Message(topic, payload))
+                ).start()
+
+
+class LocalClient:
+    def __init__(self, broker):
+        self.broker = broker
+
+    def message_callback_add(self, pattern, callback):
+        self.broker.subscriptions.append((pattern, callback))
+
+    def subscribe(self, pattern, qos=0):
+        pass
+
+    def publish(self, topic, payload, qos=0):
+        self.broker.deliver(topic, payload)
+
+
+def matches(pattern, topic):
+    pattern, topic = pattern.split('/'), topic.split('/')
+    return len(pattern) == len(topic) and all(
+        p in ('+', t) for p, t in zip(pattern, topic)
+    )
+
+
+class TestRelayNodes(unittest.TestCase):
+    def setUp(self):
+        self.broker = LocalBroker()
+        self.keyed = {}
+        self.controller = RelayController(
+            self.broker.client(), nodes=['north', 'south'], ack_timeout=0.2, lead=0.2
+        )
+        # The south node's clock runs 3 seconds ahead of the controller
+        self.nodes = {
+            'north': RelayNode('north', self.broker.client(), self.keyer('north')),
+            'south': RelayNode(
+                'south',
+                self.broker.client(),
+                self.keyer('south'),
+                clock=lambda: time.time() + 3,
+            ),
+        }
+
+    def keyer(self, node_id):
+        def activate(relays, duration):
+            self.keyed.setdefault(node_id, []).append((relays, time.time()))
+
+        return activate
+
+    def test_clock_offset_and_synchronized_activation(self):
+        self.controller.sync_all()
+        self.assertAlmostEqual(self.controller.nodes['south'].offset, 3, delta=0.02)
+        self.assertAlmostEqual(self.controller.nodes['north'].offset, 0, delta=0.02)
+        started = time.time()
+        latencies = self.controller.activate_group(
+            ['north/1', 'north/2', 'south/1'], 30
+        )
+        self.assertEqual(set(latencies), {'north/1', 'north/2', 'south/1'})
+        self.assertTrue(all(0 < latency < 0.1 for latency in latencies.values()))
+        time.sleep(0.35)
+        self.assertEqual(self.keyed['north'][0][0], ['1', '2'])
+        north, south = self.keyed['north'][0][1], self.keyed['south'][0][1]
+        self.assertAlmostEqual(north, started + 0.2, delta=0.05)
+        self.assertAlmostEqual(north, south, delta=0.03)
+
+    def test_lost_command_is_resent_and_acted_on_once(self):
+        self.broker.drop['pisafe/relays/north/command'] = 1
+        self.broker.drop['pisafe/relays/south/ack'] = 1
+        latencies = self.controller.activate_group(['north/1', 'south/1'], 30)
+        self.assertIsNotNone(latencies['north/1'])
+        self.assertIsNotNone(latencies['south/1'])
+        time.sleep(0.3)
+        self.assertEqual(len(self.keyed['north']), 1)
+        self.assertEqual(len(self.keyed['south']), 1)
+        stats = self.controller.stats()
+        self.assertEqual(stats['north']['commands'], 1)
+        self.assertLess(stats['north']['latency_p95'], 0.1)
+
+    def test_unreachable_node(self):
+        self.controller.retries = 1
+        latencies = self.controller.activate_group(['east/1', 'north/1'], 30)
+        self.assertIsNone(latencies['east/1'])
+        self.assertIsNotNone(latencies['north/1'])
+        self.assertEqual(self.controller.stats()['east']['failures'], 1)
+
+    def test_controller_restart_resets_sequence(self):
+        self.controller.activate_group(['north/1'], 30)
+        time.sleep(0.01)
+        restarted = RelayController(self.broker.client(), ack_timeout=0.2, lead=0)
+        restarted.activate_group(['north/1'], 30)
+        time.sleep(0.3)
+        self.assertEqual(len(self.keyed['north']), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
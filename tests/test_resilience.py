@@ -0,0 +1,120 @@
+import time
+import unittest
+from modules.resilience import CircuitBreaker, CircuitOpenError, Provider, ResilientChannel
+
+
+def hang(*args):
+    time.sleep(1)
+
+
+def fail(*args):
+    raise ConnectionError('provider down')
+
+
+class Rejected(Exception):
+    def __init__(self, status):
+        super().__init__(f'HTTP {status}')
+        self.status = status
+
+
+def reject(status):
+    def send(*args):
+        raise Rejected(status)
+
+    return send
+
+
+def is_provider_fault(error):
+    return getattr(error, 'status', 500) >= 500
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_then_probes(self):
+        breaker = CircuitBreaker('twilio', failure_threshold=2, reset_timeout=0.05)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())  # the single half-open probe
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+
+class TestResilientChannel(unittest.TestCase):
+    def test_dead_provider_is_not_called_once_open(self):
+        calls = []
+
+        def counted_hang(*args):
+            calls.append(args)
+            hang()
+
+        provider = Provider(
+            'twilio', counted_hang, CircuitBreaker('twilio', failure_threshold=2)
+        )
+        channel = ResilientChannel([provider], deadline=0.05)
+        for _ in range(2):
+            with self.assertRaises(TimeoutError):
+                channel.send('+15551234', 'TOR')
+        started = time.monotonic()
+        with self.assertRaises(CircuitOpenError):
+            channel.send('+15551234', 'TOR')
+        self.assertEqual(len(calls), 2)
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_fails_over_on_error(self):
+        channel = ResilientChannel(
+            [Provider('primary', fail), Provider('backup', lambda *args: 'sent')]
+        )
+        self.assertEqual(channel.send('+15551234', 'TOR'), 'sent')
+        self.assertEqual(channel.stats()['primary']['failures'], 1)
+
+    def test_hedges_slow_request(self):
+        channel = ResilientChannel(
+            [Provider('primary', hang), Provider('backup', lambda *args: 'sent')],
+            deadline=2,
+            hedge_delay=0.05,
+        )
+        started = time.monotonic()
+        self.assertEqual(channel.send('+15551234', 'TOR'), 'sent')
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_rejected_requests_do_not_open_circuit(self):
+        provider = Provider(
+            'twilio',
+            reject(429),
+            CircuitBreaker('twilio', failure_threshold=1),
+            trips=is_provider_fault,
+        )
+        channel = ResilientChannel([provider])
+        with self.assertRaises(Rejected):
+            channel.send('+15551234', 'TOR')
+        self.assertEqual(provider.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_throttled_request_is_not_failed_over(self):
+        self.assert_not_failed_over(429)
+
+    def test_invalid_request_is_not_duplicated_to_backup(self):
+        self.assert_not_failed_over(400)
+
+    def assert_not_failed_over(self, status):
+        sent = []
+        channel = ResilientChannel(
+            [
+                Provider('primary', reject(status), trips=is_provider_fault),
+                Provider(
+                    'backup', lambda *args: sent.append(args), trips=is_provider_fault
+                ),
+            ]
+        )
+        with self.assertRaises(Rejected) as raised:
+            channel.send('+15551234', 'TOR')
+        self.assertEqual(raised.exception.status, status)
+        self.assertEqual(sent, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
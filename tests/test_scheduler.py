@@ -0,0 +1,69 @@
+import threading
+import time
+import unittest
+from modules.scheduler import (
+    AlertScheduler,
+    PRESIDENTIAL,
+    STATEMENT,
+    TEST,
+    WARNING,
+    WATCH,
+    priority_for_event,
+)
+
+
+class TestPriorityForEvent(unittest.TestCase):
+    def test_severity_classes(self):
+        self.assertEqual(priority_for_event('EAN'), PRESIDENTIAL)
+        self.assertEqual(priority_for_event('TOR'), WARNING)
+        self.assertEqual(priority_for_event('CAE'), WARNING)
+        self.assertEqual(priority_for_event('SVA'), WATCH)
+        self.assertEqual(priority_for_event('SVS'), STATEMENT)
+        self.assertEqual(priority_for_event('RWT'), TEST)
+        self.assertEqual(priority_for_event('NAT'), TEST)
+        self.assertEqual(priority_for_event('NST'), TEST)
+        self.assertEqual(priority_for_event('NOW'), STATEMENT)
+        self.assertEqual(priority_for_event('FFW'), WARNING)
+        self.assertEqual(priority_for_event(None), STATEMENT)
+
+
+class TestAlertScheduler(unittest.TestCase):
+    def test_urgent_alert_jumps_queued_tests(self):
+        gate = threading.Event()
+        delivered = []
+
+        def send(recipient, alert):
+            gate.wait()
+            delivered.append(alert)
+
+        scheduler = AlertScheduler()
+        scheduler.add_channel('sms', send)
+        scheduler.submit(TEST, {'sms': [(n, 'RWT') for n in range(50)]})
+        scheduler.submit(PRESIDENTIAL, {'sms': [(n, 'EAN') for n in range(5)]})
+        gate.set()
+        self.assertTrue(scheduler.join(timeout=5))
+
+        # At most the delivery already in flight precedes the EAN
+        self.assertEqual(delivered[:6].count('EAN'), 5)
+        self.assertEqual(delivered.count('RWT'), 50)
+
+    def test_output_is_paused_and_resumed(self):
+        plays = []
+
+        def play(name, duration, offset=0, interrupted=None):
+            plays.append((name, round(offset, 1)))
+            interrupted.wait(duration - offset)
+
+        scheduler = AlertScheduler()
+        scheduler.add_output('audio', play)
+        scheduler.submit(TEST, {'audio': [('RWT', 0.6)]})
+        time.sleep(0.2)
+        scheduler.submit(WARNING, {'audio': [('TOR', 0.1)]})
+        self.assertTrue(scheduler.join(timeout=5))
+
+        self.assertEqual([name for name, _ in plays], ['RWT', 'TOR', 'RWT'])
+        self.assertGreater(plays[2][1], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
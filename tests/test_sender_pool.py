@@ -0,0 +1,74 @@
+import threading
+import time
+import unittest
+from collections import Counter
+from modules.sender_pool import SenderPool, TokenBucket
+
+
+def dispatch_rate(pool, seconds=0.5, workers=8):
+    sent = []
+    stop = time.monotonic() + seconds
+
+    def worker(n):
+        i = 0
+        while time.monotonic() < stop:
+            if pool.acquire(f'+1555{n}{i:06d}', timeout=stop - time.monotonic()):
+                sent.append(1)
+            i += 1
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return len(sent) / seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_shaped(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+        self.assertGreater(bucket.wait_time(), 0)
+
+
+class TestSenderPool(unittest.TestCase):
+    def test_rate_scales_with_pool_size(self):
+        single = dispatch_rate(SenderPool(['+15550000'], rate=20))
+        pooled = dispatch_rate(SenderPool([f'+1555000{i}' for i in range(4)], rate=20))
+        self.assertGreater(pooled / single, 3)
+
+    def test_recipients_stick_to_a_number(self):
+        pool = SenderPool(['+15550000', '+15550001', '+15550002'], rate=100)
+        self.assertEqual(pool.acquire('+15551234'), pool.acquire('+15551234'))
+
+    def test_throttled_number_is_rebalanced(self):
+        pool = SenderPool(['+15550000', '+15550001'], rate=100)
+        number = pool.acquire('+15551234')
+        pool.report_throttled(number)
+        self.assertNotEqual(pool.acquire('+15551234'), number)
+        self.assertEqual(pool.stats()[number]['rate'], 50)
+        self.assertEqual(pool.stats()[number]['throttled'], 1)
+
+        pool.report_success(number)
+        self.assertEqual(pool.stats()[number]['rate'], 60)
+
+    def test_cooldown_only_moves_that_numbers_recipients(self):
+        pool = SenderPool([f'+1555000{i}' for i in range(5)], rate=1e6)
+        recipients = [f'+1555{i:07d}' for i in range(2000)]
+        before = {r: pool.acquire(r) for r in recipients}
+        shares = Counter(before.values())
+        self.assertEqual(len(shares), 5)
+        self.assertGreater(min(shares.values()), 300)
+        pool.report_throttled('+15550002')
+        after = {r: pool.acquire(r) for r in recipients}
+        for recipient in recipients:
+            if before[recipient] == '+15550002':
+                self.assertNotEqual(after[recipient], '+15550002')
+            else:
+                self.assertEqual(after[recipient], before[recipient])
+
+
+if __name__ == '__main__':
+    unittest.main()
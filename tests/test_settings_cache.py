@@ -0,0 +1,69 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from modules.settings_cache import SettingsCache, initialize_settings_version
+
+
+class CountingConnection:
+    def __init__(self, conn):
+        self.conn = conn
+        self.queries = 0
+
+    def execute(self, *args):
+        self.queries += 1
+        return self.conn.execute(*args)
+
+
+class TestSettingsCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'test.db')
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "CREATE TABLE settings (id INTEGER PRIMARY KEY, "
+            "theme TEXT DEFAULT 'light', language TEXT DEFAULT 'en')"
+        )
+        conn.execute("INSERT INTO settings (id) VALUES (1)")
+        conn.commit()
+        initialize_settings_version(conn)
+        initialize_settings_version(conn)
+        conn.close()
+        # One connection per simulated worker process
+        self.workers = [
+            CountingConnection(sqlite3.connect(self.db_path)) for _ in range(2)
+        ]
+
+    def tearDown(self):
+        for worker in self.workers:
+            worker.conn.close()
+        self.tmp.cleanup()
+
+    def test_change_in_one_worker_reaches_the_other(self):
+        first, second = SettingsCache(0.05), SettingsCache(0.05)
+        self.assertEqual(first.get(self.workers[0]), ('light', 'en'))
+        self.assertEqual(second.get(self.workers[1]), ('light', 'en'))
+        self.workers[0].conn.execute(
+            "UPDATE settings SET theme = 'dark', language = 'fr' WHERE id = 1"
+        )
+        self.workers[0].conn.commit()
+        first.invalidate()
+        self.assertEqual(first.get(self.workers[0]), ('dark', 'fr'))
+        self.assertEqual(second.get(self.workers[1]), ('light', 'en'))
+        time.sleep(0.06)
+        self.assertEqual(second.get(self.workers[1]), ('dark', 'fr'))
+
+    def test_reads_within_interval_skip_the_database(self):
+        cache = SettingsCache(60)
+        worker = self.workers[0]
+        for _ in range(1000):
+            cache.get(worker)
+        self.assertEqual(worker.queries, 2)  # version, then the settings row
+        cache.invalidate()
+        cache.get(worker)
+        self.assertEqual(worker.queries, 3)  # version unchanged, row not re-read
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+import os
+import random
+import tempfile
+import threading
+import time
+import unittest
+from modules.sirens import CallbackTransport, SirenDispatcher, SirenRegistry
+
+
+class GroupTransport:
+    supports_groups = True
+
+    def __init__(self):
+        self.commands = []
+
+    def activate_group(self, siren_ids, duration):
+        self.commands.append(list(siren_ids))
+        return {siren_id: 0.01 for siren_id in siren_ids if siren_id != 'G3'}
+
+
+class TestSirenDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.registry = SirenRegistry(os.path.join(self.tmp.name, 'test.db'))
+        for n in range(20):
+            self.registry.register(f'S{n}', 'north' if n % 2 else 'south')
+        for n in range(4):
+            self.registry.register(f'G{n}', 'north', transport='mqtt')
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def slow_activate(self, siren_id, duration):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.1)
+        with self.lock:
+            self.active -= 1
+        if siren_id == 'S19':
+            raise ConnectionError('siren offline')
+
+    def test_activation_is_bounded_by_slowest_siren(self):
+        group = GroupTransport()
+        dispatcher = SirenDispatcher(
+            self.registry,
+            {'local': CallbackTransport(self.slow_activate), 'mqtt': group},
+        )
+        report = dispatcher.activate(['north'])
+        self.assertEqual(report['total'], 14)
+        self.assertEqual(report['acked'], 12)
+        self.assertEqual(self.peak, 10)
+        self.assertLess(report['elapsed'], 0.5)  # not 10 x 0.1s
+        self.assertEqual(group.commands, [['G0', 'G1', 'G2', 'G3']])
+        self.assertEqual(report['sirens']['S19']['error'], 'siren offline')
+        self.assertFalse(report['sirens']['G3']['acked'])
+        self.assertGreaterEqual(report['all_sounding'], 0.1)
+
+    def test_timeout_and_missing_transport(self):
+        dispatcher = SirenDispatcher(
+            self.registry,
+            {'local': CallbackTransport(lambda *args: time.sleep(1))},
+            timeout=0.05,
+        )
+        report = dispatcher.activate(['south'])
+        self.assertEqual(report['acked'], 0)
+        self.assertEqual(report['sirens']['S0']['error'], 'timeout')
+        report = dispatcher.activate(['nowhere'])
+        self.assertEqual(report['total'], 0)
+
+    def test_registry_zones_persist(self):
+        self.registry.register('S0', 'east')
+        self.registry.remove('S1')
+        reloaded = SirenRegistry(self.registry.db_path)
+        self.assertEqual(reloaded.in_zones(['east']), [('S0', 'local')])
+        self.assertEqual(len(reloaded.in_zones()), 23)
+
+
+class TestSirenRegistryIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.registry = SirenRegistry(os.path.join(self.tmp.name, 'test.db'))
+        self.registry.register('A', 'east', lat=35.1, lon=-97.1, areas=['140027'])
+        self.registry.register('B', 'east', lat=35.3, lon=-97.3, areas=['040027'])
+        self.registry.register('C', 'west', lat=36.5, lon=-98.5, areas=['040000'])
+        self.registry.register('D', 'west', lat=34.0, lon=-96.0, areas=['048113'])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_location_codes_follow_same_semantics(self):
+        self.assertEqual(self.registry.for_locations(['240027']), {'B', 'C'})
+        self.assertEqual(self.registry.for_locations(['140027']), {'A', 'B', 'C'})
+        self.assertEqual(self.registry.for_locations(['040027']), {'A', 'B', 'C'})
+        self.assertEqual(self.registry.for_locations(['040109']), {'C'})
+        self.assertEqual(self.registry.for_locations(['040000']), {'A', 'B', 'C'})
+        self.assertEqual(self.registry.for_locations(['048113', '006001']), {'D'})
+        self.assertEqual(self.registry.for_locations(['140000']), {'A', 'B', 'C'})
+        self.assertEqual(self.registry.for_locations(['548000']), {'D'})
+
+    def test_national_code_covers_every_siren(self):
+        self.registry.register('E', 'east')
+        self.assertEqual(
+            self.registry.for_locations(['048113', '000000']), {'A', 'B', 'C', 'D', 'E'}
+        )
+
+    def test_lookup_matches_index_semantics(self):
+        rng = random.Random(39)
+        for n in range(300):
+            part, state = rng.choice('0123'), rng.choice(['04', '48', '06'])
+            county = rng.choice(['027', '113', f'{rng.randrange(1000):03d}'])
+            if state == '04' and n % 10 == 0:
+                county = '000'  # whole-state sirens in one state only
+            self.registry.register(f'R{n}', 'fuzz', areas=[part + state + county])
+        for _ in range(2000):
+            part, state = rng.choice('0123456789'), rng.choice(['04', '48', '06', '12'])
+            county = rng.choice(['000', '027', '113', f'{rng.randrange(1000):03d}'])
+            code = part + state + county
+            self.assertEqual(
+                self.registry.for_locations([code]),
+                set(self.registry.index.locate(code)),
+                code,
+            )
+
+    def test_changes_update_index_incrementally(self):
+        self.registry.remove('C')
+        self.assertEqual(self.registry.for_locations(['240027']), {'B'})
+        self.assertEqual(self.registry.for_locations(['040109']), set())
+        self.registry.register('A', 'east', areas=['048113'])
+        self.assertEqual(self.registry.for_locations(['140027']), {'B'})
+        self.assertEqual(self.registry.for_locations(['048113']), {'A', 'D'})
+        self.registry.remove('B')
+        self.assertNotIn('140027', self.registry.resolved)
+        self.assertEqual(self.registry.for_locations(['140027']), set())
+        with self.assertRaises(ValueError):
+            self.registry.register('E', 'east', areas=['40027'])
+
+    def test_registry_persists_coordinates_and_areas(self):
+        reloaded = SirenRegistry(self.registry.db_path)
+        self.assertEqual(reloaded.resolved, self.registry.resolved)
+        self.assertEqual(reloaded.sirens['A'], ('east', 'local', 35.1, -97.1))
+
+    def test_seed_from_file(self):
+        path = os.path.join(self.tmp.name, 'sirens.csv')
+        with open(path, 'w') as f:
+            f.write('siren_id,zone,transport,lat,lon,areas\n'
+                    'D,south,mqtt,33.9,-96.1,048113 048027\n'
+                    'F,south,,,,\n')
+        self.registry.seed(path)
+        reloaded = SirenRegistry(self.registry.db_path)
+        reloaded.seed(path)
+        self.assertEqual(reloaded.sirens['D'], ('south', 'mqtt', 33.9, -96.1))
+        self.assertEqual(reloaded.sirens['F'], ('south', 'local', None, None))
+        self.assertEqual(reloaded.for_locations(['048027']), {'D'})
+        self.assertEqual(len(reloaded.sirens), 5)
+        with open(path, 'a') as f:
+            f.write(',south,,,,\n')
+        with self.assertRaises(ValueError):
+            reloaded.seed(path)
+
+    def test_polygon_lookup(self):
+        polygon = [(35.0, -97.5), (35.5, -97.5), (35.5, -97.0), (35.0, -97.0)]
+        self.assertEqual(sorted(self.registry.in_polygon(polygon)), ['A', 'B'])
+        self.registry.register('E', 'east', lat=35.2, lon=-97.2)
+        self.assertEqual(sorted(self.registry.in_polygon(polygon)), ['A', 'B', 'E'])
+
+    def test_polygon_lookup_keeps_sirens_without_coordinates(self):
+        polygon = [(35.0, -97.5), (35.5, -97.5), (35.5, -97.0), (35.0, -97.0)]
+        self.registry.register('E', 'east', areas=['040027'])
+        self.registry.register('F', 'east', areas=['048113'])
+        self.assertEqual(self.registry.in_polygon(polygon, ['040027']), {'A', 'B', 'E'})
+        self.assertEqual(self.registry.in_polygon(polygon), {'A', 'B'})
+
+    def test_lookup_takes_microseconds(self):
+        for n in range(2000):
+            county = f'{n % 200:03d}'
+            self.registry.register(f'S{n}', 'bulk', areas=[f'{n % 10}40{county}'])
+        codes = ['140027', '240027', '040109']
+        started = time.perf_counter()
+        for _ in range(1000):
+            self.registry.for_locations(codes)
+        self.assertLess((time.perf_counter() - started) / 1000, 0.001)
+
+
+if __name__ == '__main__':
+    unittest.main()
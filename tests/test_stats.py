@@ -0,0 +1,60 @@
+import sqlite3
+import time
+import unittest
+from modules.stats import StatsCache, initialize_stats
+
+
+class TestDashboardStats(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute(
+            'CREATE TABLE users (username TEXT PRIMARY KEY, password TEXT, role TEXT)'
+        )
+        self.conn.execute(
+            'CREATE TABLE logs (id INTEGER PRIMARY KEY, event TEXT NOT NULL, '
+            'timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)'
+        )
+        self.conn.execute("INSERT INTO users VALUES ('admin', 'x', 'admin')")
+        self.conn.execute(
+            "INSERT INTO logs (event, timestamp) VALUES ('boot', '2024-03-01 08:00:00')"
+        )
+        self.conn.commit()
+        initialize_stats(self.conn)
+
+    def stats(self):
+        return dict(self.conn.execute('SELECT name, value FROM stats'))
+
+    def test_triggers_track_counts_and_first_timestamp(self):
+        self.assertEqual(
+            self.stats(),
+            {'logs_count': 1, 'logs_first': '2024-03-01 08:00:00', 'users_count': 1},
+        )
+        self.conn.executemany(
+            'INSERT INTO logs (event, timestamp) VALUES (?, ?)',
+            [('a', '2024-02-01 00:00:00'), ('b', '2024-04-01 00:00:00')],
+        )
+        self.conn.execute("INSERT INTO users VALUES ('op', 'x', 'operator')")
+        self.assertEqual(self.stats()['logs_first'], '2024-02-01 00:00:00')
+        self.conn.execute("DELETE FROM logs WHERE event IN ('a', 'boot')")
+        self.conn.execute("DELETE FROM users WHERE username = 'admin'")
+        self.assertEqual(
+            self.stats(),
+            {'logs_count': 1, 'logs_first': '2024-04-01 00:00:00', 'users_count': 1},
+        )
+        initialize_stats(self.conn)  # idempotent
+        self.assertEqual(self.stats()['logs_count'], 1)
+
+    def test_cache_serves_from_memory_until_stale(self):
+        cache = StatsCache(ttl=0.05)
+        self.assertEqual(cache.get(self.conn)['logs_count'], 1)
+        self.conn.execute("INSERT INTO logs (event) VALUES ('x')")
+        self.assertEqual(cache.get(self.conn)['logs_count'], 1)
+        time.sleep(0.06)
+        self.assertEqual(cache.get(self.conn)['logs_count'], 2)
+        self.conn.execute("INSERT INTO logs (event) VALUES ('y')")
+        cache.invalidate()
+        self.assertEqual(cache.get(self.conn)['logs_count'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+from modules.subscriptions import SubscriptionStore
+
+
+class TestSubscriptionStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'test.db')
+        self.store = SubscriptionStore(self.db_path)
+        self.store.subscribe('+15550001', ['020103'])
+        self.store.subscribe('+15550002', ['120103'], events=['TOR', 'SVR'])
+        self.store.subscribe('+15550003', ['020000'], events=['EAN'])
+        self.store.subscribe('+15550004', ['029047'])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_match_by_location_and_event(self):
+        self.assertEqual(
+            sorted(self.store.match(['020103'], 'TOR')), ['+15550001', '+15550002']
+        )
+        self.assertEqual(self.store.match(['020103'], 'FFW'), ['+15550001'])
+        self.assertEqual(self.store.match(['029047', '029165'], 'RWT'), ['+15550004'])
+
+    def test_county_part_matches_whole_county_and_state(self):
+        self.assertEqual(
+            sorted(self.store.match(['220103'])), ['+15550001', '+15550003']
+        )
+
+    def test_statewide_subscription_and_header(self):
+        self.assertEqual(
+            sorted(self.store.match(['020209'], 'EAN')), ['+15550003']
+        )
+        self.assertEqual(
+            sorted(self.store.match(['020000'], 'EAN')),
+            ['+15550001', '+15550003'],
+        )
+
+    def test_national_and_unsubscribed_state_codes(self):
+        self.assertEqual(
+            sorted(self.store.match(['000000'], 'EAN')),
+            ['+15550001', '+15550003', '+15550004'],
+        )
+        self.assertEqual(len(self.store.match(['000000'])), 4)
+        self.assertEqual(self.store.match(['006000', '106000'], 'EAN'), [])
+
+    def test_unsubscribe_and_reload(self):
+        self.store.unsubscribe('+15550001')
+        self.assertEqual(self.store.match(['020103'], 'TOR'), ['+15550002'])
+        reloaded = SubscriptionStore(self.db_path)
+        self.assertEqual(reloaded.match(['020103'], 'TOR'), ['+15550002'])
+        self.assertEqual(reloaded.match(['029047'], 'RWT'), ['+15550004'])
+
+    def test_match_agrees_with_full_scan(self):
+        subscriptions = [
+            (f'user{i}', [f'0{i % 50:02d}{i % 200:03d}'], ['TOR'] if i % 2 else [])
+            for i in range(100000)
+        ]
+        self.store.subscribe_many(subscriptions)
+        header = [f'017{c:03d}' for c in range(1, 32)]
+        for event, count in (('TOR', 500), ('SVR', 0)):
+            expected = {
+                recipient
+                for recipient, (code,), events in subscriptions
+                if code in header and (not events or event in events)
+            }
+            matched = self.store.match(header, event)
+            self.assertEqual(set(matched), expected)
+            self.assertEqual(len(matched), count)
+
+    def test_seed_from_file(self):
+        path = os.path.join(self.tmp.name, 'subscriptions.csv')
+        with open(path, 'w') as f:
+            f.write('recipient,locations,events\n'
+                    '+15550005,048113 048027,TOR SVR\n'
+                    '+15550006,048113,\n'
+                    ',048113,\n')
+        self.store.seed(path)
+        self.store.seed(path)
+        self.assertEqual(
+            sorted(self.store.match(['048027'], 'TOR')), ['+15550005']
+        )
+        self.assertEqual(self.store.match(['048113'], 'FFW'), ['+15550006'])
+        self.assertEqual(
+            sorted(SubscriptionStore(self.db_path).match(['048113'], 'SVR')),
+            ['+15550005', '+15550006'],
+        )
+
+    def test_invalid_location_code(self):
+        with self.assertRaises(ValueError):
+            self.store.subscribe('+15550009', ['12345'])
+
+
+if __name__ == '__main__':
+    unittest.main()
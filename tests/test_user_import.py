@@ -0,0 +1,140 @@
+import io
+import json
+import sqlite3
+import threading
+import unittest
+from modules.user_import import export_users, import_users, read_rows
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class TestUserImport(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:', check_same_thread=False)
+        self.conn.execute(
+            'CREATE TABLE users (username TEXT PRIMARY KEY, password TEXT NOT NULL, '
+            'role TEXT NOT NULL)'
+        )
+        self.conn.execute("INSERT INTO users VALUES ('admin', 'x', 'admin')")
+        self.conn.commit()
+
+    def fast_hash(self, password):
+        return generate_password_hash(password, method='pbkdf2:sha256:1000')
+
+    def test_csv_import_reports_row_errors(self):
+        upload = io.BytesIO(
+            b'\xef\xbb\xbfusername,password,role\r\n'
+            b'alice,pw1,user\r\n'
+            b'admin,pw2,admin\r\n'
+            b'bob,,user\r\n'
+            b'carol,pw3,\r\n'
+            b'alice,pw4,user\r\n'
+            b'dave,pw5,root\r\n'
+        )
+        report = import_users(
+            self.conn, read_rows(upload, 'csv'), hasher=self.fast_hash
+        )
+        self.assertEqual(report['imported'], 2)
+        self.assertEqual(
+            [(e['line'], e['error']) for e in report['errors']],
+            [
+                (3, 'User already exists'),
+                (4, 'Missing password'),
+                (6, 'Duplicate username in upload'),
+                (7, 'Unknown role: root'),
+            ],
+        )
+        password, role = self.conn.execute(
+            "SELECT password, role FROM users WHERE username = 'carol'"
+        ).fetchone()
+        self.assertEqual(role, 'user')
+        self.assertTrue(check_password_hash(password, 'pw3'))
+
+    def test_ndjson_import_hashes_in_parallel(self):
+        lines = [
+            json.dumps({'username': f'user{n}', 'password': f'pw{n}'})
+            for n in range(600)
+        ]
+        lines[10] = '{not json'
+        lines[11] = '[1, 2]'
+        lines[12] = json.dumps(
+            {'username': 'mallory', 'password': 'pw', 'role': ['admin']}
+        )
+        upload = io.BytesIO(('\n'.join(lines) + '\n\n').encode())
+        threads = set()
+
+        def hasher(password):
+            threads.add(threading.current_thread().name)
+            return self.fast_hash(password)
+
+        report = import_users(self.conn, read_rows(upload, 'ndjson'), 4, hasher)
+        self.assertEqual(report['imported'], 597)
+        self.assertEqual([e['line'] for e in report['errors']], [11, 12, 13])
+        self.assertEqual(report['errors'][2]['error'], "Unknown role: ['admin']")
+        self.assertGreater(len(threads), 1)
+        count = self.conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+        self.assertEqual(count, 598)
+
+    def test_user_created_concurrently_is_reported(self):
+        upload = io.BytesIO(
+            b'username,password,role\r\nerin,pw1,user\r\nfay,pw2,user\r\n'
+        )
+
+        def hasher(password):
+            if password == 'pw2':
+                # Another admin adds fay while the upload is being hashed
+                self.conn.execute("INSERT INTO users VALUES ('fay', 'theirs', 'user')")
+                self.conn.commit()
+            return self.fast_hash(password)
+
+        report = import_users(self.conn, read_rows(upload, 'csv'), 1, hasher)
+        self.assertEqual(report['imported'], 1)
+        self.assertEqual(
+            report['errors'],
+            [{'line': 3, 'username': 'fay', 'error': 'User already exists'}],
+        )
+        stored = self.conn.execute(
+            "SELECT password FROM users WHERE username = 'fay'"
+        ).fetchone()
+        self.assertEqual(stored[0], 'theirs')
+
+    def test_undecodable_or_malformed_upload_is_rejected(self):
+        rows = 'username,password,role\r\nana,pw1,user\r\n'
+        uploads = [
+            ((rows + 'josé,pw2,user\r\n').encode('cp1252'), 'not valid UTF-8'),
+            (
+                (rows + 'bob,"' + 'x' * 200000 + '",user\r\n').encode(),
+                'Malformed CSV after line 2',
+            ),
+        ]
+        for upload, error in uploads:
+            with self.assertRaises(ValueError) as raised:
+                import_users(
+                    self.conn,
+                    read_rows(io.BytesIO(upload), 'csv'),
+                    hasher=self.fast_hash,
+                )
+            self.assertIn(error, str(raised.exception))
+        count = self.conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+        self.assertEqual(count, 1)
+
+    def test_export_never_includes_passwords(self):
+        self.conn.executemany(
+            'INSERT INTO users VALUES (?, ?, ?)',
+            [(f'user{n:04d}', 'secret-hash', 'user') for n in range(1200)],
+        )
+        csv_export = ''.join(export_users(self.conn, 'csv'))
+        self.assertTrue(csv_export.startswith('username,role\r\nadmin,admin\r\n'))
+        self.assertEqual(csv_export.count('\r\n'), 1202)
+        self.assertNotIn('secret', csv_export)
+        records = [
+            json.loads(line)
+            for line in ''.join(export_users(self.conn, 'ndjson')).splitlines()
+        ]
+        self.assertEqual(len(records), 1201)
+        self.assertEqual(records[-1], {'username': 'user1199', 'role': 'user'})
+        with self.assertRaises(ValueError):
+            list(export_users(self.conn, 'xml'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from modules.delivery import DeliveryLedger
+from modules.voice import VoiceContentCache, VoiceDispatcher, render_twiml
+
+
+class LocalVoiceProvider:
+    """
+    Stand-in for the Twilio calls API; every call lasts `duration` seconds.
+    """
+
+    def __init__(self, duration):
+        self.duration = duration
+        self.ends = {}
+        self.requests = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def create(self, **params):
+        with self.lock:
+            sid = f'CA{len(self.requests)}'
+            self.requests.append(params)
+            self.ends[sid] = time.monotonic() + self.duration
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        return SimpleNamespace(sid=sid, status='queued')
+
+    def __call__(self, sid):
+        def fetch():
+            if time.monotonic() < self.ends[sid]:
+                return SimpleNamespace(status='in-progress')
+            with self.lock:
+                if self.ends.pop(sid, None):
+                    self.active -= 1
+            return SimpleNamespace(status='completed')
+
+        return SimpleNamespace(fetch=fetch)
+
+
+class TestVoiceDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.provider = LocalVoiceProvider(duration=0.05)
+        self.client = SimpleNamespace(calls=self.provider)
+
+    def dispatcher(self, **kwargs):
+        return VoiceDispatcher(self.client, '+15550000', poll_interval=0.01, **kwargs)
+
+    def test_slots_bound_concurrency_and_content_is_shared(self):
+        dispatcher = self.dispatcher(slots=4)
+        started = time.monotonic()
+        with ThreadPoolExecutor(16) as pool:
+            results = list(
+                pool.map(
+                    lambda n: dispatcher.call(f'+1555{n:04d}', 1, 'Tornado Warning'),
+                    range(40),
+                )
+            )
+        elapsed = time.monotonic() - started
+        self.assertTrue(all(status == 'completed' for _, status in results))
+        self.assertEqual(self.provider.peak, 4)
+        self.assertLess(elapsed, 2)
+
+        stats = dispatcher.stats()
+        self.assertEqual(stats['completed'], 40)
+        self.assertEqual(stats['content_cache'], {'misses': 1, 'hits': 39})
+        self.assertGreaterEqual(stats['latency_p50'], 0.05)
+        self.assertGreater(stats['calls_per_minute'], 0)
+        twiml = {params['twiml'] for params in self.provider.requests}
+        self.assertEqual(len(twiml), 1)
+
+    def test_status_callback_in_ledger_releases_slot(self):
+        self.provider.duration = 60
+        with tempfile.TemporaryDirectory() as directory:
+            ledger = DeliveryLedger(os.path.join(directory, 'test.db'))
+            dispatcher = self.dispatcher(
+                slots=1, status_callback='https://example.com/status', ledger=ledger
+            )
+            threading.Timer(0.05, ledger.update, ['CA0', 'completed']).start()
+            started = time.monotonic()
+            self.assertEqual(
+                dispatcher.call('+15551234', 1, 'Test'), ('CA0', 'completed')
+            )
+            self.assertLess(time.monotonic() - started, 1)
+            self.assertEqual(self.provider.active, 1)  # the calls API was not polled
+            ledger.close()
+
+
+class TestVoiceContent(unittest.TestCase):
+    def test_twiml_is_escaped(self):
+        self.assertIn(
+            '<Say voice="alice" loop="2">Flood &amp; wind</Say>',
+            render_twiml('Flood & wind'),
+        )
+        self.assertIn(
+            '<Play loop="2">https://x/a.wav</Play>', render_twiml('', 'https://x/a.wav')
+        )
+
+    def test_published_document_is_reused(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = VoiceContentCache(directory, 'https://example.com/static/voice/')
+            twiml, url = cache.get(9, 'Tornado Warning')
+            self.assertEqual(url, 'https://example.com/static/voice/alert-9.xml')
+            with open(os.path.join(directory, 'alert-9.xml')) as f:
+                self.assertEqual(f.read(), twiml)
+            self.assertEqual(cache.get(9, 'ignored'), (twiml, url))
+
+    def test_documents_are_pruned_after_eviction(self):
+        with tempfile.TemporaryDirectory() as directory:
+            stale = os.path.join(directory, 'alert-1.xml')
+            with open(stale, 'w') as f:
+                f.write('<Response/>')
+            os.utime(stale, (0, 0))
+            cache = VoiceContentCache(directory, 'https://example.com', size=2, keep=0)
+            self.assertFalse(os.path.exists(stale))
+            for alert_id in range(2, 6):
+                cache.get(alert_id, 'Tornado Warning')
+            self.assertEqual(
+                sorted(os.listdir(directory)), ['alert-4.xml', 'alert-5.xml']
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
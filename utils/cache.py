@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, maxsize=1024, ttl=30.0):
+        """
+        Bounded read-through cache. Entries expire after `ttl` seconds so
+        changes made by other processes are picked up, and the least
+        recently used entry is evicted when the cache is full.
+
+        Args:
+            maxsize (int): Most entries kept.
+            ttl (float): Seconds an entry stays fresh.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (expires, value)
+        self.counters = Counter()
+        self.lock = threading.Lock()
+
+    def get(self, key, load):
+        """
+        Returns the cached value for `key`, calling load() on a miss.
+        A None result is cached too, so unknown keys stay cheap.
+
+        Args:
+            key: The cache key.
+            load (callable): Returns the value when it is not cached.
+
+        Returns:
+            The value.
+        """
+        now = time.monotonic()
+        with self.lock:
+            expires, value = self.entries.get(key, (0.0, _MISSING))
+            if value is not _MISSING and now < expires:
+                self.entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return value
+            self.counters["misses"] += 1
+        value = load()
+        with self.lock:
+            self.entries[key] = (now + self.ttl, value)
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.counters["evictions"] += 1
+        return value
+
+    def invalidate(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """
+        Returns:
+            dict: Entries, hits, misses, evictions and the hit rate.
+        """
+        with self.lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                "entries": len(self.entries),
+                **self.counters,
+                "hit_rate": (
+                    round(self.counters["hits"] / lookups, 3) if lookups else 0.0
+                ),
+            }
@@ -0,0 +1,135 @@
+import os
+import sqlite3
+import threading
+
+# Database Settings
+DB_PATH = os.getenv("DB_PATH", "database.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 8))  # idle connections kept open
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", 64 * 1024 * 1024))  # bytes
+DB_CACHED_STATEMENTS = int(os.getenv("DB_CACHED_STATEMENTS", 256))
+DB_BUSY_TIMEOUT = 10  # seconds to wait for a writer's lock
+
+
+class ConnectionPool:
+    def __init__(
+        self,
+        db_path=DB_PATH,
+        size=DB_POOL_SIZE,
+        mmap_size=DB_MMAP_SIZE,
+        cached_statements=DB_CACHED_STATEMENTS,
+    ):
+        """
+        Keeps SQLite connections open between requests. A connection is
+        checked out by one thread at a time and handed back afterwards, so
+        servers that start a thread per request still reuse connections,
+        their pragmas and their prepared statements.
+
+        Args:
+            db_path (str): Path to the SQLite database.
+            size (int): Idle connections kept open; extras are closed.
+            mmap_size (int): Bytes of the database read through mmap.
+            cached_statements (int): Prepared statements kept per connection.
+        """
+        self.db_path = db_path
+        self.size = size
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self.idle = []
+        self.opened = 0
+        self.lock = threading.Lock()
+
+    def connect(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=DB_BUSY_TIMEOUT,
+            cached_statements=self.cached_statements,
+            check_same_thread=False,  # moves between threads, one at a time
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode NORMAL only fsyncs at checkpoints and stays consistent
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        with self.lock:
+            self.opened += 1
+        return conn
+
+    def acquire(self):
+        """
+        Returns:
+            sqlite3.Connection: An idle connection, or a new one.
+        """
+        with self.lock:
+            if self.idle:
+                return self.idle.pop()
+        return self.connect()
+
+    def release(self, conn):
+        """
+        Hands a connection back. Work left uncommitted is rolled back so the
+        next user starts clean.
+
+        Args:
+            conn (sqlite3.Connection): A connection from acquire().
+        """
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            return
+        with self.lock:
+            if len(self.idle) < self.size:
+                self.idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        """
+        Closes every idle connection.
+        """
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for conn in idle:
+            conn.close()
+
+    def stats(self):
+        """
+        Returns:
+            dict: Connections opened so far and currently idle.
+        """
+        return {"opened": self.opened, "idle": len(self.idle)}
+
+
+class KeysetPage:
+    def __init__(self, cursor, limit, fetch_size=100):
+        """
+        Streams one page of rows from a query that selected `limit + 1`
+        rows in keyset order. Rows are fetched in small chunks as they are
+        rendered, and the last row shown is kept so the caller can build
+        the cursor of the next page once iteration has finished.
+
+        Args:
+            cursor (sqlite3.Cursor): The executed query.
+            limit (int): Rows on the page.
+            fetch_size (int): Rows fetched from SQLite at a time.
+        """
+        self.cursor = cursor
+        self.limit = limit
+        self.fetch_size = fetch_size
+        self.last = None
+        self.more = False
+
+    def __iter__(self):
+        shown = 0
+        while True:
+            rows = self.cursor.fetchmany(self.fetch_size)
+            if not rows:
+                return
+            for row in rows:
+                if shown == self.limit:
+                    self.more = True
+                    return
+                shown += 1
+                self.last = row
+                yield row
@@ -1,4 +1,16 @@
+import re
+import threading
+from collections import Counter
 from datetime import datetime
+from utils.gsm7 import segment_count, to_gsm7
+
+# SAME header: ZCZC-ORG-EEE-PSSCCC-PSSCCC+TTTT-JJJHHMM-LLLLLLLL-
+SAME_HEADER = re.compile(
+    r"ZCZC-(?P<originator>[A-Z]{3})-(?P<event>[A-Z]{3})"
+    r"-(?P<locations>\d{6}(?:-\d{6}){0,30})\+(?P<duration>\d{4})"
+    r"-(?P<issued>\d{7})-(?P<sender>[^-]{1,8})-?"
+)
+
 
 def format_message(message):
     """
@@ -16,6 +28,161 @@ def format_message(message):
     formatted += f"TIME: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
     return formatted
 
+
+def parse_header(message):
+    """
+    Parse the SAME header of an EAS message.
+
+    Args:
+        message (str): Raw EAS message containing a SAME header.
+
+    Returns:
+        dict: Originator, event code, location codes, duration, issue time and sender.
+
+    Raises:
+        ValueError: If the message does not contain a SAME header.
+    """
+    match = SAME_HEADER.search(message or "")
+    if not match:
+        raise ValueError("Message does not contain a SAME header.")
+    return {
+        "originator": match.group("originator"),
+        "event": match.group("event"),
+        "locations": match.group("locations").split("-"),
+        "duration": match.group("duration"),
+        "issued": match.group("issued"),
+        "sender": match.group("sender"),
+    }
+
+
+# Lines of the format_message banner that carry no alert content
+BANNER_LINE = re.compile(
+    r"^(?:[-=*_]{3,}|EMERGENCY ALERT SYSTEM|ALERT TYPE:.*|TIME:.*)$"
+)
+LABEL = re.compile(r"^MESSAGE:\s*")
+
+# Applied in order, only as far as needed to save a segment
+ABBREVIATIONS = [
+    ("National Weather Service", "NWS"),
+    ("Emergency Alert System", "EAS"),
+    ("Emergency Action Notification", "EAN"),
+    ("Required Weekly Test", "RWT"),
+    ("Required Monthly Test", "RMT"),
+    ("immediately", "now"),
+    ("including", "incl"),
+    ("Warning", "Wrn"),
+    ("Advisory", "Adv"),
+    ("Statement", "Stmt"),
+    ("County", "Co"),
+    ("counties", "cos"),
+    ("minutes", "min"),
+    ("until", "til"),
+    ("and", "&"),
+]
+
+# Running totals across every SMS sent by this process
+sms_counters = Counter()
+sms_counters_lock = threading.Lock()  # SMS workers count concurrently
+
+
+def compact_message(message):
+    """
+    Strips banner lines and labels and collapses whitespace.
+
+    Args:
+        message (str): Raw or formatted EAS message.
+
+    Returns:
+        str: The alert content on a single line.
+    """
+    lines = [line.strip() for line in message.splitlines()]
+    content = [LABEL.sub("", line) for line in lines if not BANNER_LINE.match(line)]
+    return " ".join(" ".join(content).split())
+
+
+def fit_sms(text):
+    """
+    Packs text into the fewest GSM-7 segments, abbreviating only as far
+    as needed. The same input always yields the same output.
+
+    Args:
+        text (str): The alert content.
+
+    Returns:
+        dict: The rendered text, its encoding and its segment count.
+    """
+    text = to_gsm7(text)
+    steps = [text]
+    for phrase, short in ABBREVIATIONS:
+        pattern = re.compile(rf"\b{re.escape(phrase)}\b", re.IGNORECASE)
+        steps.append(pattern.sub(short, steps[-1]))
+    fewest = segment_count(steps[-1])[1]
+    rendered = next(step for step in steps if segment_count(step)[1] == fewest)
+    encoding, segments = segment_count(rendered)
+    return {
+        "text": rendered,
+        "encoding": encoding,
+        "segments": segments,
+        "abbreviated": rendered != text,
+    }
+
+
+def render_message(message, channel="sms"):
+    """
+    Render an EAS message for a delivery channel.
+
+    Args:
+        message (str): Raw or formatted EAS message.
+        channel (str): "sms", "push", "voice", or any other channel for
+            the full format.
+
+    Returns:
+        str: The message text for the channel.
+    """
+    if channel in ("push", "voice"):
+        return compact_message(message)
+    if channel != "sms":
+        return format_message(message)
+    return fit_sms(f"EAS: {compact_message(message)}")["text"]
+
+
+def count_sms(text):
+    """
+    Adds a sent SMS to the running totals.
+
+    Args:
+        text (str): The message body as sent.
+    """
+    encoding, segments = segment_count(text)
+    with sms_counters_lock:
+        sms_counters["messages"] += 1
+        sms_counters["segments"] += segments
+        sms_counters[f"{segments}_segment_messages"] += 1
+        if encoding != "GSM-7":
+            sms_counters["ucs2_messages"] += 1
+
+
+def render_digest(messages, channel="sms"):
+    """
+    Render several EAS messages as one message for a delivery channel.
+
+    Args:
+        messages (list): Raw or formatted EAS messages, most severe first.
+        channel (str): "sms", "push", "voice", or any other channel for
+            the full format.
+
+    Returns:
+        str: The combined message text for the channel.
+    """
+    if len(messages) == 1:
+        return render_message(messages[0], channel)
+    if channel not in ("sms", "push", "voice"):
+        return "\n\n".join(format_message(message) for message in messages)
+    content = " / ".join(compact_message(message) for message in messages)
+    if channel != "sms":
+        return content
+    return render_message(f"{len(messages)} alerts: {content}", "sms")
+
 # Remove or comment out test calls in the module itself
 # print(format_message("FLOOD-Heavy rain expected in your area. Evacuate immediately."))
 
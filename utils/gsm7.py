@@ -0,0 +1,77 @@
+import math
+
+# GSM 03.38 basic character set
+GSM7_BASIC = set(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+# Extension table characters cost an escape septet each
+GSM7_EXTENDED = set("^{}\\[~]|€\f")
+
+# Common characters that silently force UCS-2 and their GSM-7 stand-ins
+TRANSLITERATIONS = {
+    "‘": "'",
+    "’": "'",
+    "‚": "'",
+    "“": '"',
+    "”": '"',
+    "„": '"',
+    "–": "-",
+    "—": "-",
+    "−": "-",
+    "…": "...",
+    "\u00a0": " ",
+    "•": "*",
+    "°": " deg",
+    "\t": " ",
+}
+
+# Single / multipart payload sizes
+GSM7_SINGLE, GSM7_PART = 160, 153
+UCS2_SINGLE, UCS2_PART = 70, 67
+
+
+def is_gsm7(text):
+    """
+    Checks whether the text can be sent in the GSM-7 alphabet.
+    """
+    return all(c in GSM7_BASIC or c in GSM7_EXTENDED for c in text)
+
+
+def to_gsm7(text):
+    """
+    Swaps characters that needlessly force UCS-2 for their GSM-7 stand-ins.
+    Text with other characters outside GSM-7, such as accented Spanish or
+    non-Latin scripts, is returned unchanged so it is sent as UCS-2 rather
+    than mangled.
+
+    Args:
+        text (str): The text to convert.
+
+    Returns:
+        str: The transliterated text if it then encodes in GSM-7, otherwise
+        the original text.
+    """
+    converted = "".join(TRANSLITERATIONS.get(c, c) for c in text)
+    return converted if is_gsm7(converted) else text
+
+
+def segment_count(text):
+    """
+    Counts the SMS segments needed to send the text.
+
+    Args:
+        text (str): The message body.
+
+    Returns:
+        tuple: The encoding ("GSM-7" or "UCS-2") and the number of segments.
+    """
+    if is_gsm7(text):
+        septets = len(text) + sum(1 for c in text if c in GSM7_EXTENDED)
+        if septets <= GSM7_SINGLE:
+            return "GSM-7", 1
+        return "GSM-7", math.ceil(septets / GSM7_PART)
+    units = len(text.encode("utf-16-le")) // 2
+    if units <= UCS2_SINGLE:
+        return "UCS-2", 1
+    return "UCS-2", math.ceil(units / UCS2_PART)
@@ -0,0 +1,192 @@
+import threading
+import time
+
+
+class Timer:
+    __slots__ = ("tick", "item", "cancelled")
+
+    def __init__(self, tick, item):
+        self.tick = tick
+        self.item = item
+        self.cancelled = False
+
+    def cancel(self):
+        """
+        Cancels the timer in O(1); it is discarded when its slot is next swept.
+        """
+        self.cancelled = True
+
+
+class TimerWheel:
+    def __init__(self, tick=1.0, slots=512, now=None):
+        """
+        Hashed timer wheel. Scheduling and cancelling are O(1) and each
+        advance only sweeps the slots for the ticks that have passed, so
+        hundreds of thousands of pending timers cost nothing while idle.
+
+        Args:
+            tick (float): Resolution in seconds.
+            slots (int): Number of slots; timers further out than
+                `tick * slots` wait in their slot for extra rotations.
+            now (float, optional): Start time. Defaults to time.monotonic().
+        """
+        self.tick = tick
+        self.slots = [[] for _ in range(slots)]
+        self.current = int((time.monotonic() if now is None else now) / tick)
+        self.lock = threading.Lock()
+
+    def schedule(self, delay, item, now=None):
+        """
+        Schedules `item` to be returned by expire() once `delay` has passed.
+
+        Args:
+            delay (float): Seconds from now.
+            item: Any value handed back on expiry.
+            now (float, optional): Current time. Defaults to time.monotonic().
+
+        Returns:
+            Timer: A handle that can be cancelled.
+        """
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            tick = max(-int(-(now + delay) // self.tick), self.current + 1)
+            timer = Timer(tick, item)
+            self.slots[tick % len(self.slots)].append(timer)
+        return timer
+
+    def expire(self, now=None):
+        """
+        Advances the wheel to `now`.
+
+        Args:
+            now (float, optional): Current time. Defaults to time.monotonic().
+
+        Returns:
+            list: Items of the timers that fell due, in no particular order.
+        """
+        now = time.monotonic() if now is None else now
+        due = []
+        with self.lock:
+            target = int(now / self.tick)
+            if target <= self.current:
+                return due
+            if target - self.current >= len(self.slots):
+                ticks = range(len(self.slots))  # a full turn sweeps every slot
+            else:
+                ticks = range(self.current + 1, target + 1)
+            for tick in ticks:
+                index = tick % len(self.slots)
+                pending = []
+                for timer in self.slots[index]:
+                    if timer.cancelled:
+                        continue
+                    if timer.tick <= target:
+                        due.append(timer.item)
+                    else:
+                        pending.append(timer)
+                self.slots[index] = pending
+            self.current = target
+        return due
+
+    def __len__(self):
+        with self.lock:
+            return sum(
+                1 for slot in self.slots for timer in slot if not timer.cancelled
+            )
+
+
+class HierarchicalTimerWheel:
+    def __init__(self, tick=1.0, slots=64, levels=3, now=None):
+        """
+        Timer wheel with coarser wheels stacked above the first, each slot
+        of a level spanning a full turn of the level below. Far-off timers
+        sit untouched in a coarse slot and cascade down as they come near,
+        so each timer is moved at most `levels` times however long its delay.
+
+        Args:
+            tick (float): Resolution in seconds.
+            slots (int): Slots per level.
+            levels (int): Number of levels; delays up to
+                `tick * slots ** levels` are placed directly.
+            now (float, optional): Start time. Defaults to time.monotonic().
+        """
+        self.tick = tick
+        self.size = slots
+        self.wheels = [[[] for _ in range(slots)] for _ in range(levels)]
+        self.current = int((time.monotonic() if now is None else now) / tick)
+        self.lock = threading.Lock()
+
+    def place(self, timer):
+        delta = timer.tick - self.current
+        for level, wheel in enumerate(self.wheels):
+            span = self.size ** (level + 1)
+            if delta < span or level == len(self.wheels) - 1:
+                wheel[(timer.tick // self.size**level) % self.size].append(timer)
+                return
+
+    def schedule(self, delay, item, now=None):
+        """
+        Schedules `item` to be returned by expire() once `delay` has passed.
+
+        Args:
+            delay (float): Seconds from now.
+            item: Any value handed back on expiry.
+            now (float, optional): Current time. Defaults to time.monotonic().
+
+        Returns:
+            Timer: A handle that can be cancelled.
+        """
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            tick = max(-int(-(now + delay) // self.tick), self.current + 1)
+            timer = Timer(tick, item)
+            self.place(timer)
+        return timer
+
+    def expire(self, now=None):
+        """
+        Advances the wheel to `now`, cascading coarse slots as their turn
+        comes up.
+
+        Args:
+            now (float, optional): Current time. Defaults to time.monotonic().
+
+        Returns:
+            list: Items of the timers that fell due.
+        """
+        now = time.monotonic() if now is None else now
+        due = []
+        with self.lock:
+            target = int(now / self.tick)
+            while self.current < target:
+                self.current += 1
+                for level in range(1, len(self.wheels)):
+                    if self.current % self.size**level:
+                        break
+                    index = (self.current // self.size**level) % self.size
+                    cascading = self.wheels[level][index]
+                    self.wheels[level][index] = []
+                    for timer in cascading:
+                        if not timer.cancelled:
+                            self.place(timer)
+                index = self.current % self.size
+                expiring = self.wheels[0][index]
+                self.wheels[0][index] = []
+                for timer in expiring:
+                    if timer.cancelled:
+                        continue
+                    if timer.tick <= self.current:
+                        due.append(timer.item)
+                    else:
+                        self.place(timer)
+        return due
+
+    def __len__(self):
+        with self.lock:
+            return sum(
+                1
+                for wheel in self.wheels
+                for slot in wheel
+                for timer in slot
+                if not timer.cancelled
+            )